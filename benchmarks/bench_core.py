@@ -0,0 +1,381 @@
+#!/usr/bin/python3
+"""
+Brickmaster Core Loop Benchmark
+
+Builds a Brickmaster system from a hardware config, on simulated board, GPIO, I2C devices and MQTT broker, then drives
+the run loop for a set time. Reports loop rate, publish rate, allocations per pass and the latency from an inbound
+'/set' command to the GPIO write.
+
+Usage: python benchmarks/bench_core.py hwconfigs/brickmaster8.json --seconds 10
+"""
+
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+
+# The fakes must come first so they shadow any real hardware or MQTT libraries which are installed.
+sys.path.insert(0, os.path.join(BENCH_DIR, 'fakes'))
+sys.path.insert(1, REPO_DIR)
+
+import fakehw
+import paho.mqtt.client
+import brickmaster
+import brickmaster.const as const
+
+
+def load_config(config_path, log_level):
+    """
+    Load a hardware config and point it at the simulated environment.
+
+    :param config_path: Path to the config JSON.
+    :type config_path: str
+    :param log_level: Log level to override the config with, if any.
+    :type log_level: str
+    :return: dict
+    """
+    with open(config_path, encoding='utf-8') as config_file:
+        config = json.load(config_file)
+    config['system']['mqtt']['broker'] = 'localhost'
+    config['system']['mqtt']['log'] = False
+    # Always use the loop runtime, since the benchmark drives the passes itself.
+    config['system']['runtime'] = 'loop'
+    if log_level is not None:
+        config['system']['log_level'] = log_level
+    # Scripts are found relative to the working directory. Pin them to the repo's script directory.
+    if 'scripts' in config:
+        if 'dir' not in config['scripts']:
+            adapted(config_path, "no script directory, using 'scripts'")
+            config['scripts']['dir'] = 'scripts'
+        if not os.path.isabs(config['scripts']['dir']):
+            config['scripts']['dir'] = os.path.join(REPO_DIR, config['scripts']['dir'])
+    # Some configs key sensors by ID, rather than listing them.
+    if isinstance(config.get('sensors'), dict):
+        adapted(config_path, "sensors given as a dict, converting to a list")
+        sensors = []
+        for sensor_id in config['sensors']:
+            sensors.append(dict(config['sensors'][sensor_id], id=sensor_id))
+        config['sensors'] = sensors
+    # Older configs define controls by their pin source, with 'pin' and 'addr'.
+    for control_cfg in config['controls']:
+        if control_cfg.get('type') in ('gpio', 'aw9523') and 'pins' not in control_cfg:
+            adapted(config_path, "control '{}' in the old '{}' format, converting to single".format(
+                control_cfg['id'], control_cfg['type']))
+            if control_cfg['type'] == 'aw9523':
+                control_cfg['extio'] = control_cfg.pop('addr')
+            control_cfg['type'] = 'single'
+            control_cfg['pins'] = control_cfg.pop('pin')
+    # Some configs give bare GPIO numbers, which the simulated board names as D pins.
+    indicators = config['system'].get('indicators', {})
+    for indicator in indicators:
+        indicators[indicator] = board_pin(config_path, indicators[indicator])
+    for control_cfg in config['controls']:
+        if control_cfg.get('extio') is None and 'pins' in control_cfg:
+            pins = control_cfg['pins']
+            if isinstance(pins, dict):
+                control_cfg['pins'] = {state: board_pin(config_path, pins[state]) for state in pins}
+            elif isinstance(pins, list):
+                control_cfg['pins'] = [board_pin(config_path, pin) for pin in pins]
+            else:
+                control_cfg['pins'] = board_pin(config_path, pins)
+    return config
+
+
+def adapted(config_path, message):
+    """
+    Note a change made to fit a config to the simulated environment.
+
+    :param config_path: Config being loaded.
+    :type config_path: str
+    :param message: What was changed.
+    :type message: str
+    :return: None
+    """
+    print("{}: {}".format(os.path.basename(config_path), message), file=sys.stderr)
+
+
+def board_pin(config_path, pin):
+    """
+    Name a bare GPIO number as a D pin.
+
+    :param config_path: Config being loaded.
+    :type config_path: str
+    :param pin: Pin from the config.
+    :type pin: str
+    :return: str
+    """
+    if isinstance(pin, int) or (isinstance(pin, str) and pin.isdigit()):
+        adapted(config_path, "bare pin number '{}', using 'D{}'".format(pin, pin))
+        return 'D{}'.format(pin)
+    return pin
+
+
+def pin_key(control_cfg):
+    """
+    Key the simulated hardware logs writes for a single control's pin under. Returns None for controls which can't be
+    timed.
+
+    :param control_cfg: Control's config.
+    :type control_cfg: dict
+    :return: str
+    """
+    if control_cfg.get('type', 'single').lower() != 'single' or control_cfg.get('disable', False):
+        return None
+    pins = control_cfg['pins']
+    if isinstance(pins, (dict, list)):
+        return None
+    if control_cfg.get('extio') is not None:
+        extio = control_cfg['extio']
+        if isinstance(extio, str):
+            extio = int(extio, 16)
+        return 'aw9523:{}:{}'.format(hex(extio), int(pins))
+    return str(pins)
+
+
+def percentile(samples, pct):
+    """
+    Nearest-rank percentile.
+
+    :param samples: Samples, sorted.
+    :type samples: list
+    :param pct: Percentile, 0-100.
+    :type pct: float
+    :return: float
+    """
+    if not samples:
+        return None
+    rank = max(0, min(len(samples) - 1, int(round(pct / 100 * len(samples) + 0.5)) - 1))
+    return samples[rank]
+
+
+class CommandInjector:
+    """
+    Sends '/set' commands to single controls from a separate thread, the way the MQTT client's network thread would,
+    and times how long each one takes to reach its pin.
+    """
+    def __init__(self, client, system_id, targets, interval, timeout=1.0):
+        """
+        :param client: Simulated MQTT client the core is using.
+        :type client: paho.mqtt.client.Client
+        :param system_id: Short name of the system, for building topics.
+        :type system_id: str
+        :param targets: Controls to command, as a list of (control object, pin key, active low) tuples.
+        :type targets: list
+        :param interval: Time between commands, in seconds.
+        :type interval: float
+        :param timeout: How long to wait for a command to reach the pin before counting it as missed.
+        :type timeout: float
+        """
+        self._client = client
+        self._system_id = system_id
+        self._targets = targets
+        self._interval = interval
+        self._timeout = timeout
+        self._running = False
+        self._thread = None
+        self.latencies = []
+        self.missed = 0
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self, core):
+        """
+        Stop injecting. Keeps the core's run loop going until the last command is through, since queued commands
+        only reach the pins when the loop runs.
+
+        :param core: Brickmaster core.
+        :type core: brickmaster.Brickmaster
+        """
+        self._running = False
+        if self._thread is not None:
+            while self._thread.is_alive():
+                core._tick()
+                self._thread.join(0.001)
+
+    def _run(self):
+        i = 0
+        while self._running:
+            control, key, active_low = self._targets[i % len(self._targets)]
+            i += 1
+            turn_on = control.status != 'ON'
+            event, stamps = fakehw.watch(key, turn_on != active_low)
+            topic = 'brickmaster/{}/controls/{}/set'.format(self._system_id, control.id)
+            sent = time.monotonic_ns()
+            self._client.inject(topic, b'on' if turn_on else b'off')
+            if event.wait(self._timeout):
+                self.latencies.append(stamps[0] - sent)
+            else:
+                self.missed += 1
+            time.sleep(self._interval)
+
+
+def run_passes(core, seconds, sleep):
+    """
+    Drive the core's run loop for a set time.
+
+    :param core: Brickmaster core.
+    :type core: brickmaster.Brickmaster
+    :param seconds: How long to run for.
+    :type seconds: float
+    :param sleep: Sleep between passes, as the real run loop does. If False, passes run back to back.
+    :type sleep: bool
+    :return: tuple of (passes, time spent in passes in ns)
+    """
+    passes = 0
+    busy = 0
+    end = time.monotonic_ns() + int(seconds * 1e9)
+    while time.monotonic_ns() < end:
+        start = time.monotonic_ns()
+        core._tick()
+        busy += time.monotonic_ns() - start
+        passes += 1
+        if sleep:
+            core._scheduler.sleep()
+    return passes, busy
+
+
+def measure_allocations(core, passes):
+    """
+    Trace allocations across a number of passes.
+
+    :param core: Brickmaster core.
+    :type core: brickmaster.Brickmaster
+    :param passes: Number of passes to trace.
+    :type passes: int
+    :return: dict
+    """
+    tracemalloc.start()
+    peaks = []
+    blocks_start = sys.getallocatedblocks()
+    for i in range(passes):
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        core._tick()
+        peaks.append(tracemalloc.get_traced_memory()[1] - before)
+    blocks_end = sys.getallocatedblocks()
+    tracemalloc.stop()
+    peaks.sort()
+    return {
+        'peak_bytes_mean': sum(peaks) / len(peaks),
+        'peak_bytes_max': peaks[-1],
+        'blocks_net': (blocks_end - blocks_start) / passes
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Brickmaster core loop benchmark on simulated hardware.")
+    parser.add_argument("config", help="Hardware config to build the system from, ie: hwconfigs/brickmaster8.json")
+    parser.add_argument("-s", "--seconds", type=float, default=10, help="Time to run the measured loop for.")
+    parser.add_argument("-w", "--warmup", type=float, default=1, help="Time to run before measuring.")
+    parser.add_argument("-r", "--rate", type=float, default=20, help="Commands to inject per second. 0 disables.")
+    parser.add_argument("-a", "--alloc-passes", type=int, default=500,
+                        help="Passes to trace allocations over. 0 disables.")
+    parser.add_argument("--script", help="Start the named script before measuring.")
+    parser.add_argument("--no-sleep", action="store_true", help="Run passes back to back, without scheduler sleeps.")
+    parser.add_argument("--log-level", help="Override the config's log level.")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+    args = parser.parse_args()
+
+    config = load_config(args.config, args.log_level)
+    system_id = config['system']['id']
+    targets_cfg = [(control_cfg['id'], pin_key(control_cfg), control_cfg.get('active_low', False))
+                   for control_cfg in config['controls']]
+
+    # The core is chatty on startup. Keep its prints out of the results.
+    with contextlib.redirect_stdout(io.StringIO()):
+        core = brickmaster.Brickmaster(config, '000000000000')
+    client = paho.mqtt.client.CLIENTS[-1]
+
+    # Warm up. Connects, runs discovery and sends initial state.
+    run_passes(core, args.warmup, not args.no_sleep)
+    if core._network.status[0] != const.NET_STATUS_CONNECTED:
+        print("Core did not connect to the simulated broker during warmup.")
+        sys.exit(1)
+    if args.script is not None:
+        client.inject('brickmaster/{}/script/set'.format(system_id), args.script.encode('utf-8'))
+
+    targets = []
+    for control_id, key, active_low in targets_cfg:
+        if key is not None and control_id in core._controls:
+            targets.append((core._controls[control_id], key, active_low))
+    injector = None
+    if args.rate > 0 and targets:
+        injector = CommandInjector(client, system_id, targets, 1 / args.rate)
+
+    # Measured run.
+    fakehw.reset()
+    publish_start = client.publish_count
+    bytes_start = client.publish_bytes
+    gc_start = gc.get_stats()[0]['collections']
+    if injector is not None:
+        injector.start()
+    start = time.monotonic_ns()
+    passes, busy = run_passes(core, args.seconds, not args.no_sleep)
+    elapsed = (time.monotonic_ns() - start) / 1e9
+    if injector is not None:
+        injector.stop(core)
+    gc_collections = gc.get_stats()[0]['collections'] - gc_start
+
+    results = {
+        'config': os.path.basename(args.config),
+        'seconds': elapsed,
+        'passes': passes,
+        'passes_per_sec': passes / elapsed,
+        'pass_time_us_mean': busy / passes / 1000,
+        'busy_pct': busy / 1e9 / elapsed * 100,
+        'messages_per_sec': (client.publish_count - publish_start) / elapsed,
+        'message_bytes_per_sec': (client.publish_bytes - bytes_start) / elapsed,
+        'gpio_writes_per_sec': len(fakehw.WRITES) / elapsed,
+        'i2c_writes_per_sec': {device: count / elapsed for device, count in fakehw.I2C_WRITES.items()},
+        'gc_gen0_per_1k_passes': gc_collections / passes * 1000
+    }
+    if injector is not None:
+        latencies = sorted(injector.latencies)
+        results['commands'] = len(latencies) + injector.missed
+        results['commands_missed'] = injector.missed
+        results['set_latency_us_p50'] = percentile(latencies, 50) / 1000 if latencies else None
+        results['set_latency_us_p99'] = percentile(latencies, 99) / 1000 if latencies else None
+    if args.alloc_passes > 0:
+        results['alloc'] = measure_allocations(core, args.alloc_passes)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print("Config:            {}".format(results['config']))
+    print("Passes:            {} in {:.2f}s ({:.1f}/s)".format(passes, elapsed, results['passes_per_sec']))
+    print("Pass time:         {:.1f} us mean, {:.2f}% busy".format(results['pass_time_us_mean'], results['busy_pct']))
+    print("Published:         {:.1f} messages/s, {:.0f} bytes/s".format(
+        results['messages_per_sec'], results['message_bytes_per_sec']))
+    print("GPIO writes:       {:.1f}/s".format(results['gpio_writes_per_sec']))
+    for device in sorted(results['i2c_writes_per_sec']):
+        print("I2C {:14}{:.1f} writes/s".format(device + ':', results['i2c_writes_per_sec'][device]))
+    print("GC gen0:           {:.2f} collections per 1000 passes".format(results['gc_gen0_per_1k_passes']))
+    if 'commands' in results:
+        if results['set_latency_us_p50'] is None:
+            print("Set latency:       no commands reached a pin ({} sent)".format(results['commands']))
+        else:
+            print("Set latency:       p50 {:.1f} us, p99 {:.1f} us ({} commands, {} missed)".format(
+                results['set_latency_us_p50'], results['set_latency_us_p99'], results['commands'],
+                results['commands_missed']))
+    else:
+        print("Set latency:       not measured, no single controls to command")
+    if 'alloc' in results:
+        print("Allocations:       {:.0f} B peak per pass (max {}), {:+.3f} net blocks per pass".format(
+            results['alloc']['peak_bytes_mean'], results['alloc']['peak_bytes_max'], results['alloc']['blocks_net']))
+
+
+if __name__ == '__main__':
+    main()
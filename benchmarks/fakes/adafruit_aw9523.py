@@ -0,0 +1,74 @@
+"""
+Fake adafruit_aw9523 module for benchmarking. Every write to the output register is one I2C transaction, and each pin
+it changes is logged to fakehw. Raw writes through i2c_device, ie: to the dimming registers, are one transaction each.
+"""
+
+import fakehw
+
+
+class _Pin:
+    def __init__(self, aw9523, pin):
+        self._aw9523 = aw9523
+        self._pin = pin
+
+    def switch_to_output(self, value=False, **kwargs):
+        self._aw9523.directions |= 1 << self._pin
+        self.value = value
+
+    @property
+    def value(self):
+        return bool(self._aw9523.outputs >> self._pin & 1)
+
+    @value.setter
+    def value(self, value):
+        if value:
+            self._aw9523.outputs = self._aw9523.outputs | (1 << self._pin)
+        else:
+            self._aw9523.outputs = self._aw9523.outputs & ~(1 << self._pin)
+
+
+class _I2CDevice:
+    def __init__(self, aw9523):
+        self._aw9523 = aw9523
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+    def write(self, buf, start=0, end=None):
+        self._aw9523.registers.append(bytes(buf[start:end]))
+        fakehw.record_i2c(self._aw9523._device)
+
+
+class AW9523:
+    """
+    An AW9523 GPIO expander.
+    """
+    def __init__(self, i2c_bus, address=0x58, reset=True):
+        self._device = 'aw9523:{}'.format(hex(address))
+        self._outputs = 0
+        self.directions = 0
+        self.LED_modes = 0
+        self.registers = [] # Raw register writes.
+        self.i2c_device = _I2CDevice(self)
+
+    def get_pin(self, pin):
+        return _Pin(self, pin)
+
+    @property
+    def outputs(self):
+        return self._outputs
+
+    @outputs.setter
+    def outputs(self, value):
+        changed = self._outputs ^ value
+        self._outputs = value
+        fakehw.record_i2c(self._device)
+        pin = 0
+        while changed:
+            if changed & 1:
+                fakehw.record('{}:{}'.format(self._device, pin), bool(value >> pin & 1))
+            changed >>= 1
+            pin += 1
@@ -0,0 +1,36 @@
+"""
+Fake adafruit_ht16k33.segments module for benchmarking. Every print or fill is one I2C transaction.
+"""
+
+import fakehw
+
+
+class Seg7x4:
+    """
+    A 4 digit 7 segment display.
+    """
+    def __init__(self, i2c, address=0x70, auto_write=True):
+        self._device = 'ht16k33:{}'.format(hex(address))
+        self.colon = False
+        self.brightness = 1.0
+        self.text = ''
+
+    def print(self, value):
+        self.text = value
+        fakehw.record_i2c(self._device)
+
+    def fill(self, color):
+        self.text = ''
+        fakehw.record_i2c(self._device)
+
+
+class BigSeg7x4(Seg7x4):
+    """
+    A 1.2" 4 digit 7 segment display, with extra dots.
+    """
+    def __init__(self, i2c, address=0x70, auto_write=True):
+        super().__init__(i2c, address, auto_write)
+        self.ampm = False
+        self.top_left_dot = False
+        self.bottom_left_dot = False
+        self.colons = [False, False]
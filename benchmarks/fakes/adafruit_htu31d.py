@@ -0,0 +1,20 @@
+"""
+Fake adafruit_htu31d module for benchmarking. Measurements block for the sensor's conversion time, like the real one.
+"""
+
+import time
+import fakehw
+
+
+class HTU31D:
+    """
+    An HTU31D temperature and humidity sensor.
+    """
+    def __init__(self, i2c_bus, address=0x40):
+        self._device = 'htu31d:{}'.format(hex(address))
+
+    @property
+    def measurements(self):
+        fakehw.record_i2c(self._device)
+        time.sleep(0.02)
+        return 21.5, 40.0
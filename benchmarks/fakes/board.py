@@ -0,0 +1,10 @@
+"""
+Fake board module for benchmarking. Provides D0-D39, A0-A7 and the I2C pins.
+"""
+
+import microcontroller
+
+board_id = 'brickmaster_benchmark'
+
+for _name in ['D{}'.format(_i) for _i in range(40)] + ['A{}'.format(_i) for _i in range(8)] + ['SCL', 'SDA']:
+    globals()[_name] = microcontroller.Pin(_name)
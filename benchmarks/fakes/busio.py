@@ -0,0 +1,21 @@
+"""
+Fake busio module for benchmarking.
+"""
+
+
+class I2C:
+    """
+    An I2C bus. Devices log their own transactions to fakehw.
+    """
+    def __init__(self, scl, sda, frequency=100000):
+        self.scl = scl
+        self.sda = sda
+
+    def try_lock(self):
+        return True
+
+    def unlock(self):
+        pass
+
+    def deinit(self):
+        pass
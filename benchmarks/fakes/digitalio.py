@@ -0,0 +1,41 @@
+"""
+Fake digitalio module for benchmarking. Output writes are logged to fakehw.
+"""
+
+import fakehw
+
+
+class DriveMode:
+    PUSH_PULL = 0
+    OPEN_DRAIN = 1
+
+
+class Direction:
+    INPUT = 0
+    OUTPUT = 1
+
+
+class DigitalInOut:
+    """
+    A board pin used as a digital output.
+    """
+    def __init__(self, pin):
+        self._pin = pin.name
+        self._value = False
+        self.direction = Direction.INPUT
+
+    def switch_to_output(self, value=False, drive_mode=DriveMode.PUSH_PULL):
+        self.direction = Direction.OUTPUT
+        self.value = value
+
+    @property
+    def value(self):
+        return self._value
+
+    @value.setter
+    def value(self, value):
+        self._value = value
+        fakehw.record(self._pin, value)
+
+    def deinit(self):
+        pass
@@ -0,0 +1,75 @@
+"""
+Brickmaster Benchmark - Simulated Hardware Log
+
+Shared record of every output write the fake hardware modules see. The harness uses it to count bus traffic and to
+time how long a command takes to reach a pin.
+"""
+
+import threading
+import time
+
+# Output writes, as (time.monotonic_ns(), pin key, value) tuples.
+WRITES = []
+# I2C bus transactions, by device.
+I2C_WRITES = {}
+# Pending waits for a pin to reach a value, keyed by pin key.
+_watches = {}
+_lock = threading.Lock()
+
+
+def record(pin, value):
+    """
+    Record an output write.
+
+    :param pin: Key for the pin, ie: 'D5' or 'aw9523:0x58:11'
+    :type pin: str
+    :param value: Value written.
+    :type value: bool
+    :return: None
+    """
+    stamp = time.monotonic_ns()
+    WRITES.append((stamp, pin, value))
+    with _lock:
+        watch = _watches.get(pin)
+        if watch is not None and watch[0] == value:
+            del _watches[pin]
+            watch[1].append(stamp)
+            watch[2].set()
+
+
+def record_i2c(device):
+    """
+    Count a transaction on the I2C bus.
+
+    :param device: Name of the device doing the write, ie: 'aw9523:0x58'
+    :type device: str
+    :return: None
+    """
+    I2C_WRITES[device] = I2C_WRITES.get(device, 0) + 1
+
+
+def watch(pin, value):
+    """
+    Start waiting for a pin to be written with a value.
+
+    :param pin: Key for the pin.
+    :type pin: str
+    :param value: Value to wait for.
+    :type value: bool
+    :return: tuple of (threading.Event, list). The list gets the write's timestamp when the event is set.
+    """
+    event = threading.Event()
+    stamps = []
+    with _lock:
+        _watches[pin] = (value, stamps, event)
+    return event, stamps
+
+
+def reset():
+    """
+    Clear the write logs.
+
+    :return: None
+    """
+    WRITES.clear()
+    I2C_WRITES.clear()
@@ -0,0 +1,18 @@
+"""
+Fake microcontroller module for benchmarking.
+"""
+
+
+class Pin:
+    """
+    A named board pin.
+    """
+    def __init__(self, name):
+        self.name = name
+
+    def __repr__(self):
+        return 'board.' + self.name
+
+
+def reset():
+    raise SystemExit("Fake microcontroller reset.")
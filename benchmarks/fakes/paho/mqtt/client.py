@@ -0,0 +1,119 @@
+"""
+Fake paho.mqtt.client module for benchmarking.
+
+Acts as both the client and the broker. Publishes are counted rather than sent, and inject() delivers an inbound
+message to the subscribed callback from a separate thread, the way paho's network thread does.
+"""
+
+import threading
+import time
+
+# Clients that have been created, so the harness can reach them.
+CLIENTS = []
+
+
+class MQTTMessage:
+    """
+    An inbound message.
+    """
+    def __init__(self, topic, payload, qos=0, retain=False):
+        self.topic = topic
+        self.payload = payload
+        self.qos = qos
+        self.retain = retain
+        self.timestamp = time.monotonic()
+
+
+class Client:
+    """
+    A simulated MQTT client, connected to a simulated broker.
+    """
+    def __init__(self, client_id='', clean_session=None, userdata=None, **kwargs):
+        self._client_id = client_id
+        self._userdata = userdata
+        self._callbacks = {}
+        self._lock = threading.Lock()
+        self.subscriptions = []
+        # Published messages, by topic.
+        self.published = {}
+        self.publish_count = 0
+        self.publish_bytes = 0
+        self.connected = False
+        self.on_connect = None
+        self.on_disconnect = None
+        self.on_message = None
+        CLIENTS.append(self)
+
+    def username_pw_set(self, username, password=None):
+        pass
+
+    def will_set(self, topic, payload=None, qos=0, retain=False):
+        pass
+
+    def enable_logger(self, logger=None):
+        pass
+
+    def connect(self, host, port=1883, keepalive=60, **kwargs):
+        return 0
+
+    def loop_start(self):
+        # Paho's network thread calls on_connect once the broker accepts the connection. Like Paho, don't wait for it,
+        # as the callback runs under the core's run lock.
+        thread = threading.Thread(target=self._connected, daemon=True)
+        thread.start()
+
+    def loop_stop(self):
+        pass
+
+    def disconnect(self):
+        self.connected = False
+        if self.on_disconnect is not None:
+            self.on_disconnect(self, self._userdata, 0)
+
+    def subscribe(self, topic, qos=0):
+        self.subscriptions.append(topic)
+        return 0, len(self.subscriptions)
+
+    def message_callback_add(self, sub, callback):
+        with self._lock:
+            self._callbacks[sub] = callback
+
+    def publish(self, topic, payload=None, qos=0, retain=False):
+        if payload is None:
+            payload = b''
+        elif isinstance(payload, str):
+            payload = payload.encode('utf-8')
+        elif isinstance(payload, (int, float)):
+            payload = str(payload).encode('ascii')
+        elif not isinstance(payload, (bytes, bytearray)):
+            raise TypeError("payload must be a string, bytearray, int, float or None.")
+        with self._lock:
+            self.published[topic] = self.published.get(topic, 0) + 1
+            self.publish_count += 1
+            self.publish_bytes += len(payload)
+
+    def inject(self, topic, payload):
+        """
+        Deliver a message as if it arrived from the broker. Runs the callback on a new thread and waits for it.
+
+        :param topic: Topic the message arrives on.
+        :type topic: str
+        :param payload: Message payload.
+        :type payload: bytes
+        :return: None
+        """
+        with self._lock:
+            callback = self._callbacks.get(topic)
+        if callback is None:
+            callback = self.on_message
+        if callback is None:
+            return
+        thread = threading.Thread(target=callback, args=(self, self._userdata, MQTTMessage(topic, payload)),
+                                  daemon=True)
+        thread.start()
+        thread.join()
+
+    def _connected(self):
+        self.connected = True
+        if self.on_connect is not None:
+            self.on_connect(self, self._userdata, {}, 0)
@@ -2,7 +2,8 @@
 Brickmaster2 Configuration Processing
 """
 
-import adafruit_logging as logging
+import brickmaster.log as logging
+from .const import PRESETS, STEP_PRESETS
 import sys
 import json
 # import os
@@ -21,7 +22,7 @@ class BM2Config:
         if not self._validate():
             raise ValueError("File is not a valid Brickmaster configuration.")
 
-        self._logger.info("Config: Setting log level to: {}".format(self._config['system']['log_level_name']))
+        self._logger.info("Config: Setting log level to: {}", self._config['system']['log_level_name'])
         self._logger.setLevel(self._config['system']['log_level'])
 
     def config_json(self):
@@ -42,21 +43,21 @@ class BM2Config:
             'scripts': {},
             'sensors': []
         }
-        print(self._config)
+        self._logger.debug("Config: Validating config {}", self._config)
         for key in required_keys:
-            self._logger.debug("Checking for section '{}'".format(key))
+            self._logger.debug("Checking for section '{}'", key)
             if key not in self._config:
-                self._logger.critical("Required configuration section '{}' not present. Cannot continue!".format(key))
+                self._logger.critical("Required configuration section '{}' not present. Cannot continue!", key)
                 sys.exit(1)
         for key in optional_keys:
-            self._logger.debug("Checking for section '{}'".format(key))
+            self._logger.debug("Checking for section '{}'", key)
             if key not in self._config:
-                self._logger.info("Optional configuration section '{}' not present.".format(key))
+                self._logger.info("Optional configuration section '{}' not present.", key)
                 self._config[key] = optional_defaults[key]
 
         # Change the logging level.
         self._validate_logging()
-        self._logger.info("Config: Adjusting log level to '{}'".format(self._config['system']['log_level_name']))
+        self._logger.info("Config: Adjusting log level to '{}'", self._config['system']['log_level_name'])
         self._logger.setLevel(self._config['system']['log_level'])
         # Make sure the right sections exist.
         self._validate_system()
@@ -81,22 +82,33 @@ class BM2Config:
         i = 0
         to_delete = []
         while i < len(self._config['sensors']):
-            self._logger.debug("Config: Validating sensor definition '{}'".format(self._config['sensors'][i]))
+            self._logger.debug("Config: Validating sensor definition '{}'", self._config['sensors'][i])
             required_params = ['id','type','name','address']
             for param in required_params:
                 if param not in self._config['sensors'][i]:
                     self._logger.critical("Config: Required sensor config option '{}' missing in control definition {}. "
-                                          "Cannot configure!".format(param, i+1))
+                                          "Cannot configure!", param, i+1)
                     to_delete.append(i)
                     i += 1
                     continue
             # Sensor is validated. Convert the address to hex integer.
             self._config['sensors'][i]['address'] = int(self._config['sensors'][i]['address'], 16)
+            # Optional parameters.
+            optional_defaults = {
+                'publish_time': 60,
+                'sample_time': None,
+                'history': 60
+            }
+            for param in optional_defaults:
+                if param not in self._config['sensors'][i]:
+                    self._logger.info("Config: Sensor option '{}' not found, using default '{}'",
+                                      param, optional_defaults[param])
+                    self._config['sensors'][i][param] = optional_defaults[param]
             i += 1
 
         # Make the to_delete list unique.
         to_delete = list(set(to_delete))
-        self._logger.debug("Sensors to remove: {}".format(to_delete))
+        self._logger.debug("Sensors to remove: {}", to_delete)
         # Delete any sensors that have been invalidated
         for d in sorted(to_delete, reverse=True):
             del self._config['sensors'][d]
@@ -107,26 +119,32 @@ class BM2Config:
         """
         self._logger.debug("Config: Validating system section")
         required_params = ['id', 'mqtt']
-        optional_params = ['name', 'i2c', 'interface', 'log_level', 'wifihw']
+        optional_params = ['name', 'i2c', 'interface', 'log_level', 'wifihw', 'runtime', 'perf', 'command_mode',
+                           'command_queue', 'flasher_timing', 'fade_rate']
         optional_defaults = {
             'i2c': None,
             'interface': 'wlan0',
             'log_level': 'info',
-            'wifihw': None
+            'wifihw': None,
+            'runtime': 'loop',
+            'perf': False,
+            'command_mode': 'queue',
+            'command_queue': 32,
+            'flasher_timing': 'loop',
+            'fade_rate': 50
         }
         # Check for presence of required options.
         for param in required_params:
-            self._logger.debug("Config: Checking for required key '{}'".format(param))
+            self._logger.debug("Config: Checking for required key '{}'", param)
             if param not in self._config['system']:
-                self._logger.critical("Config: Required config option '{}' missing. Cannot continue!".format(param))
+                self._logger.critical("Config: Required config option '{}' missing. Cannot continue!", param)
                 sys.exit(1)
 
         # Check for optional settings, assign the defaults if need be.
         for param in optional_params:
-            self._logger.debug("Config: Checking for optional parameter '{}'".format(param))
+            self._logger.debug("Config: Checking for optional parameter '{}'", param)
             if param not in self._config['system']:
-                self._logger.info("Option '{}' not found, using default '{}'".
-                                     format(param, optional_defaults[param]))
+                self._logger.info("Option '{}' not found, using default '{}'", param, optional_defaults[param])
                 self._config['system'][param] = optional_defaults[param]
         if 'name' not in self._config['system']:
             self._logger.info("Config: Name not set, defaulting to ID.")
@@ -143,6 +161,47 @@ class BM2Config:
         if 'port' not in self._config['system']['mqtt']:
             self._config['system']['mqtt']['port'] = 1883
 
+        # Check the runtime. Asyncio is only available on general-purpose systems.
+        if self._config['system']['runtime'] not in ('loop', 'asyncio'):
+            self._logger.warning("Config: Runtime '{}' not valid. Defaulting to 'loop'.",
+                                 self._config['system']['runtime'])
+            self._config['system']['runtime'] = 'loop'
+        elif self._config['system']['runtime'] == 'asyncio' and sys.implementation.name != 'cpython':
+            self._logger.warning("Config: Asyncio runtime only supported on general-purpose systems. Using 'loop'.")
+            self._config['system']['runtime'] = 'loop'
+
+        # Performance counters must be a bool.
+        if not isinstance(self._config['system']['perf'], bool):
+            self._logger.warning("Config: Perf setting '{}' not valid. Defaulting to False.",
+                                 self._config['system']['perf'])
+            self._config['system']['perf'] = False
+
+        # Check how inbound commands are handed to the run loop.
+        if self._config['system']['command_mode'] not in ('queue', 'immediate'):
+            self._logger.warning("Config: Command mode '{}' not valid. Defaulting to 'queue'.",
+                                 self._config['system']['command_mode'])
+            self._config['system']['command_mode'] = 'queue'
+        if not isinstance(self._config['system']['command_queue'], int) or self._config['system']['command_queue'] < 1:
+            self._logger.warning("Config: Command queue size '{}' not valid. Defaulting to 32.",
+                                 self._config['system']['command_queue'])
+            self._config['system']['command_queue'] = 32
+
+        # Check how flashers are timed. A separate thread is only available on general-purpose systems.
+        if self._config['system']['flasher_timing'] not in ('loop', 'thread'):
+            self._logger.warning("Config: Flasher timing '{}' not valid. Defaulting to 'loop'.",
+                                 self._config['system']['flasher_timing'])
+            self._config['system']['flasher_timing'] = 'loop'
+        elif self._config['system']['flasher_timing'] == 'thread' and sys.implementation.name != 'cpython':
+            self._logger.warning("Config: Flasher thread only supported on general-purpose systems. Using 'loop'.")
+            self._config['system']['flasher_timing'] = 'loop'
+
+        # Dimmer fades are stepped at a fixed rate.
+        if not isinstance(self._config['system']['fade_rate'], int) or \
+                not 1 <= self._config['system']['fade_rate'] <= 200:
+            self._logger.warning("Config: Fade rate '{}' not valid. Defaulting to 50.",
+                                 self._config['system']['fade_rate'])
+            self._config['system']['fade_rate'] = 50
+
         # Check for network indicator definition.
         if 'indicators' in self._config['system']:
             # Make sure each item is defined, even if not present.
@@ -163,7 +222,7 @@ class BM2Config:
         # Check for a modified publish time.
         try:
             if isinstance(self._config['system']['publish_time'], int):
-                self._logger.info("Config: Using Publish Time {}s".format(self._config['system']['publish_time']))
+                self._logger.info("Config: Using Publish Time {}s", self._config['system']['publish_time'])
             else:
                 self._logger.warning("Config: Provided Publish Time is not an integer, defaulting to 15s.")
                 self._config['system']['publish_time'] = 15
@@ -178,7 +237,7 @@ class BM2Config:
             # Check for a default area.
             try:
                 if isinstance(self._config['system']['ha']['area'], str):
-                    self._logger.info("Config: Using HA Area '{}'".format(self._config['system']['ha']['area']))
+                    self._logger.info("Config: Using HA Area '{}'", self._config['system']['ha']['area'])
                     self._config['system']['ha_area'] = self._config['system']['ha']['area']
                     del self._config['system']['ha']['area']
             except KeyError:
@@ -186,7 +245,7 @@ class BM2Config:
             # Check for a base discovery prefix.
             try:
                 if isinstance(self._config['system']['ha']['base'], str):
-                    self._logger.info("Config: Using HA Base '{}'".format(self._config['system']['ha']['base']))
+                    self._logger.info("Config: Using HA Base '{}'", self._config['system']['ha']['base'])
                     self._config['system']['ha_base'] = self._config['system']['ha']['base']
                     del self._config['system']['ha']['base']
             except KeyError:
@@ -196,13 +255,13 @@ class BM2Config:
             try:
                 if isinstance(self._config['system']['ha']['meminfo'], str):
                     if self._config['system']['ha']['meminfo'] in ('unified', 'unified-used', 'split-pct', 'split-all'):
-                        self._logger.debug("Config: Memory info topics will be discovered as '{}'".
-                                           format(self._config['system']['ha']['meminfo']))
+                        self._logger.debug("Config: Memory info topics will be discovered as '{}'",
+                                           self._config['system']['ha']['meminfo'])
                         self._config['system']['ha_meminfo'] = self._config['system']['ha']['meminfo']
                         del self._config['system']['ha']['meminfo']
                     else:
-                        self._logger.warning("Config: Memory info option '{}' not valid. Defaulting to 'unified'".
-                                             format(self._config['system']['ha']['meminfo']))
+                        self._logger.warning("Config: Memory info option '{}' not valid. Defaulting to 'unified'",
+                                             self._config['system']['ha']['meminfo'])
                         self._config['system']['ha_meminfo'] = 'unified'
                         del self._config['system']['ha']['meminfo']
             except KeyError:
@@ -252,36 +311,38 @@ class BM2Config:
         i = 0
         to_delete = []
         while i < len(self._config['controls']):
-            self._logger.debug("Config: Validating control definition '{}'".format(self._config['controls'][i]))
+            self._logger.debug("Config: Validating control definition '{}'", self._config['controls'][i])
             # Control must have an ID.
             if 'id' not in self._config['controls'][i]:
                 self._logger.critical("Config: Required control config option 'id' missing in control definition {}. "
-                                      "Cannot configure!".format(i+1))
+                                      "Cannot configure!", i+1)
                 to_delete.append(i)
                 i += 1
                 continue
 
             if 'pins' not in self._config['controls'][i]:
-                self._logger.critical("Config: Control {} does not have pins defined! Cannot configure!".
-                                      format(self._config['controls'][i]['id']))
+                self._logger.critical("Config: Control {} does not have pins defined! Cannot configure!",
+                                      self._config['controls'][i]['id'])
                 to_delete.append(i)
                 i += 1
                 continue
             # Control must have a type, if it doesn't, default it to 'single'.
             if 'type' not in self._config['controls'][i]:
-                self._logger.info(f"Config: No type defined for control '{self._config['controls'][i]['id']}'. Defaulting to single.")
+                self._logger.info("Config: No type defined for control '{}'. Defaulting to single.",
+                                  self._config['controls'][i]['id'])
                 self._config['controls'][i]['type'] = 'single'
 
             # Check to see if name is defined.
             if 'name' not in self._config['controls'][i]:
-                self._logger.info(f"Config: No name defined for control '{self._config['controls']['id']}'. Defaulting to ID.")
+                self._logger.info("Config: No name defined for control '{}'. Defaulting to ID.",
+                                  self._config['controls']['id'])
                 self._config['controls'][i]['name'] = self._config['controls'][i]['id']
 
             # Check to see if the control is disabled. This allows items to be left in the config file but skipped
             try:
                 if self._config['controls'][i]['disable']:
-                    self._logger.warning("Config: Control {} marked as disabled. Skipping.".
-                                      format(self._config['controls'][i]['name']))
+                    self._logger.warning("Config: Control {} marked as disabled. Skipping.",
+                                         self._config['controls'][i]['name'])
                     to_delete.append(i)
                     i += 1
                     continue
@@ -292,31 +353,65 @@ class BM2Config:
             except KeyError:
                 pass
 
-            optional_params = ['icon', 'active_low', 'extio', 'loiter_time', 'switch_time']
+            optional_params = ['icon', 'active_low', 'extio', 'loiter_time', 'switch_time', 'hardware', 'group',
+                               'sequence', 'brightness', 'transition']
             optional_defaults = {
                 'icon': 'mdi:toy-brick',
                 'active_low': False,
                 'extio': None,
                 'loiter_time': 1000,
-                'switch_time': 0
+                'switch_time': 0,
+                'hardware': False,
+                'group': None,
+                'sequence': 'chase',
+                'brightness': 255,
+                'transition': 500
             }
             for param in optional_params:
-                self._logger.debug("Config: Checking for optional parameter '{}'".format(param))
+                self._logger.debug("Config: Checking for optional parameter '{}'", param)
                 if param not in self._config['controls'][i]:
-                    self._logger.info("Config: Option '{}' not found, using default '{}'".
-                                         format(param, optional_defaults[param]))
+                    self._logger.info("Config: Option '{}' not found, using default '{}'",
+                                      param, optional_defaults[param])
                     self._config['controls'][i][param] = optional_defaults[param]
                 else:
-                    self._logger.info("Config: Optional parameter '{}' set to '{}'".format(
-                        param, self._config['controls'][i][param]
-                    ))
+                    self._logger.info("Config: Optional parameter '{}' set to '{}'",
+                                      param, self._config['controls'][i][param])
+
+            # Flasher groups are referenced by name.
+            if self._config['controls'][i]['group'] is not None and \
+                    not isinstance(self._config['controls'][i]['group'], str):
+                self._logger.warning("Config: Control '{}' has invalid flasher group '{}'. Not grouping.",
+                                     self._config['controls'][i]['name'], self._config['controls'][i]['group'])
+                self._config['controls'][i]['group'] = None
+
+            # Flasher sequences are a preset, or a list of frames.
+            if not self._validate_sequence(self._config['controls'][i]['sequence']):
+                self._logger.error("Config: Control '{}' has invalid sequence '{}'. Should be one of {}, or a list of "
+                                   "[pins, time] frames.", self._config['controls'][i]['name'],
+                                   self._config['controls'][i]['sequence'], ', '.join(PRESETS))
+                to_delete.append(i)
+                i += 1
+                continue
+            if self._config['controls'][i]['group'] is not None and \
+                    self._config['controls'][i]['sequence'] not in STEP_PRESETS:
+                self._logger.warning("Config: Control '{}' uses a sequence which can't be grouped. Not grouping.",
+                                     self._config['controls'][i]['name'])
+                self._config['controls'][i]['group'] = None
 
             # Validate EXTIO, if used.
             if isinstance(self._config['controls'][i]['extio'],str):
                 try:
                     self._config['controls'][i]['extio'] = int(self._config['controls'][i]['extio'], 16)
                 except ValueError:
-                    self._logger.error("Config: Provided extio setting '{}' cannot convert to an integer. Should be in the format '0x##'.".format(self._config['controls'][i]['extio']))
+                    self._logger.error("Config: Provided extio setting '{}' cannot convert to an integer. Should be in the format '0x##'.",
+                                       self._config['controls'][i]['extio'])
+                    to_delete.append(i)
+                    i += 1
+                    continue
+
+            # Dimmers use the AW9523's LED mode, so must be on one, and use its pin numbers.
+            if self._config['controls'][i]['type'] == 'dimmer':
+                if not self._validate_dimmer(self._config['controls'][i]):
                     to_delete.append(i)
                     i += 1
                     continue
@@ -328,26 +423,27 @@ class BM2Config:
                 pass
             elif isinstance(self._config['controls'][i]['pins'], dict):
                 if 'on' not in self._config['controls'][i]['pins']:
-                    self._logger.error("Config: Control '{}' does not have 'on' pin defined.".
-                                       format(self._config['controls'][i]['name']))
+                    self._logger.error("Config: Control '{}' does not have 'on' pin defined.",
+                                       self._config['controls'][i]['name'])
                     to_delete.append(i)
                     i += 1
                     continue
                 if 'off' not in self._config['controls'][i]['pins']:
-                    self._logger.error("Config: Control '{}' does not have 'on' pin defined.".
-                                       format(self._config['controls'][i]['name']))
+                    self._logger.error("Config: Control '{}' does not have 'on' pin defined.",
+                                       self._config['controls'][i]['name'])
                     to_delete.append(i)
                     i += 1
                     continue
             elif isinstance(self._config['controls'][i]['pins'], list):
-                if self._config['controls'][i]['type'] != 'flasher':
-                    self._logger.error("Config: Control '{}' has a pin list defined, but is not set as a flasher.")
+                if self._config['controls'][i]['type'] not in ('flasher', 'dimmer'):
+                    self._logger.error("Config: Control '{}' has a pin list defined, but is not set as a flasher or "
+                                       "dimmer.", self._config['controls'][i]['name'])
                     to_delete.append(i)
                     i += 1
                     continue
             else:
-                self._logger.error("Config: Control '{}' has unsupported data for pin definition.".
-                                format(self._config['controls'][i]['name']))
+                self._logger.error("Config: Control '{}' has unsupported data for pin definition.",
+                                   self._config['controls'][i]['name'])
                 to_delete.append(i)
                 i += 1
                 continue
@@ -355,11 +451,69 @@ class BM2Config:
 
         # Make the to_delete list unique.
         to_delete = list(set(to_delete))
-        self._logger.debug("Controls to remove: {}".format(to_delete))
+        self._logger.debug("Controls to remove: {}", to_delete)
         # Delete any controls that have been invalidated
         for d in sorted(to_delete, reverse=True):
             del self._config['controls'][d]
-        self._logger.debug("Config proceeding with successful controls: {}".format(self._config['controls']))
+        self._logger.debug("Config proceeding with successful controls: {}", self._config['controls'])
+
+    def _validate_dimmer(self, control):
+        """
+        Check the settings specific to a dimmer. Brightness and transition are reset to their defaults if invalid.
+
+        :param control: Control config.
+        :type control: dict
+        :return: bool, False if the control can't be created.
+        """
+        if control['extio'] is None:
+            self._logger.error("Config: Dimmer '{}' must be on an AW9523. Set 'extio'.", control['name'])
+            return False
+        pins = control['pins'] if isinstance(control['pins'], list) else [control['pins']]
+        for pin in pins:
+            if isinstance(pin, str) and pin.isdigit():
+                pin = int(pin)
+            if not isinstance(pin, int) or not 0 <= pin <= 15:
+                self._logger.error("Config: Dimmer '{}' has invalid pin '{}'. Should be an AW9523 pin, 0-15.",
+                                   control['name'], pin)
+                return False
+        if not isinstance(control['brightness'], int) or not 1 <= control['brightness'] <= 255:
+            self._logger.warning("Config: Dimmer '{}' has invalid brightness '{}'. Defaulting to 255.",
+                                 control['name'], control['brightness'])
+            control['brightness'] = 255
+        if not isinstance(control['transition'], int) or control['transition'] < 0:
+            self._logger.warning("Config: Dimmer '{}' has invalid transition '{}'. Defaulting to 500.",
+                                 control['name'], control['transition'])
+            control['transition'] = 500
+        return True
+
+    @staticmethod
+    def _validate_sequence(sequence):
+        """
+        Check a flasher sequence. Should be the name of a preset, or a list of frames. Each frame is a list of the pins
+        to turn on and how long to show them for, in milliseconds. Pins are a bitmask, either as an int or a string of
+        0s and 1s.
+
+        :param sequence: Sequence to check.
+        :type sequence: str or list
+        :return: bool
+        """
+        if isinstance(sequence, str):
+            return sequence in PRESETS
+        if not isinstance(sequence, list) or len(sequence) == 0:
+            return False
+        for frame in sequence:
+            if not isinstance(frame, list) or len(frame) != 2:
+                return False
+            pins, frame_time = frame
+            if isinstance(pins, str):
+                for c in pins:
+                    if c not in '01':
+                        return False
+            elif not isinstance(pins, int) or pins < 0:
+                return False
+            if not isinstance(frame_time, int) or frame_time < 1:
+                return False
+        return True
 
     def _make_pindef(self, input_pindef):
         """
@@ -477,20 +631,20 @@ class BM2Config:
         i = 0
         to_delete = []
         while i < len(self._config['displays']):
-            self._logger.debug("Checking display {}. Has raw config {}".format(i, self._config['displays'][i]))
+            self._logger.debug("Checking display {}. Has raw config {}", i, self._config['displays'][i])
             required_keys = ['id', 'type', 'address']
             for key in required_keys:
-                self._logger.debug("Checking for required display key '{}'".format(key))
+                self._logger.debug("Checking for required display key '{}'", key)
                 if key not in self._config['displays'][i]:
                     self._logger.critical("Required control display option '{}' missing in display {}. "
-                                          "Discarding display.".format(key, i))
+                                          "Discarding display.", key, i)
                     to_delete.append(i)
                     # i += 1
                     continue
             # Make sure type is legitimate.
             if self._config['displays'][i]['type'].lower() not in ('seg7x4', 'bigseg7x4'):
-                self._logger.critical("Display type '{}' not known in display {}. Discarding display.".
-                                      format(self._config['displays'][i]['type'], i))
+                self._logger.critical("Display type '{}' not known in display {}. Discarding display.",
+                                      self._config['displays'][i]['type'], i)
                 to_delete.append(i)
                 # i += 1
                 continue
@@ -503,7 +657,7 @@ class BM2Config:
                 self._config['displays'][i]['address'] = int(self._config['displays'][i]['address'], 16)
             except TypeError:
                 self._logger.critical("Address not a string for display {}. Should be in \"0xXX\" format. "
-                                      "Discarding display.".format(i))
+                                      "Discarding display.", i)
                 # i += 1
                 to_delete.append(i)
                 continue
@@ -521,7 +675,7 @@ class BM2Config:
                     # Check the show option.
                     if self._config['displays'][i]['idle']['show'] not in ('time', 'date', 'blank'):
                         self._logger.warning("Specified idle value for display {} ('{}') not valid. Defaulting to "
-                                             "blank.".format(i, self._config['displays'][i]['idle']['show']))
+                                             "blank.", i, self._config['displays'][i]['idle']['show'])
                         self._config['displays'][i]['idle']['show'] = 'blank'
                         self._config['displays'][i]['idle']['brightness'] = 1
 
@@ -533,12 +687,20 @@ class BM2Config:
                         self._config['displays'][i]['idle']['brightness'] = 1
                     except ValueError:
                         self._config['displays'][i]['idle']['brightness'] = 1
+
+            # The self-test sweeps the digits, which takes a second per display. Only run it if asked for.
+            if 'test' not in self._config['displays'][i]:
+                self._config['displays'][i]['test'] = False
+            elif not isinstance(self._config['displays'][i]['test'], bool):
+                self._logger.warning("Test setting for display {} ('{}') not valid. Defaulting to False.",
+                                     i, self._config['displays'][i]['test'])
+                self._config['displays'][i]['test'] = False
             i += 1
 
         # Delete any invalidated displays
-        self._logger.debug("Displays to delete: {}".format(to_delete))
+        self._logger.debug("Displays to delete: {}", to_delete)
         for d in sorted(to_delete, reverse=True):
-            self._logger.debug("Deleting display '{}'".format(d))
+            self._logger.debug("Deleting display '{}'", d)
             del self._config['displays'][d]
 
     # Validate the scripts.
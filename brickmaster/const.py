@@ -8,4 +8,9 @@ NET_STATUS_CONNECTED = 1 # Connected!
 NET_STATUS_CONNECTING = 2 # In the process of connecting, ie: not yet acknowledged
 NET_STATUS_DISCONNECT_PLANNED = 3 # Planning to disconnect. Use this to flag that we're
                                 # intentionally disconnecting and shouldn't reconnect immediately.
-NET_STATUS_NOACTION = 100 # Nothing to do.
\ No newline at end of file
+NET_STATUS_NOACTION = 100 # Nothing to do.
+
+# Flasher sequence presets. Each is built from the flasher's loiter and switch times.
+PRESETS = ('chase', 'bounce', 'all', 'double', 'twinkle')
+# Presets which run in steps, each on for the loiter time and then off for the switch time. Only these can be grouped.
+STEP_PRESETS = ('chase', 'bounce', 'all', 'twinkle')
@@ -1,7 +1,8 @@
 """
 Brickmaster Base Control
 """
-import adafruit_logging
+import brickmaster.log
+from time import monotonic_ns
 # import board
 # import digitalio
 # from brickmaster.gpio import EnhancedDigitalInOut
@@ -10,8 +11,19 @@ import adafruit_logging
 class BaseControl:
     """
     Base control object.
+
+    Controls are switched with set(), or with commands received by callback(). Subclasses apply the state in
+    _set_state().
     """
-    def __init__(self, ctrl_id, name, core, icon="mdi:toy-brick", publish_time=15, log_level=adafruit_logging.WARNING):
+    # Values set() accepts, mapped to the state they set. Other casings are lowered and checked again.
+    VALUES = {'on': True, 'ON': True, 'On': True, 'off': False, 'OFF': False, 'Off': False}
+    # The same as raw command payloads. Paho delivers payloads as bytes, and matching them directly means the usual
+    # commands need no decoding.
+    COMMANDS = {b'on': True, b'ON': True, b'On': True, b'off': False, b'OFF': False, b'Off': False}
+    # A command repeating the last one within this time, in nanoseconds, is dropped. Home Assistant automations can
+    # send the same command several times in a burst, and there's no need to act on each one.
+    COALESCE_TIME = 250000000
+    def __init__(self, ctrl_id, name, core, icon="mdi:toy-brick", publish_time=15, log_level=brickmaster.log.WARNING):
         """
         Base control initialization.
 
@@ -43,11 +55,15 @@ class BaseControl:
         # Initialize
         self._topics = None
         self._status = None
+        self._notify = None # Callback to notify of changes. Set by the network module.
+        # Last command received and when, for coalescing repeats.
+        self._last_command = None
+        self._last_command_ts = 0
 
         # Create a logger with the specified logger.
-        self._logger = adafruit_logging.getLogger('Brickmaster')
+        self._logger = brickmaster.log.getLogger('Brickmaster')
         self._logger.setLevel(log_level)
-        self._logger.debug("Control {}: Set icon to '{}'".format(self._ctrl_id, self._icon))
+        self._logger.debug("Control {}: Set icon to '{}'", self._ctrl_id, self._icon)
 
     @property
     def topics(self):
@@ -67,7 +83,30 @@ class BaseControl:
 
     def set(self, value: str):
         """
-        Set the control to a boolean value.
+        Set the control.
+
+        :param value: 'on' or 'off', in any case.
+        :type value: str
+        :return: None
+        """
+        self._logger.info("Control: Setting control '{}' to '{}'", self.name, value)
+        state = self.VALUES.get(value)
+        if state is None:
+            state = self.VALUES.get(value.lower())
+            if state is None:
+                self._logger.warning("Control: ID '{}' received unknown set value '{}'", self.name, value)
+                return
+        # Something other than a command has set the control, so a repeat of the last command is no longer a repeat.
+        self._last_command = None
+        self._set_state(state)
+
+    def _set_state(self, state):
+        """
+        Apply a state to the control.
+
+        :param state: True for on, False for off.
+        :type state: bool
+        :return: None
         """
         raise NotImplemented("Control setting must be implemented in a subclass.")
 
@@ -92,8 +131,61 @@ class BaseControl:
         """
         return self._ctrl_id
 
+    def set_notify(self, callback):
+        """
+        Set the method to call when the control's state changes. The network module uses this to queue the control for
+        publication.
+
+        :param callback: Method to call. Gets passed this control.
+        :type callback: method
+        """
+        self._notify = callback
+
+    def _changed(self):
+        """
+        Notify the network module that this control's state has changed.
+        """
+        if self._notify is not None:
+            self._notify(self)
+
     def callback(self, client, topic, message):
         """
         Callback the Network object will call when a subscribed topic gets a message.
-        """
-        raise NotImplemented("Control callbacks must be implemented in a control subclass.")
+
+        :param client: Client instance for the callback.
+        :param topic: Topic the message was received on.
+        :param message: Message.
+        :return: None
+        """
+        if isinstance(message, str):
+            # MiniMQTT (Circuitpython) outputs a straight string.
+            payload = message
+            state = self.VALUES.get(payload)
+        else:
+            # Paho MQTT (linux) delivers a message object, with the payload as bytes.
+            payload = message.payload
+            state = self.COMMANDS.get(payload)
+        if state is None:
+            # Not one of the usual forms. Decode and clean it up before giving up on it.
+            if not isinstance(payload, str):
+                try:
+                    payload = str(payload, 'utf-8')
+                except UnicodeError:
+                    # CircuitPython has no UnicodeDecodeError, but raises UnicodeError. CPython's is a subclass of it.
+                    self._logger.info("Control: Control '{}' ({}) received invalid command {}. Ignoring.",
+                                      self.name, self.id, payload)
+                    return
+            state = self.VALUES.get(payload.strip().lower())
+            if state is None:
+                self._logger.info("Control: Control '{}' ({}) received invalid command '{}'. Ignoring.",
+                                  self.name, self.id, payload)
+                return
+        now = monotonic_ns()
+        if state is self._last_command and now - self._last_command_ts < self.COALESCE_TIME:
+            self._logger.debug("Control: Control '{}' ({}) received repeat command '{}'. Ignoring.",
+                               self.name, self.id, payload)
+            return
+        self._logger.debug("Control: Control '{}' ({}) received command '{}'", self.name, self.id, payload)
+        self._last_command = state
+        self._last_command_ts = now
+        self._set_state(state)
@@ -0,0 +1,207 @@
+"""
+Brickmaster Control - Dimmer
+"""
+
+import brickmaster.log
+import json
+from .BaseControl import BaseControl
+from brickmaster.gpio import BatchedAW9523
+from time import monotonic_ns
+
+
+class CtrlDimmer(BaseControl):
+    """
+    Control for LEDs on AW9523 pins in constant-current mode, with brightness and fades.
+
+    Besides plain on and off, the control takes Home Assistant's JSON light commands, which can set a brightness and
+    a transition time. Fades are stepped by the core's fader, along with every other fade that's running.
+    """
+    def __init__(self, ctrl_id, name, core, pins, publish_time, extio_obj, fader=None, brightness=255, transition=500,
+                 icon="mdi:lightbulb", log_level=brickmaster.log.WARNING):
+        """
+        @param ctrl_id: Short ID for the control. No spaces!
+        @type ctrl_id: str
+        @param name: Long name for the control
+        @type name: str
+        @param core: Reference to the Brickmaster core object.
+        @type core: object
+        @param pins: Pin, or list of pins, on the AW9523. All are set to the same level.
+        @type pins: int or list
+        @param publish_time:
+        @type publish_time: int
+        @param extio_obj: The AW9523 the pins are on.
+        @type extio_obj: BatchedAW9523
+        @param fader: Fader to step fades with. Without one, changes are immediate.
+        @type fader: brickmaster.fader.BM2Fader
+        @param brightness: Brightness to turn on at until one is set, 1-255.
+        @type brightness: int
+        @param transition: Time to fade over when a command doesn't give one, in milliseconds. 0 for no fade.
+        @type transition: int
+        @param icon: Icon name to send to Home Assistant.
+        @type icon: str
+        @param log_level: Logging level to use for the control. Technically an int, should be a valid adafruit_logging
+        constant.
+        @type log_level: int
+        """
+        super().__init__(ctrl_id, name, core, icon, publish_time, log_level)
+
+        if not isinstance(extio_obj, BatchedAW9523):
+            raise TypeError("Control {}: Dimmers must be on an AW9523.".format(self._ctrl_id))
+        self._expander = extio_obj
+        self._fader = fader
+        self._brightness = brightness # Level to turn on at.
+        self._transition = transition # Default fade time, in milliseconds.
+        self._on = False
+        self._level = 0 # Level currently output.
+        # The fade in progress.
+        self._fade_from = 0
+        self._fade_to = 0
+        self._fade_start = 0
+        self._fade_time = 0
+
+        if not isinstance(pins, list):
+            pins = [pins]
+        self._pins = tuple(int(pin) for pin in pins)
+        for pin in self._pins:
+            self._logger.debug("Control {}: Setting up AW9523 pin {} in LED mode.", self._ctrl_id, pin)
+            self._expander.setup_led(pin)
+
+    @property
+    def status(self):
+        """
+        Current state of the control.
+        """
+        if self._on:
+            return "ON"
+        else:
+            return "OFF"
+
+    @property
+    def state(self):
+        """
+        State for Home Assistant's JSON light schema.
+
+        :return: dict
+        """
+        return {'state': self.status, 'brightness': self._brightness, 'color_mode': 'brightness'}
+
+    @property
+    def brightness(self):
+        """
+        Brightness the control is on at, or will turn on at, 1-255.
+        """
+        return self._brightness
+
+    @property
+    def transition(self):
+        """
+        Default fade time, in milliseconds.
+        """
+        return self._transition
+
+    def _set_state(self, state):
+        """
+        Fade on or off over the default transition time.
+
+        :param state: True for on, False for off.
+        :type state: bool
+        :return: None
+        """
+        self._apply(state)
+
+    def callback(self, client, topic, message):
+        """
+        Callback the Network object will call when a subscribed topic gets a message. Handles Home Assistant's JSON
+        light commands, and hands anything else to the standard control callback.
+
+        :param client: Client instance for the callback.
+        :param topic: Topic the message was received on.
+        :param message: Message.
+        :return: None
+        """
+        if isinstance(message, str):
+            payload = message
+        else:
+            payload = message.payload
+        if payload[:1] not in ('{', b'{'):
+            super().callback(client, topic, message)
+            return
+        try:
+            if not isinstance(payload, str):
+                payload = str(payload, 'utf-8')
+            command = json.loads(payload)
+            on = self._on if 'state' not in command else self.VALUES.get(command['state'])
+            brightness = command.get('brightness')
+            if brightness is not None:
+                brightness = min(max(int(brightness), 1), 255)
+            transition = command.get('transition')
+            if transition is not None:
+                transition = max(int(float(transition) * 1000), 0)
+        except (ValueError, TypeError, AttributeError, UnicodeError):
+            on = None
+        if on is None:
+            self._logger.info("Control: Control '{}' ({}) received invalid command '{}'. Ignoring.",
+                              self.name, self.id, payload)
+            return
+        self._logger.debug("Control: Control '{}' ({}) received command '{}'", self.name, self.id, payload)
+        # Not a plain on or off, so later ones aren't repeats of it.
+        self._last_command = None
+        self._apply(on, brightness, transition)
+
+    def _apply(self, on, brightness=None, transition=None):
+        """
+        Turn on or off, fading to the new level.
+
+        :param on: Turn on?
+        :type on: bool
+        :param brightness: Brightness to set, 1-255. None keeps the current brightness.
+        :type brightness: int
+        :param transition: Time to fade over, in milliseconds. None uses the default.
+        :type transition: int
+        :return: None
+        """
+        if brightness is not None:
+            self._brightness = brightness
+        if transition is None:
+            transition = self._transition
+        self._on = on
+        target = self._brightness if on else 0
+        if transition <= 0 or self._fader is None or target == self._level:
+            if self._fader is not None:
+                self._fader.stop(self)
+            self._set_level(target)
+        else:
+            self._fade_from = self._level
+            self._fade_to = target
+            self._fade_start = monotonic_ns()
+            self._fade_time = transition * 1000000
+            self._fader.start(self)
+        self._changed()
+
+    def fade_step(self, now):
+        """
+        Set the level for this point in the fade. Called by the fader each frame.
+
+        :param now: Time of the frame, in time.monotonic_ns() nanoseconds.
+        :type now: int
+        :return: True if the fade is done.
+        :rtype: bool
+        """
+        elapsed = now - self._fade_start
+        if elapsed >= self._fade_time:
+            self._set_level(self._fade_to)
+            return True
+        self._set_level(self._fade_from + (self._fade_to - self._fade_from) * elapsed // self._fade_time)
+        return False
+
+    def _set_level(self, level):
+        """
+        Set the output level of all the pins.
+
+        :param level: Level, 0-255.
+        :type level: int
+        :return: None
+        """
+        self._level = level
+        for pin in self._pins:
+            self._expander.set_level(pin, level)
@@ -1,21 +1,33 @@
 """
 Brickmaster Control - Flasher
 """
-import time
-
-import adafruit_logging
+import brickmaster.log
 from .BaseControl import BaseControl
-from brickmaster.gpio import EnhancedDigitalInOut
-# import board
+from brickmaster.const import STEP_PRESETS
+from brickmaster.gpio import EnhancedDigitalInOut, BatchedAW9523
+from array import array
+import board
 # import digitalio
+import random
 from time import monotonic_ns
 
+
 class CtrlFlasher(BaseControl):
     """
     Control to handle flashing across multiple pins.
+
+    The flasher runs a sequence of frames, each a bitmask of the flasher's pins and how long to show it. Sequences are
+    either a preset built from the loiter and switch times, or a list of frames given in the config. Frames are compiled
+    into arrays when the flasher is created, so moving to the next frame is an index increment and one write of the
+    changed pins.
+
+    The sequence is timed from when the flasher was started. Each update works out where in the sequence the flasher
+    should be from that start time, rather than from when the last update happened to run, so late updates don't add
+    up to drift.
     """
     def __init__(self, ctrl_id, name, core, pinlist, publish_time, loiter_time=1000, switch_time=1, active_low=False,
-                 extio_obj=None, icon="mdi:toy-brick", log_level=adafruit_logging.WARNING):
+                 extio_obj=None, hardware=False, group=None, sequence='chase', icon="mdi:toy-brick",
+                 log_level=brickmaster.log.WARNING):
 
         """
         @param ctrl_id: Short ID for the control. No spaces!
@@ -35,6 +47,15 @@ class CtrlFlasher(BaseControl):
         @type loiter_time: int
         @param switch_time: How long to keep everything off between items, in milliseconds. Defaults to 0.
         @type switch_time: int
+        @param hardware: Flash a single on-board pin with PWM, if the board can do it at this rate. Otherwise the
+        flasher is timed in software.
+        @type hardware: bool
+        @param group: Flasher group to share a clock with. The group's loiter and switch times are used.
+        @type group: FlasherGroup
+        @param sequence: Sequence to run. Either the name of a preset, or a list of frames, each a pin bitmask and a
+        time in milliseconds. Bitmasks may be an int, with bit 0 for the first pin, or a string of 0s and 1s, with the
+        first character for the first pin.
+        @type sequence: str or list
         @param log_level: Logging level to use for the control. Technically an int, should be a valid adafruit_logging
         constant.
         @type log_level: int
@@ -46,23 +67,65 @@ class CtrlFlasher(BaseControl):
         self._extio_obj = extio_obj # Save the external IO object, if any.
         self._loiter_time = loiter_time
         self._switch_time = switch_time
-        self._position = 0
+        self._sequence = sequence
+        self._position = 0 # Step of the sequence being shown.
         self._running = False
-        self._update_ts = 0
+        self._frame = 0 # Frame being shown.
+        self._outputs = 0 # Bitmask of the outputs currently on.
+        self._epoch_ts = 0 # When the sequence was started, or last retimed.
+        self._step_ts = 0 # When the current frame started.
+        self._next_ts = 0 # When the next change is due.
+        self._wake = None # Callback to wake whatever drives the flasher. Set by the core.
+        self._pwm = None # PWM output, if flashing in hardware.
+        self._group = group # Group this flasher is timed by, if any.
         self._pinlist = pinlist # Save the pinlist config
+        # The compiled sequence.
+        self._frame_outputs = array('L') # Output bitmask of each frame.
+        self._frame_ends = array('L') # End time of each frame in the cycle, in milliseconds.
+        self._frame_positions = array('H') # Step of the sequence each frame belongs to.
+        self._frames_per_step = 1 # Frames in each step, for step presets.
+        self._cycle_time = 0 # Length of the whole sequence, in milliseconds.
+        # Expander all the pins are on, and the expander bits they map to, for writing them all at once.
+        self._expander = None
+        self._output_bits = ()
+        self._output_mask = 0
 
-        self._logger.debug("Control: Processing flasher pinlist '{}'".format(self._pinlist))
+        if self._group is not None:
+            self._group.add(self)
+            if self._sequence not in STEP_PRESETS:
+                self._logger.warning("Control {}: Grouped flashers must use a step sequence ({}). Using 'chase'.",
+                                     self._ctrl_id, ', '.join(STEP_PRESETS))
+                self._sequence = 'chase'
+            if hardware:
+                self._logger.warning("Control {}: Grouped flashers can't flash in hardware. Timing in software.",
+                                     self._ctrl_id)
+                hardware = False
+        if hardware and self._sequence != 'chase':
+            self._logger.warning("Control {}: Only the 'chase' sequence can flash in hardware. Timing in software.",
+                                 self._ctrl_id)
+            hardware = False
+
+        self._logger.debug("Control: Processing flasher pinlist '{}'", self._pinlist)
 
         # Define a list to keep the pin objects in.
         self._gpio_objects = []
         # If the pin list is only a single element, make it a list.
         if not isinstance(pinlist, list):
             pinlist = [pinlist]
+        # A single on-board pin can be flashed in hardware.
+        if hardware:
+            if len(pinlist) == 1 and isinstance(pinlist[0], str) and extio_obj is None:
+                self._pwm = self._setup_pwm(pinlist[0])
+            else:
+                self._logger.warning("Control {}: Hardware flashing needs a single on-board pin. Timing in software.",
+                                     self._ctrl_id)
+        if self._pwm is not None:
+            return
         # Iterate the pin list, create objects for them all.
         for pin_item in pinlist:
-            self._logger.debug("Control: Evaluating pin item '{}'".format(pin_item))
+            self._logger.debug("Control: Evaluating pin item '{}'", pin_item)
             if isinstance(pin_item, str) or isinstance(pin_item, int):
-                self._logger.debug("Control: Creating singleton GPIO for pin '{}'".format(pin_item))
+                self._logger.debug("Control: Creating singleton GPIO for pin '{}'", pin_item)
                 pin_obj = EnhancedDigitalInOut(pin=pin_item, extio_obj=self._extio_obj)
                 self._gpio_objects.append(pin_obj)
             elif isinstance(pin_item, dict):
@@ -74,6 +137,10 @@ class CtrlFlasher(BaseControl):
                     raise ke
             else:
                 raise TypeError("Control {}: Pin list contains invalid definition.".format(self._ctrl_id))
+        # If every pin is on the same batched expander, frames can be written straight to its outputs.
+        if isinstance(self._extio_obj, BatchedAW9523) and len(self._gpio_objects) == len(pinlist):
+            self._expander = self._extio_obj
+        self._compile(pinlist)
 
     @property
     def status(self):
@@ -85,84 +152,320 @@ class CtrlFlasher(BaseControl):
         else:
             return "OFF"
 
+    @property
+    def group(self):
+        """
+        Flasher group this flasher is timed by. None if it's timed on its own.
+        """
+        return self._group
+
     @property
     def seq_pos(self):
         """
-        Item of the list currently on.
+        Step of the sequence currently shown. For the default sequence, the item of the list currently on.
         """
         return self._position
 
-    def set(self, value: str):
+    def set_wake(self, callback):
+        """
+        Set the method to call when the flasher's timing changes outside of an update, ie: when it's started. The core
+        uses this to wake whatever drives the flasher, so it picks up the new deadline.
+
+        :param callback: Method to call. Takes no arguments.
+        :type callback: method
         """
-        Set the control status.
+        self._wake = callback
+
+    def _set_state(self, state):
+        """
+        Start or stop the flasher.
+
+        :param state: True to start, False to stop.
+        :type state: bool
+        :return: None
         """
-        if value.lower() == 'on':
+        if state:
             # Set ourself to running.
             self._running = True
-            # Reset the position
-            self._position = 0
-            # Turn on the gpio at position 0.
-            self._gpio_objects[self._position].value = True
-            # Set a timestamp.
-            self._update_ts = monotonic_ns()
-        elif value.lower() == 'off':
-            self._running = False
-            # Turn everything off.
-            for gpio in self._gpio_objects:
-                gpio.value = False
+            if self._group is not None:
+                # Pick up the group's sequence where it is now.
+                self._group.join(self)
+            elif self._pwm is not None:
+                self._position = 0
+                self._pwm_output()
+            else:
+                # Show the first frame. The sequence is timed from here.
+                self._epoch_ts = monotonic_ns()
+                self._step_ts = self._epoch_ts
+                self._next_ts = self._epoch_ts + self._frame_ends[0] * 1000000
+                self._show(0)
+                if self._wake is not None:
+                    self._wake()
         else:
-            self._logger.warning(f"Control: ID '{self.name}' received unknown set value '{value}'")
-
-
+            self._running = False
+            if self._pwm is not None:
+                self._pwm_output()
+            else:
+                # Turn everything off.
+                self._write(0)
+        self._changed()
 
     def update(self):
         """
         Called by the Core run loop to update status.
         """
+        if not self._running or self._pwm is not None or self._group is not None:
+            return
+        now = monotonic_ns()
+        if now < self._next_ts:
+            return
+        # Usually this is just the next frame.
+        frame = self._frame + 1
+        if frame == len(self._frame_ends):
+            frame = 0
+        self._step_ts = self._next_ts
+        self._next_ts = self._step_ts + self._frame_time(frame) * 1000000
+        if now >= self._next_ts:
+            # Updates were held up long enough to miss whole frames. Work out where in the sequence we should be from
+            # the epoch, and skip the missed frames rather than playing them late.
+            into = (now - self._epoch_ts) % (self._cycle_time * 1000000)
+            into_ms = into // 1000000
+            frame = 0
+            while self._frame_ends[frame] <= into_ms:
+                frame += 1
+            self._step_ts = now - into + (self._frame_ends[frame] - self._frame_time(frame)) * 1000000
+            self._next_ts = self._step_ts + self._frame_time(frame) * 1000000
+        self._show(frame)
 
-        if self._running:
-            self._logger.debug("Control {}: Updating...".format(self._ctrl_id))
-            # If we've loitered too long, time to turn this off.
-            if time.monotonic_ns() - self._update_ts > (self._loiter_time * 1000000):
-                self._logger.debug("Control {}: Setting {} off.".format(self._ctrl_id, self._position))
-                self._gpio_objects[self._position].value = False
-            # If we've both loitered and used the switch time, move on to the next.
-            if time.monotonic_ns() - self._update_ts > (self._loiter_time + self._switch_time) * 1000000:
-                self._position += 1
-                # Reset if we're at the end.
-                self._logger.debug("Control {}: At end of pins, resetting.".format(self._ctrl_id))
-                if self._position >= len(self._gpio_objects):
-                    self._position = 0
-                # Turn on the next item.
-                self._gpio_objects[self._position].value=True
-                self._update_ts = time.monotonic_ns()
-
-    def callback(self, client, topic, message):
-        """
-        Control Callback
-
-        :param client: Client instance for the callback.
-        :param topic: Topic the message was received on.
-        :param message: Message.
+    def _group_update(self, steps, lit):
+        """
+        Show the group's current step. Called by the group when its clock moves on.
+
+        :param steps: Steps the group has taken since it started.
+        :type steps: int
+        :param lit: Is the step in its on time?
+        :type lit: bool
         :return: None
         """
+        frame = (steps % (len(self._frame_ends) // self._frames_per_step)) * self._frames_per_step
+        if not lit:
+            frame += 1
+        self._show(frame)
+
+    def _frame_time(self, frame):
+        """
+        How long a frame is shown for.
 
-        if isinstance(message, str):
-            # MiniMQTT (Circuitpython) outputs a straight string.
-            message_text = message.lower()
+        :param frame: Frame number.
+        :type frame: int
+        :return: Time in milliseconds.
+        :rtype: int
+        """
+        if frame == 0:
+            return self._frame_ends[0]
+        return self._frame_ends[frame] - self._frame_ends[frame - 1]
+
+    def _show(self, frame):
+        """
+        Show a frame of the sequence.
+
+        :param frame: Frame number.
+        :type frame: int
+        :return: None
+        """
+        self._frame = frame
+        self._write(self._frame_outputs[frame])
+        position = self._frame_positions[frame]
+        if position != self._position:
+            self._logger.debug("Control {}: Moving to position {}.", self._ctrl_id, position)
+            self._position = position
+            self._changed()
+
+    def _write(self, outputs):
+        """
+        Set the pins to an output bitmask. Only pins which change are written. Pins on a batched expander are all set
+        with one update of its outputs.
+
+        :param outputs: Bitmask of the outputs to turn on.
+        :type outputs: int
+        :return: None
+        """
+        if outputs == self._outputs:
+            return
+        if self._expander is not None:
+            self._expander.set_outputs(self._output_mask, outputs)
         else:
-            # Paho MQTT (linux) delivers a message object from which we need to extract the payload.
-            # Convert the message payload (which is binary) to a string.
-            message_text = str(message.payload, 'utf-8').lower()
-        self._logger.debug("Control: Control '{}' ({}) received message '{}' on topic '{}'".format(self.name, self.id,
-                                                                                     message_text, topic))
-        valid_values = ['on', 'off']
-        # If it's not a valid option, just ignore it.
-        if message_text not in valid_values:
-            self._logger.info("Control: Control '{}' ({}) received invalid command '{}'. Ignoring.".
-                              format(self.name, self.id, message_text))
+            changed = outputs ^ self._outputs
+            i = 0
+            while changed:
+                if changed & 1:
+                    self._gpio_objects[i].value = bool(outputs & (1 << i))
+                changed >>= 1
+                i += 1
+        self._outputs = outputs
+
+    def _compile(self, pinlist=None):
+        """
+        Compile the sequence into frames.
+
+        :param pinlist: The flasher's pins. Only needed the first time, to map pins on an expander to its outputs.
+        :type pinlist: list
+        :return: None
+        """
+        pin_count = len(self._gpio_objects)
+        all_pins = (1 << pin_count) - 1
+        frames = []
+        if isinstance(self._sequence, list):
+            # Frames from the config. Each is its own step.
+            for i in range(len(self._sequence)):
+                pins, frame_time = self._sequence[i]
+                if isinstance(pins, str):
+                    mask = 0
+                    for j in range(len(pins)):
+                        if pins[j] == '1':
+                            mask |= 1 << j
+                else:
+                    mask = pins
+                frames.append((mask & all_pins, frame_time, i))
+            self._frames_per_step = 1
+        elif self._sequence == 'double':
+            # Two quick flashes of all the pins, then a pause.
+            frames = [(all_pins, self._loiter_time, 0), (0, self._loiter_time, 0), (all_pins, self._loiter_time, 1),
+                      (0, self._switch_time, 1)]
+            self._frames_per_step = 1
         else:
-            self.set(message_text)
+            if self._sequence == 'bounce':
+                # Out along the pins and back again.
+                steps = [1 << i for i in range(pin_count)] + [1 << i for i in range(pin_count - 2, 0, -1)]
+            elif self._sequence == 'all':
+                steps = [all_pins]
+            elif self._sequence == 'twinkle':
+                # A random set of pins on for each step. Picked once here, and repeated.
+                steps = [random.randint(1, all_pins) for i in range(max(8, pin_count * 2))]
+            else:
+                # Chase, one pin at a time in order.
+                steps = [1 << i for i in range(pin_count)]
+            # Each step is on for the loiter time, then off for the switch time, if there is one.
+            for i in range(len(steps)):
+                frames.append((steps[i], self._loiter_time, i))
+                if self._switch_time > 0:
+                    frames.append((0, self._switch_time, i))
+            self._frames_per_step = 2 if self._switch_time > 0 else 1
+        if len(frames) == 0:
+            # No pins to flash. Keep a blank frame so the sequence can still run.
+            frames = [(0, self._loiter_time, 0)]
+            self._frames_per_step = 1
+
+        # Map flasher pins to expander outputs.
+        if pinlist is not None and self._expander is not None:
+            self._output_bits = [1 << int(pin) for pin in pinlist]
+            self._output_mask = 0
+            for bit in self._output_bits:
+                self._output_mask |= bit
+
+        self._frame_outputs = array('L')
+        self._frame_ends = array('L')
+        self._frame_positions = array('H')
+        frame_end = 0
+        for mask, frame_time, position in frames:
+            if self._expander is not None:
+                outputs = 0
+                for i in range(pin_count):
+                    if mask & (1 << i):
+                        outputs |= self._output_bits[i]
+                mask = outputs
+            # Frames need some time, or the sequence can't move.
+            frame_end += max(frame_time, 1)
+            self._frame_outputs.append(mask)
+            self._frame_ends.append(frame_end)
+            self._frame_positions.append(position)
+        self._cycle_time = frame_end
+        self._logger.debug("Control {}: Compiled {} frames, {}ms per cycle.", self._ctrl_id, len(self._frame_ends),
+                           self._cycle_time)
+
+    def _retime(self):
+        """
+        Rebuild the sequence after the loiter or switch time has changed, and restart its timing from the start of the
+        current step.
+        """
+        if self._pwm is not None:
+            self._pwm_output()
+        elif self._group is not None:
+            self._group.retime(self)
+        else:
+            self._compile()
+            if self._running:
+                frame = 0
+                while self._frame_positions[frame] != self._position:
+                    frame += 1
+                now = monotonic_ns()
+                self._step_ts = now
+                self._epoch_ts = now - (self._frame_ends[frame] - self._frame_time(frame)) * 1000000
+                self._next_ts = now + self._frame_time(frame) * 1000000
+                self._show(frame)
+                if self._wake is not None:
+                    self._wake()
+
+    def _setup_pwm(self, pin):
+        """
+        Set up a PWM output to flash a pin in hardware. PWM frequencies are whole numbers of Hertz, so this only works
+        for flash periods which divide evenly into a second, and the board has to support that frequency.
+
+        :param pin: Name of the on-board pin.
+        :type pin: str
+        :return: PWMOut or None
+        """
+        period = self._loiter_time + self._switch_time
+        if period <= 0 or 1000 % period != 0:
+            self._logger.warning("Control {}: Flash period of {}ms can't be timed by PWM. Timing in software.",
+                                 self._ctrl_id, period)
+            return None
+        try:
+            import pwmio
+            pwm = pwmio.PWMOut(getattr(board, pin), duty_cycle=65535 if self._active_low else 0,
+                               frequency=1000 // period, variable_frequency=True)
+        except (ImportError, AttributeError, ValueError, RuntimeError) as e:
+            self._logger.warning("Control {}: Could not set up PWM on pin '{}' ({}). Timing in software.",
+                                 self._ctrl_id, pin, e)
+            return None
+        self._logger.info("Control {}: Flashing pin '{}' with PWM at {}Hz.", self._ctrl_id, pin, 1000 // period)
+        return pwm
+
+    def _pwm_output(self):
+        """
+        Set the PWM output for the current state and timing.
+        """
+        period = self._loiter_time + self._switch_time
+        if self._running and period > 0 and 1000 % period == 0:
+            self._pwm.frequency = 1000 // period
+            duty_cycle = 65535 * self._loiter_time // period
+        else:
+            # PWM can't time this. Leave the pin off rather than flash it at the wrong rate.
+            if self._running:
+                self._logger.warning("Control {}: Flash period of {}ms can't be timed by PWM.", self._ctrl_id, period)
+            duty_cycle = 0
+        if self._active_low:
+            duty_cycle = 65535 - duty_cycle
+        self._pwm.duty_cycle = duty_cycle
+
+    def step(self):
+        """
+        Update, then report when the flasher is next due. Used by the core to drive the flasher.
+
+        :return: int
+        """
+        self.update()
+        return self.next_due
+
+    @property
+    def next_due(self):
+        """
+        When the flasher next needs to change state, in time.monotonic_ns() nanoseconds. None if not running, if
+        flashing in hardware, or if timed by a group.
+        """
+        if not self._running or self._pwm is not None or self._group is not None:
+            return None
+        return self._next_ts
 
     # Properties for reporting.
     @property
@@ -175,6 +478,8 @@ class CtrlFlasher(BaseControl):
     @loiter_time.setter
     def loiter_time(self, the_input):
         self._loiter_time = the_input
+        self._retime()
+        self._changed()
 
     @property
     def switch_time(self):
@@ -190,4 +495,170 @@ class CtrlFlasher(BaseControl):
         elif the_input < 0: # No less than 0s.
             self._switch_time = 0
         else:
-            self._switch_time = the_input
\ No newline at end of file
+            self._switch_time = the_input
+        self._retime()
+        self._changed()
+
+
+class FlasherGroup:
+    """
+    A clock shared by several flashers, so they flash in step with each other.
+
+    The group works out the sequence step once and has each running member show it. Members take the group's loiter and
+    switch times. Changing either on any member changes it for the whole group. A member that's started while others
+    are running joins the sequence where it is, rather than starting it over.
+    """
+    def __init__(self, name, loiter_time=1000, switch_time=0):
+        """
+        :param name: Name of the group.
+        :type name: str
+        :param loiter_time: How long to keep each item on, in milliseconds.
+        :type loiter_time: int
+        :param switch_time: How long to keep everything off between items, in milliseconds.
+        :type switch_time: int
+        """
+        self._logger = brickmaster.log.getLogger('Brickmaster')
+        self._name = name
+        self._loiter_time = loiter_time
+        self._switch_time = switch_time
+        self._members = []
+        self._epoch_ts = 0 # When the group's clock was started, or last retimed.
+        self._epoch_steps = 0 # Steps taken at the epoch.
+        self._step_ts = 0 # When the current step started.
+        self._steps = 0 # Steps taken since the clock was started.
+        self._lit = False # Is the current step in its on time?
+        self._next_ts = 0 # When the next change is due.
+        self._wake = None # Callback to wake whatever drives the group. Set by the core.
+
+    @property
+    def id(self):
+        """
+        Name of the group.
+        """
+        return self._name
+
+    @property
+    def members(self):
+        """
+        Flashers in the group.
+        """
+        return tuple(self._members)
+
+    def add(self, flasher):
+        """
+        Add a flasher to the group. It takes the group's loiter and switch times.
+
+        :param flasher: Flasher to add.
+        :type flasher: CtrlFlasher
+        :return: None
+        """
+        if flasher.loiter_time != self._loiter_time or flasher.switch_time != self._switch_time:
+            self._logger.warning("Control {}: Timing differs from flasher group '{}'. Using the group's {}ms on, {}ms "
+                                 "off.", flasher.id, self._name, self._loiter_time, self._switch_time)
+            flasher._loiter_time = self._loiter_time
+            flasher._switch_time = self._switch_time
+        self._members.append(flasher)
+
+    def set_wake(self, callback):
+        """
+        Set the method to call when the group's timing changes outside of a step, ie: when a member is started.
+
+        :param callback: Method to call. Takes no arguments.
+        :type callback: method
+        """
+        self._wake = callback
+
+    def join(self, flasher):
+        """
+        Have a member that's starting join the group's sequence. Starts the clock if no other members are running.
+        The running members are all brought up to the current step, so they stay in step with the new one.
+
+        :param flasher: The member that's starting.
+        :type flasher: CtrlFlasher
+        :return: None
+        """
+        now = monotonic_ns()
+        if not self._others_running(flasher):
+            self._epoch_ts = now
+            self._epoch_steps = 0
+        self._advance(now)
+        self._update_members()
+        if self._wake is not None:
+            self._wake()
+
+    def retime(self, source):
+        """
+        Take new loiter and switch times from a member, and apply them to the whole group. Each member rebuilds its
+        sequence, and the group restarts its timing from the start of the current step.
+
+        :param source: Member the times were set on.
+        :type source: CtrlFlasher
+        :return: None
+        """
+        self._loiter_time = source.loiter_time
+        self._switch_time = source.switch_time
+        for flasher in self._members:
+            if flasher is not source:
+                flasher._loiter_time = self._loiter_time
+                flasher._switch_time = self._switch_time
+                flasher._changed()
+            flasher._compile()
+        self._epoch_ts = self._step_ts
+        self._epoch_steps = self._steps
+        # Have the next step work out the new deadline.
+        self._next_ts = 0
+        if self._wake is not None:
+            self._wake()
+
+    def step(self):
+        """
+        Move the group's clock on if a change is due, and have the running members show it.
+
+        :return: When the group is next due, in time.monotonic_ns() nanoseconds. None if no members are running.
+        :rtype: int
+        """
+        if not self._others_running(None):
+            return None
+        now = monotonic_ns()
+        if now >= self._next_ts:
+            self._advance(now)
+            self._update_members()
+        return self._next_ts
+
+    def _advance(self, now):
+        """
+        Work out the current step from the epoch. Like a single flasher, missed steps are skipped.
+
+        :param now: Current time, in time.monotonic_ns() nanoseconds.
+        :type now: int
+        """
+        period = max(self._loiter_time + self._switch_time, 1) * 1000000
+        steps = (now - self._epoch_ts) // period
+        self._step_ts = self._epoch_ts + steps * period
+        self._steps = self._epoch_steps + steps
+        self._lit = now - self._step_ts < self._loiter_time * 1000000
+        if self._lit:
+            self._next_ts = self._step_ts + self._loiter_time * 1000000
+        else:
+            self._next_ts = self._step_ts + period
+
+    def _update_members(self):
+        """
+        Have the running members show the current step.
+        """
+        for flasher in self._members:
+            if flasher.status == 'ON':
+                flasher._group_update(self._steps, self._lit)
+
+    def _others_running(self, flasher):
+        """
+        Are any members other than the given one running?
+
+        :param flasher: Member to leave out. None to check all members.
+        :type flasher: CtrlFlasher
+        :return: bool
+        """
+        for member in self._members:
+            if member is not flasher and member.status == 'ON':
+                return True
+        return False
@@ -15,7 +15,7 @@ class CtrlNull(BaseControl):
         super().__init__(ctrl_id, name, core)
 
     def set(self, value):
-        self._logger.debug(f"Null control set to '{value}'")
+        self._logger.debug("Null control set to '{}'", value)
 
     def status(self):
         return 'Unavailable'
@@ -2,7 +2,7 @@
 Brickmaster Control - Single
 """
 
-import adafruit_logging
+import brickmaster.log
 from .BaseControl import BaseControl
 from brickmaster.gpio import EnhancedDigitalInOut
 # import board
@@ -13,7 +13,7 @@ class CtrlSingle(BaseControl):
     Control class for a single GPIO pin.
     """
     def __init__(self, ctrl_id, name, core, pins, publish_time, active_low=False,
-                 extio_obj=None, icon="mdi:toy-brick", log_level=adafruit_logging.WARNING):
+                 extio_obj=None, icon="mdi:toy-brick", log_level=brickmaster.log.WARNING):
         super().__init__(ctrl_id, name, core, icon, publish_time, log_level)
 
         self._active_low = active_low # Save our active low status.
@@ -44,17 +44,16 @@ class CtrlSingle(BaseControl):
         # Set self to off.
         self.set('off')
 
-    def set(self, value: str):
+    def _set_state(self, state):
         """
-        Set the control status.
+        Set the pin.
+
+        :param state: True for on, False for off.
+        :type state: bool
+        :return: None
         """
-        self._logger.info("Control: Setting control '{}' to '{}'".format(self.name, value))
-        if value.lower() == 'on':
-            self._gpio_obj.value = True
-        elif value.lower() == 'off':
-            self._gpio_obj.value = False
-        else:
-            self._logger.warning(f"Control: ID '{self.name}' received unknown set value '{value}'")
+        self._gpio_obj.value = state
+        self._changed()
 
     @property
     def status(self):
@@ -66,29 +65,3 @@ class CtrlSingle(BaseControl):
             return "ON"
         else:
             return "OFF"
-
-    def callback(self, client, topic, message):
-        """
-        Control Callback
-
-        :param client: Client instance for the callback.
-        :param topic: Topic the message was received on.
-        :param message: Message.
-        :return: None
-        """
-        if isinstance(message, str):
-            # MiniMQTT (Circuitpython) outputs a straight string.
-            message_text = message.lower()
-        else:
-            # Paho MQTT (linux) delivers a message object from which we need to extract the payload.
-            # Convert the message payload (which is binary) to a string.
-            message_text = str(message.payload, 'utf-8').lower()
-        self._logger.debug("Control: Control '{}' ({}) received message '{}'".format(self.name, self.id,
-                                                                                     message_text))
-        valid_values = ['on', 'off']
-        # If it's not a valid option, just ignore it.
-        if message_text not in valid_values:
-            self._logger.info("Control: Control '{}' ({}) received invalid command '{}'. Ignoring.".
-                              format(self.name, self.id, message_text))
-        else:
-            self.set(message_text)
\ No newline at end of file
@@ -3,7 +3,8 @@ Brickmaster Controls
 """
 
 from .BaseControl import BaseControl
-from .CtrlFlasher import CtrlFlasher
+from .CtrlDimmer import CtrlDimmer
+from .CtrlFlasher import CtrlFlasher, FlasherGroup
 from .CtrlNull import CtrlNull
 from .CtrlSingle import CtrlSingle
 
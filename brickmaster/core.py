@@ -2,7 +2,7 @@
 Brickmaster System Core
 """
 
-import adafruit_logging as logging
+import brickmaster.log as logging
 import board
 import busio
 # import digitalio # May no longer need this.
@@ -11,7 +11,18 @@ import io
 import json
 import os
 import sys
+import time
 import brickmaster
+from .fader import BM2Fader
+from .perf import BM2Perf
+from .scheduler import BM2Scheduler
+
+# The asyncio runtime is only available on general-purpose systems, as is threading, which Paho uses to deliver
+# commands.
+if sys.implementation.name == 'cpython':
+    import asyncio
+    import threading
+    from collections import deque
 
 
 class Brickmaster:
@@ -29,6 +40,8 @@ class Brickmaster:
         :param wifi_obj: Wifi Object. ONLY used for CircuitPython
         :type wifi_obj: brickmaster.network.BMWiFi
         """
+        # Startup is timed in phases. Start the clock before anything else.
+        startup = time.monotonic_ns()
         # Force a garbage collection
         gc.collect()
 
@@ -44,10 +57,33 @@ class Brickmaster:
         self._scripts = {} # Scripts
         self._sensors = {} # Sensors
         self._extgpio = {} # GPIO Expanders (ie: AW9523 boards)
-        self._active_script = None
+        # Runs the scripts. Several can run at once.
+        self._script_engine = brickmaster.scripts.BM2ScriptEngine()
         # Lists for displays that show the time or date.
         self._clocks = []
         self._dates = []
+        # When the idle displays next need to be redrawn. None forces a redraw of all displays on the next pass.
+        self._idle_due = None
+        # Next minute and day boundaries, when clocks and dates need to be updated. In time.monotonic_ns() nanoseconds.
+        self._clock_due = None
+        self._date_due = None
+        # Scheduler to sleep between passes of the run loop.
+        self._scheduler = BM2Scheduler()
+        # Event loop and per-task latency tracking, used by the asyncio runtime.
+        self._aio_loop = None
+        self._aio_wake = None
+        self._task_latency = {}
+        # Commands received from another thread and waiting for the run loop. Set up once the config is loaded.
+        self._command_queue = None
+        # Lock held while anything runs off the run loop's thread, ie: immediate commands or the flasher thread.
+        self._run_lock = None
+        # Flasher groups, by name.
+        self._flasher_groups = {}
+        # Flashers, flasher groups and the fader to drive, and the thread and scheduler to drive them, if they're timed
+        # on their own thread. Grouped flashers are driven by their group.
+        self._flashers = []
+        self._flasher_thread = None
+        self._flasher_scheduler = None
 
         # Save the MAC/system id
         self._mac_id = mac_id
@@ -72,15 +108,35 @@ class Brickmaster:
         self._bm2config = brickmaster.BM2Config(config_json)
 
         # Reset the log level based on the config.
-        self._logger.debug("Core: Setting logging level to '{}'".format(self._bm2config.system['log_level']))
+        self._logger.debug("Core: Setting logging level to '{}'", self._bm2config.system['log_level'])
         self._logger.setLevel(self._bm2config.system['log_level'])
 
         # Debug output of the config.
-        self._logger.debug("Core: System config is: {}".format(self._bm2config.system))
+        self._logger.debug("Core: System config is: {}", self._bm2config.system)
+
+        # Fader to step dimmer fades.
+        self._fader = BM2Fader(frame_rate=self._bm2config.system['fade_rate'])
+
+        # Performance counters. Disabled unless turned on in the config.
+        self._perf = BM2Perf(enabled=self._bm2config.system['perf'], interval=self._bm2config.system['publish_time'],
+                             boot=startup)
+        phase_start = self._perf.startup('config', startup)
+
+        # Paho calls back on its own thread. Its connect and disconnect callbacks run under the run lock, and commands
+        # are either queued for the run loop or run right away while holding the run loop off. The lock is reentrant,
+        # as under asyncio callbacks arrive on the loop's thread while it holds the lock to read from the broker.
+        if sys.implementation.name == 'cpython':
+            self._run_lock = threading.RLock()
+            if self._bm2config.system['command_mode'] != 'immediate':
+                self._command_queue = deque((), self._bm2config.system['command_queue'])
+            # Flashers can be timed on their own thread, so they keep time while the run loop is busy.
+            if self._bm2config.system['flasher_timing'] == 'thread':
+                self._flasher_scheduler = BM2Scheduler()
+                self._flasher_thread = threading.Thread(target=self._run_flashers, name='flashers', daemon=True)
 
         # Set up the indicators
         self._indicators.update(self._setup_indicators())
-        self._logger.debug("Core: Have indicators '{}'".format(self._indicators))
+        self._logger.debug("Core: Have indicators '{}'", self._indicators)
 
         # Set the system indicator on.
         # This should have been done earlier, but in case it wasn't, we do it again here.
@@ -89,26 +145,50 @@ class Brickmaster:
         # Set up the I2C Bus.
         self._setup_i2c_bus()
         gc.collect()
+        phase_start = self._perf.startup('hardware', phase_start)
 
         # Create the controls. Set the publish time to the system-wide publish time.
         self._create_controls(publish_time=self._bm2config.system['publish_time'])
         self._bm2config.del_controls()
+        # Collect the flashers and groups to drive, and have them wake whatever drives them when they're started.
+        # Fades are driven the same way, if there are any dimmers.
+        for control in self._controls:
+            if isinstance(self._controls[control], brickmaster.controls.CtrlFlasher) and \
+                    self._controls[control].group is None:
+                self._flashers.append(self._controls[control])
+        self._flashers.extend(self._flasher_groups.values())
+        for control in self._controls:
+            if isinstance(self._controls[control], brickmaster.controls.CtrlDimmer):
+                self._flashers.append(self._fader)
+                break
+        for flasher in self._flashers:
+            if self._flasher_scheduler is not None:
+                flasher.set_wake(self._flasher_scheduler.wake)
+            else:
+                flasher.set_wake(self.wake)
+        phase_start = self._perf.startup('controls', phase_start)
         # Create the displays.
         self._create_displays()
         self._bm2config.del_displays()
+        phase_start = self._perf.startup('displays', phase_start)
         # Create the scripts
         self._create_scripts()
         self._bm2config.del_scripts()
+        phase_start = self._perf.startup('scripts', phase_start)
         # Create the sensors.
-        self._logger.debug("Sensor config is: {}".format(self._bm2config.sensors))
+        self._logger.debug("Sensor config is: {}", self._bm2config.sensors)
         self._create_sensors()
+        phase_start = self._perf.startup('sensors', phase_start)
 
         # Set up the network.
-        self._logger.debug("Setting up network with config options: {}".format(self._bm2config.system))
+        self._logger.debug("Setting up network with config options: {}", self._bm2config.system)
 
         if sys.implementation.name == 'cpython':
             self._logger.info("Core: Setting up network for general-purpose OS.")
-            from .network.linux import BM2NetworkLinux
+            if self._bm2config.system['runtime'] == 'asyncio':
+                from .network.linuxasync import BM2NetworkLinuxAsync as BM2NetworkLinux
+            else:
+                from .network.linux import BM2NetworkLinux
             self._network = BM2NetworkLinux(self,
                                             system_id=self._mac_id,
                                             short_name=self._bm2config.system['id'],
@@ -141,8 +221,8 @@ class Brickmaster:
                                             log_level=self._bm2config.system['log_level']
                                             )
         else:
-            self._logger.critical("Core: Implementation '{}' unknown, cannot determine correct network module.".
-                                  format(sys.implementation.name))
+            self._logger.critical("Core: Implementation '{}' unknown, cannot determine correct network module.",
+                                  sys.implementation.name)
             sys.exit(1)
 
         # Now that the network is up, inform the network module about all the objects!
@@ -159,39 +239,378 @@ class Brickmaster:
             self._network.register_object(self._sensors[sensor])
 
         gc.collect()
+        self._perf.startup('network', phase_start)
+        if self._logger.isEnabledFor(logging.INFO):
+            self._logger.info("Core: Startup took {}ms - {}", self._perf.startup_total(),
+                              ', '.join('{} {}ms'.format(phase, self._perf.startup_times[phase])
+                                        for phase in self._perf.startup_times))
 
         if os.uname().sysname.lower() == 'linux':
-            self._logger.critical("Running with PID: {}".format(os.getpid()))
+            self._logger.critical("Running with PID: {}", os.getpid())
 
     def run(self):
         """
         Main run loop.
         """
+        if self._bm2config.system['runtime'] == 'asyncio':
+            self._logger.debug("Core: Starting asyncio runtime.")
+            asyncio.run(self.run_async())
+            return
+        self._start_flashers()
         self._logger.debug("Core: Entering run loop.")
         while True:
+            self._tick()
+            # Sleep until something is next due.
+            self._scheduler.sleep()
+
+    async def run_async(self):
+        """
+        Run loop for the asyncio runtime. The network, each flasher, each sensor and the script/display handling run
+        as their own cooperative tasks, all on the loop's thread. MQTT I/O is driven by the loop, so network polls don't
+        block. Connecting to the broker does, so the network runs that in the loop's executor.
+        """
+        self._aio_loop = asyncio.get_running_loop()
+        self._aio_wake = asyncio.Event()
+        self._network.attach_loop(self._aio_loop, self._run_lock)
+        self._start_flashers()
+
+        tasks = [self._aio_task('network', self._step_network, 'network')]
+        if self._flasher_thread is None:
+            for flasher in self._flashers:
+                if flasher is self._fader:
+                    tasks.append(self._aio_task('fader', flasher.step, 'flashers'))
+                elif isinstance(flasher, brickmaster.controls.FlasherGroup):
+                    tasks.append(self._aio_task('group_' + flasher.id, flasher.step, 'flashers'))
+                else:
+                    tasks.append(self._aio_task('control_' + flasher.id, flasher.step, 'flashers'))
+        for sensor in self._sensors:
+            tasks.append(self._aio_task('sensor_' + sensor, self._sensors[sensor].step, 'sensors'))
+        tasks.append(self._aio_task('show', self._step_show, None))
+        self._logger.debug("Core: Running {} asyncio tasks.", len(tasks))
+        await asyncio.gather(*tasks)
+
+    async def _aio_task(self, name, step, phase):
+        """
+        Run a step method as a task. Each step does its work and returns when it's next due, which the task waits for.
+        How late each task wakes up relative to its deadline is tracked in task_latency.
+
+        :param name: Name of the task, for latency tracking.
+        :type name: str
+        :param step: Method to call. Must return the next due time in time.monotonic_ns() nanoseconds, or None.
+        :type step: method
+        :param phase: Run loop phase to time the step as. None for the show step, which is timed as 'script' or 'idle'.
+        :type phase: str
+        """
+        self._task_latency[name] = [0, 0, 0] # Wake-ups, total lateness, maximum lateness.
+        while True:
+            if phase is None:
+                step_phase = 'script' if len(self._script_engine.running) > 0 else 'idle'
+            else:
+                step_phase = phase
+            lap_start = self._perf.mark()
+            due = self.locked(lambda: self._held(step))
+            self._perf.lap(step_phase, lap_start)
+            wake = self._aio_wake
+            if due is None:
+                timeout = 1
+            else:
+                timeout = max(0, (due - time.monotonic_ns()) / 1000000000)
+            try:
+                await asyncio.wait_for(wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                if due is not None:
+                    latency = self._task_latency[name]
+                    late = time.monotonic_ns() - due
+                    latency[0] += 1
+                    latency[1] += late
+                    if late > latency[2]:
+                        latency[2] = late
+
+    def _aio_signal(self):
+        """
+        Wake all tasks waiting on the current event, then replace it for the next round of waits.
+        """
+        self._aio_wake.set()
+        self._aio_wake = asyncio.Event()
+
+    @property
+    def task_latency(self):
+        """
+        How late each asyncio task has woken up relative to its deadline, in milliseconds. Empty if not using the
+        asyncio runtime.
+
+        :return: dict
+        """
+        return_dict = {}
+        for name in self._task_latency:
+            count, total, maximum = self._task_latency[name]
+            return_dict[name] = {
+                'count': count,
+                'mean': round(total / count / 1000000, 3) if count > 0 else 0,
+                'max': round(maximum / 1000000, 3)
+            }
+        return return_dict
+
+    def wake(self):
+        """
+        Wake the run loop early, ie: when a command has been received from another thread.
+        """
+        if self._aio_loop is not None:
+            try:
+                self._aio_loop.call_soon_threadsafe(self._aio_command_signal)
+            except RuntimeError:
+                # Loop has been closed, ie: at shutdown. Nothing to wake.
+                pass
+        else:
+            self._scheduler.wake()
+
+    def command(self, callback, client, userdata, message):
+        """
+        Hand off a command received on another thread, ie: Paho's. Depending on the command mode, it's either queued for
+        the run loop or run right away, and the run loop is woken either way to act on it.
+
+        :param callback: Callback the command is for.
+        :type callback: method
+        :param client: Client instance for the callback.
+        :param userdata: User data for the callback.
+        :param message: Message received.
+        :return: None
+        """
+        if self._command_queue is None:
+            # Hold outputs, so a command that changes several pins on an expander writes them together.
+            with self._run_lock:
+                self._held(lambda: self._dispatch(callback, client, userdata, message))
+        else:
+            if len(self._command_queue) == self._bm2config.system['command_queue']:
+                self._logger.warning("Core: Command queue full. Dropping the oldest command.")
+            self._command_queue.append((callback, client, userdata, message))
+        self.wake()
+
+    def _run_commands(self):
+        """
+        Run all queued commands.
+        """
+        command_queue = self._command_queue
+        while command_queue:
+            callback, client, userdata, message = command_queue.popleft()
+            self._dispatch(callback, client, userdata, message)
+
+    def _dispatch(self, callback, client, userdata, message):
+        """
+        Run a command's callback. Commands come from outside, so a bad one is logged and dropped rather than being
+        allowed to stop the run loop.
+
+        :param callback: Callback the command is for.
+        :type callback: method
+        :param client: Client instance for the callback.
+        :param userdata: User data for the callback.
+        :param message: Message received.
+        :return: None
+        """
+        try:
+            callback(client, userdata, message)
+        except Exception as e:
+            self._logger.error("Core: Command callback '{}' failed on topic '{}'. Dropping the command. ({}: {})",
+                               getattr(callback, '__qualname__', callback), getattr(message, 'topic', None),
+                               type(e).__name__, e)
+
+    def _aio_command_signal(self):
+        """
+        Run queued commands, then wake all tasks so they act on any changes. Called on the loop's thread.
+        """
+        if self._command_queue:
+            self.locked(lambda: self._held(self._run_commands))
+        self._aio_signal()
+
+    def locked(self, method):
+        """
+        Call a method, holding the run lock if anything runs off the run loop's thread. The network uses this for
+        callbacks that arrive on Paho's thread.
+
+        :param method: Method to call.
+        :type method: method
+        :return: Whatever the method returns.
+        """
+        if self._run_lock is None:
+            return method()
+        with self._run_lock:
+            return method()
+
+    def _start_flashers(self):
+        """
+        Start the flasher thread, if flashers are timed on their own thread.
+        """
+        if self._flasher_thread is not None and not self._flasher_thread.is_alive():
+            self._logger.debug("Core: Starting flasher thread.")
+            self._flasher_thread.start()
+
+    def _run_flashers(self):
+        """
+        Flasher thread. Updates the flashers and sleeps until the next one is due. Works under the run lock, so it
+        doesn't change outputs while the run loop or a command is.
+        """
+        while True:
+            with self._run_lock:
+                self._hold_outputs()
+                try:
+                    lap_start = self._perf.mark()
+                    for flasher in self._flashers:
+                        self._flasher_scheduler.due(flasher.step())
+                    self._perf.lap('flashers', lap_start)
+                finally:
+                    self._release_outputs()
+            self._flasher_scheduler.sleep()
+
+    def _tick(self):
+        """
+        One pass of the run loop. Each object that needs attention at a later time registers its deadline with the
+        scheduler.
+        """
+        self.locked(self._pass)
+
+    def _pass(self):
+        """
+        The work of a run loop pass.
+        """
+        # Collect output changes on expanders and write them together at the end of the pass.
+        self._hold_outputs()
+        try:
+            lap_start = self._perf.mark()
+
+            # Run commands that have arrived since the last pass. Changes they make get published by the network poll.
+            if self._command_queue:
+                self._run_commands()
+
             # Poll the network.
-            self._network.poll()
+            self._scheduler.due(self._step_network())
+            lap_start = self._perf.lap('network', lap_start)
+
+            # Update flashers, unless they have their own thread.
+            if self._flasher_thread is None:
+                for flasher in self._flashers:
+                    self._scheduler.due(flasher.step())
+                lap_start = self._perf.lap('flashers', lap_start)
+
+            # Read sensors when their publish time is up.
+            for sensor in self._sensors:
+                self._scheduler.due(self._sensors[sensor].step())
+            lap_start = self._perf.lap('sensors', lap_start)
+
+            # Run the active script or show the idle displays.
+            show_phase = 'script' if len(self._script_engine.running) > 0 else 'idle'
+            self._scheduler.due(self._step_show())
+            self._perf.lap(show_phase, lap_start)
+        finally:
+            self._release_outputs()
+
+    def _held(self, method):
+        """
+        Call a method, holding output changes on all GPIO expanders until it returns.
 
-            # Update controls which have timers.
-            for control in self._controls:
-                if isinstance(self._controls[control], brickmaster.controls.CtrlFlasher):
-                    self._controls[control].update()
+        :param method: Method to call.
+        :type method: method
+        :return: Whatever the method returns.
+        """
+        self._hold_outputs()
+        try:
+            return method()
+        finally:
+            self._release_outputs()
 
+    def _hold_outputs(self):
+        """
+        Hold output changes on all GPIO expanders.
+        """
+        for extio in self._extgpio:
+            self._extgpio[extio].hold()
+
+    def _release_outputs(self):
+        """
+        Release held output changes on all GPIO expanders, writing any pending changes.
+        """
+        for extio in self._extgpio:
+            self._extgpio[extio].release()
 
+    def _step_network(self):
+        """
+        Poll the network.
 
-            # If there's an active script, do it.
-            if self._active_script is not None:
-                # self._logger.debug(f"Core: Script active, executing '{self._active_script}'")
-                self._scripts[self._active_script].execute(implicit_start=True)
-                # Check to see if the script has gone back to idle.
-                if self._scripts[self._active_script].status == 'OFF':
-                    self._active_script = None
-            else:
-                # Otherwise, have the displays do their idle thing.
-                # Push time and date to displays that need it.
-                # self._logger.debug("Core: Showing idle display state.")
-                for display in self._displays:
-                    self._displays[display].show_idle()
+        :return: When the network is next due, in time.monotonic_ns() nanoseconds.
+        """
+        self._network.poll()
+        return self._network.next_due
+
+    def _step_show(self):
+        """
+        Execute the running scripts, and have any displays they aren't using show their idle state.
+
+        :return: When the scripts or displays are next due, in time.monotonic_ns() nanoseconds.
+        """
+        due = None
+        if len(self._script_engine.running) > 0:
+            due = self._script_engine.step()
+        if len(self._displays) > 0:
+            # When scripts start or stop, the displays they use change hands. Redraw everything that's idle.
+            if self._script_engine.changed:
+                self._script_engine.changed = False
+                self._idle_due = None
+            idle_due = self._step_idle()
+            if idle_due is not None and (due is None or idle_due < due):
+                due = idle_due
+        return due
+
+    def _step_idle(self):
+        """
+        Show the idle state on the displays. Everything is drawn when going idle. After that, clocks are only updated on
+        minute boundaries and dates on day boundaries, all from the same reading of the time.
+
+        :return: When the displays are next due, in time.monotonic_ns() nanoseconds.
+        """
+        now = time.monotonic_ns()
+        redraw_all = self._idle_due is None
+        update_clocks = redraw_all or now >= self._clock_due
+        update_dates = redraw_all or now >= self._date_due
+        if not (update_clocks or update_dates):
+            return self._idle_due
+
+        wall_time = time.time()
+        local_time = time.localtime(int(wall_time))
+        # Displays in use by a script are left to it.
+        engine = self._script_engine
+        if redraw_all:
+            # self._logger.debug("Core: Showing idle display state.")
+            for display in self._displays:
+                if engine.owner(self._displays[display]) is None:
+                    self._displays[display].show_idle(local_time)
+        else:
+            if update_clocks:
+                for display in self._clocks:
+                    if engine.owner(self._displays[display]) is None:
+                        self._displays[display].show_idle(local_time)
+            if update_dates:
+                for display in self._dates:
+                    if engine.owner(self._displays[display]) is None:
+                        self._displays[display].show_idle(local_time)
+
+        # Work out the next minute and day boundaries.
+        if update_clocks:
+            self._clock_due = now + int((60 - wall_time % 60) * 1000000000)
+        if update_dates:
+            day_elapsed = local_time.tm_hour * 3600 + local_time.tm_min * 60 + local_time.tm_sec + wall_time % 1
+            self._date_due = now + int((86400 - day_elapsed) * 1000000000)
+
+        # Only wake up for the displays that actually need it.
+        if len(self._clocks) > 0 and len(self._dates) > 0:
+            self._idle_due = min(self._clock_due, self._date_due)
+        elif len(self._clocks) > 0:
+            self._idle_due = self._clock_due
+        elif len(self._dates) > 0:
+            self._idle_due = self._date_due
+        else:
+            # Nothing changes over time, so there's nothing to wake up for. Use the day boundary as a placeholder.
+            self._idle_due = self._date_due
+            return None
+        return self._idle_due
 
     def callback_scr(self, client, topic, message):
         """
@@ -202,29 +621,28 @@ class Brickmaster:
         :param message: Message object.
         :return:
         """
-        # Convert the message payload (which is binary) to a string.
-        message_text = str(message.payload, 'utf-8')
+        if isinstance(message, str):
+            # MiniMQTT (Circuitpython) outputs a straight string.
+            message_text = message
+        else:
+            # Convert the message payload (which is binary) to a string.
+            message_text = str(message.payload, 'utf-8')
         # Message text *should* be the name of the script to execute, or Inactive/Abort.
-        self._logger.debug("Core: Received script callback message '{}', client '{}', topic '{}'".
-        format(message_text, client, topic))
+        self._logger.debug("Core: Received script callback message '{}', client '{}', topic '{}'",
+                           message_text, client, topic)
         if message_text in ('Inactive','Abort'):
-            # Make the currently active script off. This will reset internal counters.
-            self._scripts[self._active_script].set('OFF')
-            # Unselect the active script. This publishes 'Inactive' on the next poll.
-            self._active_script = None
+            # Stop all running scripts. This will reset their internal counters, and publishes 'Inactive' on the next
+            # poll.
+            self._script_engine.stop_all()
         else:
             # So now we presume this is the full name of a script. Try to string match it.
             for script_id in self._scripts:
                 if self._scripts[script_id].name == message_text:
-                    if self._active_script is None:
-                        self._logger.debug("Core: Activating script '{}'".format(message_text))
-                        self._active_script = script_id
-                    else:
-                        self._logger.warning("Core: Cannot activate script '{}', script '{}' is already active.".
-                                             format(message_text, self._scripts[self._active_script].name))
+                    self._logger.debug("Core: Activating script '{}'", message_text)
+                    self._script_engine.start(self._scripts[script_id])
                     return
             # If we get here, something has gone wrong.
-            self._logger.warning("Core: Could not match script '{}' against configured scripts.".format(message_text))
+            self._logger.warning("Core: Could not match script '{}' against configured scripts.", message_text)
 
     # Methods to create our objects. Called during setup, or when we're asked to reload.
     def _create_controls(self, publish_time=15):
@@ -235,19 +653,18 @@ class Brickmaster:
         :return:
         """
         # self._logger.debug("Sys: Memory free at start of control creation: {}".format(gc.mem_free()))
-        self._logger.debug("Sys: Controls to create - {}".format(self._bm2config.controls))
+        self._logger.debug("Sys: Controls to create - {}", self._bm2config.controls)
         for control_cfg in self._bm2config.controls:
-            self._logger.debug("Setting up control '{}' as type '{}'".
-                               format(control_cfg['id'], control_cfg['type']))
-            self._logger.debug("Complete control config: {}".format(control_cfg))
+            self._logger.debug("Setting up control '{}' as type '{}'", control_cfg['id'], control_cfg['type'])
+            self._logger.debug("Complete control config: {}", control_cfg)
 
             # Check for extio boards (AW9523s)
             if control_cfg['extio'] is not None:
                 if control_cfg['extio'] not in self._extgpio.keys():
-                    self._logger.debug(f"Core: No AW9523 exists at address '{control_cfg['extio']}'. Creating.")
+                    self._logger.debug("Core: No AW9523 exists at address '{}'. Creating.", control_cfg['extio'])
                     self._extgpio[control_cfg['extio']] = self._setup_aw9523(control_cfg['extio'])
                 else:
-                    self._logger.debug(f"Core: AW9523 already initialized at address '{control_cfg['extio']}'")
+                    self._logger.debug("Core: AW9523 already initialized at address '{}'", control_cfg['extio'])
                 extio_obj = self._extgpio[control_cfg['extio']]
             else:
                 extio_obj = None
@@ -265,6 +682,17 @@ class Brickmaster:
                     icon = control_cfg['icon'],
                     log_level=self._bm2config.system['log_level'])
             elif control_cfg['type'].lower() == 'flasher':
+                # Flashers in a group share its clock. The group takes its timing from its first flasher.
+                if control_cfg['group'] is not None:
+                    if control_cfg['group'] not in self._flasher_groups:
+                        self._logger.debug("Core: Creating flasher group '{}'.", control_cfg['group'])
+                        self._flasher_groups[control_cfg['group']] = brickmaster.controls.FlasherGroup(
+                            control_cfg['group'],
+                            loiter_time = control_cfg['loiter_time'],
+                            switch_time = control_cfg['switch_time'])
+                    group = self._flasher_groups[control_cfg['group']]
+                else:
+                    group = None
                 self._controls[control_cfg['id']] = (brickmaster.controls.CtrlFlasher(
                     ctrl_id = control_cfg['id'],
                     name = control_cfg['name'],
@@ -274,8 +702,24 @@ class Brickmaster:
                     switch_time = control_cfg['switch_time'],
                     publish_time = publish_time,
                     extio_obj = extio_obj,
+                    hardware = control_cfg['hardware'],
+                    sequence = control_cfg['sequence'],
+                    group = group,
                     icon = control_cfg['icon'],
                     log_level=self._bm2config.system['log_level']))
+            elif control_cfg['type'].lower() == 'dimmer':
+                self._controls[control_cfg['id']] = brickmaster.controls.CtrlDimmer(
+                    ctrl_id = control_cfg['id'],
+                    name = control_cfg['name'],
+                    core = self,
+                    pins = control_cfg['pins'],
+                    publish_time = publish_time,
+                    extio_obj = extio_obj,
+                    fader = self._fader,
+                    brightness = control_cfg['brightness'],
+                    transition = control_cfg['transition'],
+                    icon = control_cfg['icon'],
+                    log_level=self._bm2config.system['log_level'])
 
     def _create_displays(self):
         if len(self._bm2config.displays) == 0:
@@ -288,11 +732,11 @@ class Brickmaster:
 
         # Set up the displays.
         for display_cfg in self._bm2config.displays:
-            self._logger.info(f"Core: Setting up display '{display_cfg['name']}'")
+            self._logger.info("Core: Setting up display '{}'", display_cfg['name'])
             try:
                 self._displays[display_cfg['name']] = brickmaster.Display(display_cfg, self._i2c_bus, )
             except ImportError:
-                self._logger.error(f"Core: Display not available. Cannot create display '{display_cfg['name']}'")
+                self._logger.error("Core: Display not available. Cannot create display '{}'", display_cfg['name'])
             else:
                 if display_cfg['idle']['show'] == 'time':
                     self._clocks.append(display_cfg['name'])
@@ -301,17 +745,17 @@ class Brickmaster:
 
     def _create_scripts(self):
         # If we're on Linux and scan files is enable, get a list of all the JSON files.
-        self._logger.debug("Scan dir setting: {}".format(self._bm2config.scripts['scan_dir']))
+        self._logger.debug("Scan dir setting: {}", self._bm2config.scripts['scan_dir'])
         if os.uname().sysname.lower() == 'linux' and self._bm2config.scripts['scan_dir']:
-            self._logger.debug("Script directory scan set to: {}".format(self._bm2config.scripts['scan_dir']))
+            self._logger.debug("Script directory scan set to: {}", self._bm2config.scripts['scan_dir'])
             from pathlib import Path
             script_dir = Path(self._bm2config.scripts['dir'])
-            self._logger.debug("Core: Script path is '{}'".format(script_dir))
+            self._logger.debug("Core: Script path is '{}'", script_dir)
             # Make the path absolute.
             if not script_dir.is_absolute():
                 self._logger.debug("Core: Making script path absolute.")
                 script_dir = Path.cwd() / script_dir
-                self._logger.debug("Core: Script path is now '{}'".format(script_dir))
+                self._logger.debug("Core: Script path is now '{}'", script_dir)
             script_list = list(script_dir.glob("*.json"))
             script_list = list(map(lambda e: str(e), script_list))
         else:
@@ -319,34 +763,34 @@ class Brickmaster:
             script_list = []
             for file in self._bm2config.scripts['files']:
                 script_list.append(self._bm2config.scripts['dir'] + '/' + file)
-        self._logger.debug("Assembled script list: {}".format(script_list))
+        self._logger.debug("Assembled script list: {}", script_list)
 
         # script_dir = Path.cwd() / "scripts"
         for script_file in script_list:
-            self._logger.info("Setting up script: {}".format(script_file))
+            self._logger.info("Setting up script: {}", script_file)
             try:
                 f = io.open(script_file, encoding="utf-8")
                 with f as source:
                     script_data = json.load(source)
             except FileNotFoundError:
-                self._logger.warning("File '{}' specified but does not exist! Skipping.".format(script_file))
+                self._logger.warning("File '{}' specified but does not exist! Skipping.", script_file)
             except json.decoder.JSONDecodeError:
-                self._logger.warning("Could not decode JSON for script '{}'. Skipping.".format(script_file))
+                self._logger.warning("Could not decode JSON for script '{}'. Skipping.", script_file)
             else:
 
-                self._logger.debug("Loaded script JSON from file {}.".format(script_file))
+                self._logger.debug("Loaded script JSON from file {}.", script_file)
                 try:
                     if script_data['disable'] == 'true':
                         continue
                 except KeyError:
-                    self._logger.debug("Core: Script '{}' not explicitly disabled. presuming enabled.".
-                                       format(script_data['script']))
+                    self._logger.debug("Core: Script '{}' not explicitly disabled. presuming enabled.",
+                                       script_data['script'])
                 try:
                     if script_data['type'] == 'flight':
-                        self._logger.debug("Core: Creating flight script object '{}'".format(script_data['script']))
+                        self._logger.debug("Core: Creating flight script object '{}'", script_data['script'])
                         script_obj = brickmaster.scripts.BM2FlightScript(script_data, self._controls, self._displays)
                     else:
-                        self._logger.debug("Creating basic script object '{}'".format(script_data['script']))
+                        self._logger.debug("Creating basic script object '{}'", script_data['script'])
                         script_obj = brickmaster.scripts.BM2Script(script_data, self._controls)
                 except KeyError:
                     self._logger.debug("Creating basic script object...")
@@ -360,18 +804,16 @@ class Brickmaster:
         Create defined sensors.
         """
 
-        self._logger.debug("Sys: Sensors to create - {}".format(self._bm2config.sensors))
+        self._logger.debug("Sys: Sensors to create - {}", self._bm2config.sensors)
         for sensor_cfg in self._bm2config.sensors:
-            self._logger.debug("Setting up sensor '{}' as type '{}'".
-                               format(sensor_cfg['id'], sensor_cfg['type']))
-            self._logger.debug("Complete sensor config: {}".format(sensor_cfg))
+            self._logger.debug("Setting up sensor '{}' as type '{}'", sensor_cfg['id'], sensor_cfg['type'])
+            self._logger.debug("Complete sensor config: {}", sensor_cfg)
 
             # Check the type to create the correct object type.
             # try:
             if sensor_cfg['type'].lower() == 'htu31d':
                 if self._i2c_bus is None:
-                    self._logger.error("Cannot configure HTU31D '{}' when I2C bus is not configured.".
-                                       format(sensor_cfg['id']))
+                    self._logger.error("Cannot configure HTU31D '{}' when I2C bus is not configured.", sensor_cfg['id'])
                 else:
                     try:
                         self._sensors[sensor_cfg['id']] = brickmaster.sensors.SensorHTU31D(
@@ -380,10 +822,13 @@ class Brickmaster:
                             address=sensor_cfg['address'],
                             i2c_bus=self._i2c_bus,
                             core=self,
+                            publish_time=sensor_cfg['publish_time'],
+                            sample_time=sensor_cfg['sample_time'],
+                            history_size=sensor_cfg['history'],
                             log_level=self._bm2config.system['log_level'])
                     except ImportError:
-                        self._logger.error("Core: Could not import HTU31D library. Will not create sensor '{}'".
-                                           format(sensor_cfg['id']))
+                        self._logger.error("Core: Could not import HTU31D library. Will not create sensor '{}'",
+                                           sensor_cfg['id'])
             else:
                 raise ValueError("Cannot configure sensor '{}', type '{}' does not have setup.".
                                  format(sensor_cfg['id'], sensor_cfg['type']))
@@ -406,6 +851,7 @@ class Brickmaster:
     def _setup_aw9523(self, addr):
         """
         Set up an AW9523 I/O Expander on the given address. Uses the system-wide I2C bus.
+        Returns the expander wrapped in a BatchedAW9523.
         """
 
         # Conditionally import the libraries.
@@ -417,10 +863,11 @@ class Brickmaster:
         if isinstance(addr, str):
             addr = int(addr)
         aw = adafruit_aw9523.AW9523(self._i2c_bus, addr)
-        return aw
+        # Wrap the expander so output changes can be batched.
+        return brickmaster.gpio.BatchedAW9523(aw)
 
     def _setup_i2c_bus(self):
-        self._logger.debug("Core: I2C value is {}".format(self._bm2config.system['i2c']))
+        self._logger.debug("Core: I2C value is {}", self._bm2config.system['i2c'])
         if self._bm2config.system['i2c']:
             try:
                 self._i2c_bus = busio.I2C(board.SCL, board.SDA)
@@ -484,14 +931,23 @@ class Brickmaster:
     @property
     def active_script(self):
         """
-        Report the active script, if any.
+        Report the active script, if any. If several are running, this is the one with the highest priority.
 
         :return:
         """
-        if self._active_script is None:
+        if len(self._script_engine.running) == 0:
             return "Inactive"
         else:
-            return self._scripts[self._active_script].name
+            return self._script_engine.running[0].name
+
+    @property
+    def perf(self):
+        """
+        Performance counters for the run loop.
+
+        :return: BM2Perf
+        """
+        return self._perf
 
     # Private Properties
 
@@ -2,7 +2,7 @@
 Brickmaster Display System
 """
 
-import adafruit_logging as logger
+import brickmaster.log as logger
 # from .segment_format import number_7s, time_7s
 from adafruit_ht16k33.segments import Seg7x4, BigSeg7x4
 import time
@@ -30,21 +30,23 @@ class Display:
 
         # Save our name for easy reference.
         self.name = self._config['name']
+        # The last frame sent to the display. Writes which wouldn't change the display are skipped.
+        self._frame_text = None
+        self._frame_ampm = None
+        self._frame_brightness = None
         # Create a display object.
         self._display_obj = self._create_object(disptype=self._config['type'], address=self._config['address'])
-        # test it!
-        self._test()
+        # Test it, if asked to.
+        if self._config['test']:
+            self._test()
 
     def show(self, the_input):
         """
         Send text to the display.
         """
-        try:
-            self._display_obj.print(the_input)
-        except ValueError:
-            self._logger.warning("Could not send input to display. Not a valid type.")
+        self._render(the_input)
 
-    def show_dt(self, dtelement='time', clkhr=12):
+    def show_dt(self, dtelement='time', clkhr=12, now=None):
         """
         Send date or time to the display.
 
@@ -52,36 +54,38 @@ class Display:
         :type dtelement: str
         :param clkhr: Use either 12 or 24 hour time.
         :type clkhr: int
+        :param now: Time to show. If not given, uses the current local time.
+        :type now: time.struct_time
         """
+        if now is None:
+            now = time.localtime()
         if dtelement == 'date':
-            self._display_obj.print(self._format_dt(field='date'))
-            # Make sure AM/PM is off, if we're a big segment.
-            if isinstance(self._display_obj, BigSeg7x4):
-                self._display_obj.ampm = False
+            # AM/PM is off for dates.
+            self._render(self._format_dt(field='date', now=now))
         else:
             if clkhr not in (12, 24):
                 # Clock must be either 12 or 24 hours.
                 raise ValueError(
                     "Clock hours must be either '12' or 24'. Instead got {}. Are you on Mars?".format(clkhr))
             # Default is time, so assume any other input wants it to be time.
-            # Print the string.
-            self._display_obj.print(self._format_dt(field='time', clkhr=clkhr))
-            # If we're a big display, we can set an AM/PM indicator.
-            if isinstance(self._display_obj, BigSeg7x4):
-                self._display_obj.ampm = self._format_dt('pm')
+            # Print the string, with the AM/PM indicator if we're a big display.
+            self._render(self._format_dt(field='time', clkhr=clkhr, now=now), ampm=self._format_dt('pm', now=now))
 
     # Method to show whatever the displays idle state is.
-    def show_idle(self):
+    def show_idle(self, now=None):
         """
         Show the display's idle state. Idle will be whatever is defined in the configuration.
+
+        :param now: Time to show, for time and date displays. If not given, uses the current local time.
+        :type now: time.struct_time
         """
         # Known idle states!
         if self._config['idle']['show'] == 'time':
-            self.show_dt()
-            self._display_obj.brightness = self._config['idle']['brightness']
+            self.show_dt(now=now)
+            self._set_brightness(self._config['idle']['brightness'])
         elif self._config['idle']['show'] == 'date':
-            self.show_dt(dtelement='date')
-            self._display_obj.brightness = self._config['idle']['brightness']
+            self.show_dt(dtelement='date', now=now)
+            self._set_brightness(self._config['idle']['brightness'])
         else:
             # There's probably a more elegant way to do this that's faster. Look to optimize later.
             self.off()
@@ -90,6 +94,9 @@ class Display:
         """
         Turn off the display. Clears all elements.
         """
+        # Already off, nothing to do.
+        if self._frame_text == '':
+            return
         self._display_obj.fill(False)
         if isinstance(self._display_obj, Seg7x4):
             # self._logger.debug("Display: Setting colon off.")
@@ -105,6 +112,44 @@ class Display:
             self._display_obj.colons[0] = False
             # self._logger.debug("Display: Setting second colon off.")
             self._display_obj.colons[1] = False
+        self._frame_text = ''
+        self._frame_ampm = False
+
+    def _render(self, text, ampm=False):
+        """
+        Send a frame to the display, if it differs from the one already shown.
+
+        :param text: Text to show.
+        :type text: str
+        :param ampm: State of the AM/PM indicator. Only used on big segment displays.
+        :type ampm: bool
+        :return: None
+        """
+        if text == self._frame_text and ampm == self._frame_ampm:
+            return
+        try:
+            self._display_obj.print(text)
+        except ValueError:
+            self._logger.warning("Could not send input to display. Not a valid type.")
+            # Unknown state, make sure the next frame is sent.
+            self._frame_text = None
+            return
+        if isinstance(self._display_obj, BigSeg7x4) and ampm != self._frame_ampm:
+            self._display_obj.ampm = ampm
+        self._frame_text = text
+        self._frame_ampm = ampm
+
+    def _set_brightness(self, brightness):
+        """
+        Set the brightness of the display, if it's changed.
+
+        :param brightness: Brightness, 0.0 to 1.0
+        :type brightness: float
+        :return: None
+        """
+        if brightness != self._frame_brightness:
+            self._display_obj.brightness = brightness
+            self._frame_brightness = brightness
 
     def _create_object(self, disptype, address):
         if disptype == 'bigseg7x4':
@@ -121,24 +166,26 @@ class Display:
     # Create a formatted string to send to displays from localtime.
     # This is a simple implementation since CircuitPython doesn't support datetime with strftime.
     @staticmethod
-    def _format_dt(field=None, clkhr=12):
+    def _format_dt(field=None, clkhr=12, now=None):
         if field not in ('date', 'time', 'pm'):
             raise ValueError("{} not a valid formatting field.")
         if clkhr not in (12, 24):
             raise ValueError("Clock can only 12 or 24 hours.")
+        if now is None:
+            now = time.localtime()
 
         # Return date in format "mm.dd"
         if field == 'date':
-            date_val = str(time.localtime().tm_mon).rjust(2) + "." + str(time.localtime().tm_mday).rjust(2)
+            date_val = str(now.tm_mon).rjust(2) + "." + str(now.tm_mday).rjust(2)
             return date_val
         if field == 'time':
-            hour = time.localtime().tm_hour
+            hour = now.tm_hour
             if clkhr == 12 and hour > 12:
                 hour -= 12
-            time_val = str(hour).rjust(2) + ":" + str(time.localtime().tm_min).rjust(2, '0')
+            time_val = str(hour).rjust(2) + ":" + str(now.tm_min).rjust(2, '0')
             return time_val
         if field == 'pm':
-            if time.localtime().tm_hour >= 12:
+            if now.tm_hour >= 12:
                 ampm_val = True
             else:
                 ampm_val = False
@@ -161,7 +208,6 @@ class Display:
             elif isinstance(self._display_obj, Seg7x4):
                 self._display_obj.colon = extra_state
             else:
-                self._logger.critical("Display has unknown type {}. This should never happen!".
-                                      format(type(self._display_obj)))
+                self._logger.critical("Display has unknown type {}. This should never happen!", type(self._display_obj))
             time.sleep(delay)
         self._display_obj.fill(False)
@@ -0,0 +1,102 @@
+"""
+Brickmaster Fader
+"""
+
+from time import monotonic_ns
+
+
+class BM2Fader:
+    """
+    Steps all active fades together, at a fixed frame rate.
+
+    Dimmers hand themselves to the fader when they start a fade. Each frame the fader has every fading dimmer set its
+    level for that moment, so all the level changes for a frame land in the same pass of the run loop, and go out to
+    each expander in one write. Levels are worked out from how far through its fade each dimmer is, so a late frame
+    doesn't stretch the fade.
+    """
+    def __init__(self, frame_rate=50):
+        """
+        :param frame_rate: Frames per second.
+        :type frame_rate: int
+        """
+        self._frame_time = 1000000000 // frame_rate
+        self._fades = []
+        self._next_frame = 0
+        self._wake = None # Callback to wake whatever drives the fader. Set by the core.
+
+    @property
+    def id(self):
+        """
+        Name of the fader, for naming its task.
+        """
+        return 'fader'
+
+    @property
+    def active(self):
+        """
+        Number of fades running.
+        """
+        return len(self._fades)
+
+    def set_wake(self, callback):
+        """
+        Set the method to call when a fade is started outside of a step, so the fader picks it up.
+
+        :param callback: Method to call. Takes no arguments.
+        :type callback: method
+        """
+        self._wake = callback
+
+    def start(self, dimmer):
+        """
+        Add a dimmer to the fades being stepped. If no fades are running, the first frame is due right away.
+
+        :param dimmer: Dimmer which has started a fade.
+        :type dimmer: brickmaster.controls.CtrlDimmer
+        :return: None
+        """
+        if dimmer in self._fades:
+            return
+        if len(self._fades) == 0:
+            self._next_frame = monotonic_ns()
+        self._fades.append(dimmer)
+        if self._wake is not None:
+            self._wake()
+
+    def stop(self, dimmer):
+        """
+        Stop stepping a dimmer's fade.
+
+        :param dimmer: Dimmer to stop.
+        :type dimmer: brickmaster.controls.CtrlDimmer
+        :return: None
+        """
+        if dimmer in self._fades:
+            self._fades.remove(dimmer)
+
+    def step(self):
+        """
+        Step all fades, if a frame is due.
+
+        :return: When the next frame is due, in time.monotonic_ns() nanoseconds. None if there are no fades running.
+        :rtype: int
+        """
+        if len(self._fades) == 0:
+            return None
+        now = monotonic_ns()
+        if now < self._next_frame:
+            return self._next_frame
+        # Step every fade, dropping the ones which have finished.
+        i = 0
+        while i < len(self._fades):
+            if self._fades[i].fade_step(now):
+                self._fades.pop(i)
+            else:
+                i += 1
+        if len(self._fades) == 0:
+            return None
+        self._next_frame += self._frame_time
+        if self._next_frame <= now:
+            # Frames were missed. Carry on from now, rather than rushing through them.
+            self._next_frame = now + self._frame_time
+        return self._next_frame
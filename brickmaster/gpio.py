@@ -181,3 +181,233 @@ class EnhancedDigitalInOut:
         self._off_pin.switch_to_output()
         # Force self to off.
         self.value = False
+
+
+# First of the AW9523's dimming registers, and the offset from it of each pin's register. The registers run P1_0-P1_3,
+# P0_0-P0_7, then P1_4-P1_7.
+_AW9523_REG_DIM = 0x20
+_AW9523_DIM_OFFSETS = (4, 5, 6, 7, 8, 9, 10, 11, 0, 1, 2, 3, 12, 13, 14, 15)
+
+
+class BatchedAW9523:
+    """
+    Wrapper for an AW9523 expander which batches output changes.
+
+    The AW9523's own pins each do a read-modify-write of the output register on every value change. This keeps a shadow
+    of the output register instead. Pins update the shadow, and while the expander is held the changes are collected and
+    written out on release with a single write of the output register. This makes lights switch together and keeps I2C
+    traffic down when many pins change at once, ie: in a script block.
+
+    Pins in LED mode are dimmed the same way. Their levels are kept in a shadow of the dimming registers, and the
+    changed span is written in one transaction, since the AW9523 moves to the next register through a write.
+    """
+    def __init__(self, aw9523):
+        """
+        :param aw9523: The AW9523 to wrap.
+        :type aw9523: adafruit_aw9523.AW9523
+        """
+        self._aw9523 = aw9523
+        self._shadow = aw9523.outputs
+        self._holds = 0
+        self._dirty = False
+        # Dimming register shadow. Byte 0 is room for the register address when writing, so register n is at n + 1.
+        self._dim = bytearray(17)
+        # Span of dimming registers changed since the last write. Empty when the low end is past the high end.
+        self._dim_low = 16
+        self._dim_high = -1
+
+    @property
+    def aw9523(self):
+        """
+        The underlying AW9523 object.
+        """
+        return self._aw9523
+
+    def get_pin(self, pin):
+        """
+        Get a batched pin on the expander.
+
+        :param pin: Pin number, 0-15
+        :type pin: int
+        :return: BatchedAW9523Pin
+        """
+        return BatchedAW9523Pin(self, pin)
+
+    def hold(self):
+        """
+        Hold output changes until release is called. Holds can be nested, changes are written when the last one is
+        released.
+
+        :return: None
+        """
+        self._holds += 1
+
+    def release(self):
+        """
+        Release a hold, and write pending output changes if this was the last one.
+
+        :return: None
+        """
+        if self._holds > 0:
+            self._holds -= 1
+        if self._holds == 0:
+            if self._dirty:
+                self._write()
+            if self._dim_high >= 0:
+                self._write_dim()
+
+    def get_value(self, pin):
+        """
+        Get the output value of a pin from the shadow register.
+
+        :param pin: Pin number, 0-15
+        :type pin: int
+        :return: bool
+        """
+        return bool(self._shadow & (1 << pin))
+
+    def set_value(self, pin, value):
+        """
+        Set the output value of a pin. Written immediately, unless the expander is held.
+
+        :param pin: Pin number, 0-15
+        :type pin: int
+        :param value: Value to set.
+        :type value: bool
+        :return: None
+        """
+        if value:
+            new_shadow = self._shadow | (1 << pin)
+        else:
+            new_shadow = self._shadow & ~(1 << pin)
+        if new_shadow == self._shadow:
+            return
+        self._shadow = new_shadow
+        self._dirty = True
+        if self._holds == 0:
+            self._write()
+
+    def set_outputs(self, mask, values):
+        """
+        Set the output values of several pins at once. Written immediately, unless the expander is held.
+
+        :param mask: Bitmask of the pins to set.
+        :type mask: int
+        :param values: Bitmask of the values to set them to. Bits outside the mask are ignored.
+        :type values: int
+        :return: None
+        """
+        new_shadow = (self._shadow & ~mask) | (values & mask)
+        if new_shadow == self._shadow:
+            return
+        self._shadow = new_shadow
+        self._dirty = True
+        if self._holds == 0:
+            self._write()
+
+    def setup_led(self, pin):
+        """
+        Put a pin in LED mode, where it sinks a constant current set by its dimming level. The level starts at 0, off.
+
+        :param pin: Pin number, 0-15
+        :type pin: int
+        :return: None
+        """
+        self._aw9523.get_pin(pin).switch_to_output()
+        self._aw9523.LED_modes = self._aw9523.LED_modes | (1 << pin)
+        self.set_level(pin, 0)
+
+    def get_level(self, pin):
+        """
+        Get the dimming level of a pin in LED mode from the shadow.
+
+        :param pin: Pin number, 0-15
+        :type pin: int
+        :return: int
+        """
+        return self._dim[_AW9523_DIM_OFFSETS[pin] + 1]
+
+    def set_level(self, pin, level):
+        """
+        Set the dimming level of a pin in LED mode. Written immediately, unless the expander is held.
+
+        :param pin: Pin number, 0-15
+        :type pin: int
+        :param level: Level, 0 (off) to 255 (full current).
+        :type level: int
+        :return: None
+        """
+        offset = _AW9523_DIM_OFFSETS[pin]
+        if self._dim[offset + 1] == level:
+            return
+        self._dim[offset + 1] = level
+        if offset < self._dim_low:
+            self._dim_low = offset
+        if offset > self._dim_high:
+            self._dim_high = offset
+        if self._holds == 0:
+            self._write_dim()
+
+    def _write(self):
+        """
+        Write the shadow to the output register, both ports in one transaction.
+        """
+        self._dirty = False
+        self._aw9523.outputs = self._shadow
+
+    def _write_dim(self):
+        """
+        Write the changed span of dimming registers in one transaction.
+        """
+        low = self._dim_low
+        high = self._dim_high
+        self._dim_low = 16
+        self._dim_high = -1
+        # The byte before the span holds the previous register's level. Borrow it for the register address.
+        saved = self._dim[low]
+        self._dim[low] = _AW9523_REG_DIM + low
+        try:
+            with self._aw9523.i2c_device as i2c:
+                i2c.write(self._dim, start=low, end=high + 2)
+        finally:
+            self._dim[low] = saved
+
+
+class BatchedAW9523Pin:
+    """
+    Pin on a BatchedAW9523. Offers the subset of DigitalInOut that EnhancedDigitalInOut uses.
+    """
+    def __init__(self, expander, pin):
+        """
+        :param expander: The batched expander the pin is on.
+        :type expander: BatchedAW9523
+        :param pin: Pin number, 0-15
+        :type pin: int
+        """
+        self._expander = expander
+        self._pin = pin
+
+    def switch_to_output(self, value=False):
+        """
+        Set the pin to be an output with the given value. Direction is set on the expander directly, since it's only done
+        once at setup.
+
+        :param value: Initial value of the pin.
+        :type value: bool
+        :return: None
+        """
+        self._expander.aw9523.get_pin(self._pin).switch_to_output(value=value)
+        self._expander.set_value(self._pin, value)
+
+    @property
+    def value(self):
+        """
+        Value of the pin.
+
+        return bool
+        """
+        return self._expander.get_value(self._pin)
+
+    @value.setter
+    def value(self, value):
+        self._expander.set_value(self._pin, value)
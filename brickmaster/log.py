@@ -0,0 +1,114 @@
+"""
+Brickmaster Logging
+
+Wraps the Adafruit logger so messages are only formatted if they'll actually be logged. Adafruit Logging formats every
+message it's given, even when the level would drop it, so calling it with a pre-formatted string costs the formatting
+work on every pass of the run loop.
+
+Pass the format arguments separately, in str.format() style:
+
+    self._logger.debug("Network: Publishing message on '{}' - {}", topic, message)
+
+Debug messages can also be compiled out entirely. They're skipped whenever __debug__ is False, which is the case when
+running under 'python -O', when the package is compiled with 'mpy-cross -O1', or on CircuitPython after
+'micropython.opt_level(1)'.
+"""
+
+import adafruit_logging
+# Re-export the levels, so modules don't need to import adafruit_logging just for these.
+from adafruit_logging import DEBUG, INFO, WARNING, ERROR, CRITICAL
+
+# Wrapped loggers, by name. Everything in Brickmaster shares one logger, but keep the same interface as getLogger.
+_loggers = {}
+
+
+def getLogger(name):
+    """
+    Get the wrapped logger for a name, creating it if needed.
+
+    :param name: Name of the logger.
+    :type name: str
+    :return: BM2Logger
+    """
+    if name not in _loggers:
+        _loggers[name] = BM2Logger(adafruit_logging.getLogger(name))
+    return _loggers[name]
+
+
+class BM2Logger:
+    """
+    Level-guarded wrapper around an Adafruit logger.
+    """
+    def __init__(self, logger):
+        """
+        :param logger: Adafruit logger to wrap.
+        :type logger: adafruit_logging.Logger
+        """
+        self._logger = logger
+        self._level = logger.getEffectiveLevel()
+
+    def setLevel(self, level):
+        """
+        Set the logging level.
+
+        :param level: Level to log at. Should be an adafruit_logging level constant.
+        :type level: int
+        """
+        self._level = level
+        self._logger.setLevel(level)
+
+    def getEffectiveLevel(self):
+        """
+        Current logging level.
+
+        :return: int
+        """
+        return self._level
+
+    def isEnabledFor(self, level):
+        """
+        Will a message at this level be logged? Use to skip building expensive arguments.
+
+        :param level: Level to check.
+        :type level: int
+        :return: bool
+        """
+        return level >= self._level
+
+    def addHandler(self, handler):
+        self._logger.addHandler(handler)
+
+    def removeHandler(self, handler):
+        self._logger.removeHandler(handler)
+
+    def log(self, level, msg, *args):
+        """
+        Log at a given level. Unlike the level methods, arguments are formatted with '%', as the standard logging module
+        does. This lets the wrapper be handed to libraries, such as Paho, which expect a standard logger.
+        """
+        if level >= self._level:
+            self._logger.log(level, msg % args if args else msg)
+
+    def debug(self, msg, *args):
+        if __debug__:
+            if self._level <= DEBUG:
+                self._logger.debug(msg.format(*args) if args else msg)
+
+    def info(self, msg, *args):
+        if self._level <= INFO:
+            self._logger.info(msg.format(*args) if args else msg)
+
+    def warning(self, msg, *args):
+        if self._level <= WARNING:
+            self._logger.warning(msg.format(*args) if args else msg)
+
+    def error(self, msg, *args):
+        if self._level <= ERROR:
+            self._logger.error(msg.format(*args) if args else msg)
+
+    def critical(self, msg, *args):
+        if self._level <= CRITICAL:
+            self._logger.critical(msg.format(*args) if args else msg)
+
+    def exception(self, err):
+        self._logger.exception(err)
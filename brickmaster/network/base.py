@@ -2,12 +2,12 @@
 Brickmaster Network Base Class
 """
 
-import adafruit_logging
-from json import dumps as json_dumps
+import brickmaster.log
 import sys
 import time
 # Import only the parts of Brickmaster2 we need, to prevent circular imports.
 from . import mqtt
+from .topics import BM2Topics
 import brickmaster.const as const
 import brickmaster.util
 import brickmaster.version
@@ -63,8 +63,12 @@ class BM2Network:
 
         # Save parameters.
         self._core = core
+        # Performance counters, shared with the core.
+        self._perf = core.perf
         self._system_id = system_id
         self._short_name = short_name
+        # Topics are built once and reused.
+        self._topics = BM2Topics(short_name)
         self._long_name = long_name
         self._mqtt_broker = broker
         self._mqtt_log = mqtt_log
@@ -74,10 +78,10 @@ class BM2Network:
         self._mqtt_timeout = mqtt_timeout
         self._net_interface = net_interface
         # All the HA variables start with _ha, you know, obviously.
-        self._ha_override = False
-        self._ha_start = time.monotonic()
         self._ha_discover = ha_discover
         self._ha_base = ha_base
+        # Home Assistant announces itself here when it starts.
+        self._ha_status_topic = ha_base + '/status'
         self._ha_meminfo = ha_meminfo
         self._ha_area = ha_area
         self._wifi_obj = wifi_obj
@@ -91,17 +95,17 @@ class BM2Network:
 
         # Default the logging level.
         if log_level is None:
-            log_level = adafruit_logging.WARNING
+            log_level = brickmaster.log.WARNING
 
         # Set up logger. Adafruit Logging doesn't support hierarchical logging.
-        self._logger = adafruit_logging.getLogger('Brickmaster')
+        self._logger = brickmaster.log.getLogger('Brickmaster')
         self._logger.setLevel(log_level)
-        self._logger.info(f"Network: System Name is '{self._long_name}'")
-        self._logger.info("Network: Home Assistant discovery (ha discover) is {}".format(self._ha_discover))
+        self._logger.info("Network: System Name is '{}'", self._long_name)
+        self._logger.info("Network: Home Assistant discovery (ha discover) is {}", self._ha_discover)
 
         # Set up the network status LEDs, if defined.
         # Net On
-        self._logger.debug("Network: Connection status LED object - {}".format(net_indicator))
+        self._logger.debug("Network: Connection status LED object - {}", net_indicator)
         if net_indicator is None:
             self._logger.info("Network: Connection status LED not defined.")
             self._net_indicator = brickmaster.controls.CtrlNull("netstatus_null","Net Indicator Null", self)
@@ -118,10 +122,32 @@ class BM2Network:
         self._reconnect_timestamp = time.monotonic()
         self._total_failures = 0
         self._retry_time = 0
+        # How often the network wants to be polled when nothing else is happening, in nanoseconds.
+        self._poll_interval = 1000000000
+        self._next_poll = 0
+        # Platform messages (ie: memory) aren't change-driven, so they're sent at the poll interval.
+        self._next_platform = 0
+        # Performance counters are sent at their own interval, if enabled.
+        self._next_perf = 0
+
+        # Objects which have changed since the last poll and need their status published.
+        self._publish_queue = []
+        # Objects in the queue which need their status sent even if it hasn't changed, ie: after discovery.
+        self._force_publish = []
+
+        # Discovery messages are built once and kept, along with what they were built from. They're only rebuilt if
+        # the IP or registered objects change.
+        self._discovery_messages = None
+        self._discovery_key = None
+        # Bumped whenever an object is registered, so the discovery messages get rebuilt.
+        self._register_version = 0
+        # Hashes of the discovery payloads that have been published, by topic. Kept across reconnects, so only new or
+        # changed entities get sent again.
+        self._discovery_sent = {}
 
         # List for commands received and to be passed upward.
         self._upward_commands = []
-        # History of payloads, to determine if we need to repeat.
+        # Last payload published on each topic, encoded, to determine if we need to repeat.
         self._topic_history = {}
 
         # # Generate device info.
@@ -129,12 +155,12 @@ class BM2Network:
         #     self._system_id, self._long_name, self._ha_area, brickmaster.__version__
         # )
 
-        self._logger.info("Defined Client ID: {}".format(self._system_id))
+        self._logger.info("Defined Client ID: {}", self._system_id)
 
         self._setup_mqtt() # Create the MQTT Object, connect basic callbacks
         # Set up the last will prior to connecting.
         self._logger.info("Creating last will.")
-        self._mc_will_set(topic="brickmaster/" + self._short_name + "/connectivity",
+        self._mc_will_set(topic=self._topics.connectivity,
             payload='offline') # Defaults are QOS 0 and Retain True, don't need to respecify.
 
         self._logger.info('Network: Initialization complete.')
@@ -156,15 +182,13 @@ class BM2Network:
             self._total_failures += 1
             if self._retry_time < 120:
                 self._retry_time += 5
-            self._logger.warning("Network: Could not connect to MQTT broker. Received exception '{}'".format(e.__cause__))
-            self._logger.warning("Network: {} failures. Will retry in {}s.".
-                                 format(self._total_failures, self._retry_time))
-            self._logger.debug("Network: Exception is type '{}', args is '{}'".format(type(e.__cause__), e.__cause__))
+            self._logger.warning("Network: Could not connect to MQTT broker. Received exception '{}'", e.__cause__)
+            self._logger.warning("Network: {} failures. Will retry in {}s.", self._total_failures, self._retry_time)
+            self._logger.debug("Network: Exception is type '{}', args is '{}'", type(e.__cause__), e.__cause__)
             return False
         except brickmaster.exceptions.BMFatalError as e:
-            self._logger.critical("Network: Fatal exception while attempting to connect to MQTT Broker ''".
-                                  format(e.__cause__))
-            self._logger.critical("Network: Made {} attempts before fatal error.".format(self._total_failures))
+            self._logger.critical("Network: Fatal exception while attempting to connect to MQTT Broker ''", e.__cause__)
+            self._logger.critical("Network: Made {} attempts before fatal error.", self._total_failures)
             raise
         else:
             # Reset the trackers
@@ -239,34 +263,35 @@ class BM2Network:
             'mqtt_data': self.status[0],
             'commands': {}
         }
-        self._logger.debug("Network: At poll, MQTT has has status - '{}'".format(self._status))
+        self._logger.debug("Network: At poll, MQTT has has status - '{}'", self._status)
+        # Schedule the next poll.
+        self._next_poll = time.monotonic_ns() + self._poll_interval
 
         # If interface is up but broker is not connected, retry every 30s.
         if self.status[0] == const.NET_STATUS_CONNECTED:
-            # Send all the messages outbound.
-            # For the first 15s after HA discovery, send everything. This makes sure data arrives after HA has
-            # established entities. Otherwise, you wind up with entities with unknown status.
-            if self._ha_override:
-                if time.monotonic() - self._ha_start <= 15:
-                    self._logger.debug(
-                        "Network: HA discovery {}s ago, sending all".format(time.monotonic() - self._ha_start))
-                    force_repeat = True
-                else:
-                    self._logger.info("Network: Have sent all messages for 15s after HA discovery. Disabling.")
-                    self._ha_override = False
-                    force_repeat = False
-            else:
-                force_repeat = False
             # Collect messages.
             ## The platform-independent messages. These should always work.
             self._logger.debug("Network: Collecting outbound MQTT messages.")
-            outbound_messages = brickmaster.network.mqtt.messages(self._core, self._object_register, self._short_name,
-                                                                   self._logger, force_repeat=force_repeat)
+            # Only generate messages for objects which have reported a change, or whose entities were just discovered.
+            changed_objects = self._publish_queue
+            forced_objects = self._force_publish
+            self._publish_queue = []
+            self._force_publish = []
+            outbound_messages = []
+            for changed_object in changed_objects:
+                outbound_messages.extend(brickmaster.network.mqtt.object_messages(
+                    self._core, changed_object, self._topics, force_repeat=changed_object in forced_objects))
             ## Extend with platform dependent messages.
-            outbound_messages.extend(self._mc_platform_messages())
-            self._logger.debug("Network: Publishing MQTT messages in queue ({} messages)".format(len(outbound_messages)))
+            now = time.monotonic_ns()
+            if now >= self._next_platform:
+                outbound_messages.extend(self._mc_platform_messages())
+                self._next_platform = now + self._poll_interval
+            if self._perf.enabled and now >= self._next_perf:
+                outbound_messages.extend(mqtt.perf_messages(self._perf, self._topics))
+                self._next_perf = now + self._perf.interval * 1000000000
+            self._logger.debug("Network: Publishing MQTT messages in queue ({} messages)", len(outbound_messages))
             for message in outbound_messages:
-                self._logger.debug("Network: Publishing MQTT message - {}".format(message))
+                self._logger.debug("Network: Publishing MQTT message - {}", message)
                 self._pub_message(**message)
             # Poll the MQTT broker.
             self._logger.debug("Network: Polling MQTT")
@@ -294,8 +319,8 @@ class BM2Network:
                 self.connect()
             elif self._total_failures > 0 and time.monotonic() - self._reconnect_timestamp > self._retry_time:
                 # If retry time has expired, try to connect.
-                self._logger.info("Network: Retry time of {}s has expired. Retrying MQTT connection...".
-                                  format(self._retry_time))
+                self._logger.info("Network: Retry time of {}s has expired. Retrying MQTT connection...",
+                                  self._retry_time)
                 self.connect()
 
             # self._logger.debug("Network: Not connected. Will attempt connection if retry time has expired.")
@@ -326,9 +351,19 @@ class BM2Network:
         elif self.status[0] == const.NET_STATUS_DISCONNECT_PLANNED:
             self._logger.debug("Network: Disconnected by request. Will not attempt connection.")
         else:
-            self._logger.debug(f"Network: Unknown network status {self.status}")
+            self._logger.debug("Network: Unknown network status {}", self.status)
         return return_data
 
+    @property
+    def next_due(self):
+        """
+        When the network next needs to be polled, in time.monotonic_ns() nanoseconds. Covers outbound status and
+        keepalive on the MQTT connection, along with reconnect attempts.
+
+        :return: int
+        """
+        return self._next_poll
+
     def register_object(self, action_object):
         """
         Register a control or script for management.
@@ -342,22 +377,49 @@ class BM2Network:
         try:
             obj_topics = action_object.topics
         except AttributeError:
-            self._logger.error("Network: Cannot add object (type: {}), does not have a 'topics' method.".
-                               format(type(action_object)))
+            self._logger.error("Network: Cannot add object (type: {}), does not have a 'topics' method.",
+                               type(action_object))
         else:
             # Save the object.
             if issubclass(type(action_object), brickmaster.controls.BaseControl):
-                self._logger.debug("Registering control '{}' to topics '{}'".format(action_object.id, obj_topics))
+                self._logger.debug("Registering control '{}' to topics '{}'", action_object.id, obj_topics)
                 self._object_register['controls'][action_object.id] = action_object
+                if isinstance(action_object, brickmaster.controls.CtrlFlasher):
+                    self._topics.register('controls', action_object.id,
+                                          ['set', 'status', 'seq_pos', 'loiter_time', 'switch_time'])
+                else:
+                    self._topics.register('controls', action_object.id, ['set', 'status'])
             elif issubclass(type(action_object), brickmaster.scripts.BM2Script):
-                self._logger.debug("Registering script '{}' to topics '{}'".format(action_object.id, obj_topics))
+                self._logger.debug("Registering script '{}' to topics '{}'", action_object.id, obj_topics)
                 self._object_register['scripts'][action_object.id] = action_object
             elif issubclass(type(action_object), brickmaster.sensors.BaseSensor):
-                self._logger.debug("Registering sensor '{}' to topics '{}'".format(action_object.id, obj_topics))
+                self._logger.debug("Registering sensor '{}' to topics '{}'", action_object.id, obj_topics)
                 self._object_register['sensors'][action_object.id] = action_object
+                self._topics.register('sensors', action_object.id, ['status', 'history', 'history/get'])
             else:
-                self._logger.error("Cannot determine class of object '{}' (type: {}). Cannot register.".
-                                   format(action_object.id, type(action_object)))
+                self._logger.error("Cannot determine class of object '{}' (type: {}). Cannot register.",
+                                   action_object.id, type(action_object))
+                return
+            # Discovery will need to include the new object.
+            self._register_version += 1
+            # Have the object tell us when it changes, and send its initial state.
+            action_object.set_notify(self._queue_publish)
+            self._queue_publish(action_object)
+
+    def _queue_publish(self, action_object, force=False):
+        """
+        Queue an object to have its status published on the next poll. Called by objects when they change.
+
+        :param action_object: Object which has changed.
+        :type action_object: BM2Script, BaseControl, BaseSensor
+        :param force: Send the status even if it's the same as what was last sent.
+        :type force: bool
+        :return: None
+        """
+        if action_object not in self._publish_queue:
+            self._publish_queue.append(action_object)
+        if force and action_object not in self._force_publish:
+            self._force_publish.append(action_object)
 
     @property
     def status(self):
@@ -376,7 +438,7 @@ class BM2Network:
             self._net_indicator.set("on")
         else:
             self._net_indicator.set("off")
-        self._logger.debug("Network: MQTT status now '{}' at timestamp '{}'".format(self._status[0],self._status[1]))
+        self._logger.debug("Network: MQTT status now '{}' at timestamp '{}'", self._status[0], self._status[1])
 
     # Private methods
     def _connect_wifi(self):
@@ -399,7 +461,8 @@ class BM2Network:
 
     def _run_ha_discovery(self):
         """
-        Do Home Assistant discovery
+        Do Home Assistant discovery. Only entities which are new or have changed since they were last sent get
+        published, and those have their state sent again so Home Assistant has a value for them.
 
         :return: None
         """
@@ -410,31 +473,65 @@ class BM2Network:
         if self._ha_discover:
             self._logger.info("Network: Running Home Assistant discovery...")
 
-            # Create and stash device info for convenience.
-            # Don't send IP/ConfigURL if this is CPython.
-            # if sys.implementation.name == 'cpython':
-            #     ip = None
-            # else:
-            #     # Not CPython is presumably CircuitPython, which means (presumably) Web Workflow is in use.
-            #     ip = self.ip
-
-            device_info = mqtt.ha_device_info(self._system_id, self._long_name, brickmaster.__version__, ha_area=self._ha_area, ip=self.ip)
-            discovery_messages = mqtt.ha_discovery(
-                self._short_name, self._system_id, device_info, 'brickmaster/', self._ha_base,
-                self._ha_meminfo, self._object_register)
-
-            self._logger.debug("Network: Will send discovery messages: {}".format(discovery_messages))
-            for discovery_message in discovery_messages:
-                self._pub_message(**discovery_message, force_repeat=True, retain=True)
-            # Reset the topic history so any newly discovered entities get sent to.
-            self._topic_history = {}
-            # Set the override stamp. This makes sure force repeat is set to send out data after discovery.
-            self._logger.debug("Network: Setting message override.")
-            self._ha_override = True
-            self._ha_start = time.monotonic()
+            # Only build the messages if something they depend on has changed. Otherwise, reuse the ones we have.
+            ip = self.ip
+            if self._discovery_messages is None or self._discovery_key != (ip, self._register_version):
+                self._logger.debug("Network: Building discovery messages.")
+                # Create and stash device info for convenience.
+                device_info = mqtt.ha_device_info(self._system_id, self._long_name, brickmaster.__version__,
+                                                  ha_area=self._ha_area, ip=ip)
+                self._discovery_messages = mqtt.ha_discovery(
+                    self._short_name, self._system_id, device_info, self._topics, self._ha_base,
+                    self._ha_meminfo, self._object_register, self._perf)
+                # Encode once, so neither hashing nor publishing has to do it again.
+                for discovery_message in self._discovery_messages:
+                    discovery_message['message'] = mqtt.encode_payload(discovery_message['message'])
+                    discovery_message['hash'] = hash(discovery_message['message'])
+                self._discovery_key = (ip, self._register_version)
+
+            sent = 0
+            for discovery_message in self._discovery_messages:
+                topic = discovery_message['topic']
+                if self._discovery_sent.get(topic) == discovery_message['hash']:
+                    continue
+                self._logger.debug("Network: Sending discovery message - {}", discovery_message['message'])
+                if self._pub_message(topic, discovery_message['message'], force_repeat=True, retain=True):
+                    self._discovery_sent[topic] = discovery_message['hash']
+                    sent += 1
+                    # Make sure the new entity gets a value.
+                    source = discovery_message.get('source')
+                    if source is not None:
+                        self._queue_publish(source, force=True)
+                    else:
+                        # System entities. Connectivity is sent on connect and performance reports always change, so
+                        # only memory info needs to be sent again.
+                        self._topic_history.pop(self._topics.meminfo, None)
+                        self._next_platform = 0
+            self._logger.info("Network: Sent {} of {} discovery messages.", sent, len(self._discovery_messages))
         else:
             self._logger.warning("Network: Home Assistant discovery disabled. Will not run.")
 
+    def _on_ha_status(self, client, topic, message):
+        """
+        Callback for Home Assistant's status topic. When Home Assistant comes online it may have lost entities that
+        weren't retained, so send discovery again in full.
+
+        :param client: Client instance for the callback.
+        :param topic: Topic the message was received on.
+        :param message: Message.
+        :return: None
+        """
+        if isinstance(message, str):
+            # MiniMQTT (Circuitpython) outputs a straight string.
+            message_text = message
+        else:
+            # Paho MQTT (linux) delivers a message object from which we need to extract the payload.
+            message_text = str(message.payload, 'utf-8')
+        self._logger.info("Network: Home Assistant status is now '{}'", message_text)
+        if message_text == 'online':
+            self._discovery_sent = {}
+            self._run_ha_discovery()
+
     def _on_connect(self, userdata, flags, rc, properties=None):
         """
         MQTT Client connection callback.
@@ -445,43 +542,57 @@ class BM2Network:
         :param properties:
         :return:
         """
-        self._logger.info(f"Network: On Connect callback invoked from result code '{rc}'")
-        self._logger.debug("Network:\n\tuserdata - '{}'\n\tflags - '{}'\n\tproperties - '{}'".
-                           format(userdata, flags,properties))
+        self._logger.info("Network: On Connect callback invoked from result code '{}'", rc)
+        self._logger.debug("Network:\n\tuserdata - '{}'\n\tflags - '{}'\n\tproperties - '{}'",
+                           userdata, flags, properties)
         self._logger.debug("Network: Setting status to 'connected'")
         self.status = const.NET_STATUS_CONNECTED
+        if self._perf.online():
+            self._logger.info("Network: Online {}ms after startup began.", self._perf.online_time)
 
-        #TODO: Add monitoring of the homeassistant/status online/offline status to do logic. What logic? Not sure.
+        # Watch for Home Assistant restarting, so discovery can be resent.
+        if self._ha_discover:
+            self._logger.debug("Network: Subscribing to Home Assistant status.")
+            self._mc_subscribe(self._ha_status_topic)
+            self._mc_callback_add(self._ha_status_topic, self._on_ha_status)
 
         # Subscribe to the script set topic.
         self._logger.debug("Network: Subscribing to script topics.")
-        self._mc_subscribe('brickmaster/' + self._short_name + '/script/set')
-        self._mc_callback_add('brickmaster/' + self._short_name + '/script/set',
-                              self._core.callback_scr)
+        self._mc_subscribe(self._topics.script_set)
+        self._mc_callback_add(self._topics.script_set, self._core.callback_scr)
         # Subscribe to the Control topics.
         for control_id in self._object_register['controls']:
             # Subscribe to the topic.
-            self._logger.debug(f"Network: Subscribing to control topic for '{self._object_register['controls'][control_id].id}'")
-            self._mc_subscribe('brickmaster/' + self._short_name + '/controls/' +
-                               self._object_register['controls'][control_id].id + '/set')
-            # Connect the callback.f
-            self._mc_callback_add(
-                'brickmaster/' + self._short_name + '/controls/' +
-                self._object_register['controls'][control_id].id + '/set',
-                self._object_register['controls'][control_id].callback)
+            self._logger.debug("Network: Subscribing to control topic for '{}'",
+                               self._object_register['controls'][control_id].id)
+            set_topic = self._topics.get('controls', control_id)['set']
+            self._mc_subscribe(set_topic)
+            # Connect the callback.
+            self._mc_callback_add(set_topic, self._object_register['controls'][control_id].callback)
+        # Subscribe to the sensor history request topics.
+        for sensor_id in self._object_register['sensors']:
+            self._logger.debug("Network: Subscribing to history topic for sensor '{}'", sensor_id)
+            history_topic = self._topics.get('sensors', sensor_id)['history/get']
+            self._mc_subscribe(history_topic)
+            self._mc_callback_add(history_topic, self._object_register['sensors'][sensor_id].callback)
 
         # Send the online message.
         self._send_online()
 
+        # Queue up everything, so current state gets published after the (re)connect.
+        for object_type in ('controls', 'sensors', 'scripts'):
+            for object_id in self._object_register[object_type]:
+                self._queue_publish(self._object_register[object_type][object_id])
+
         # Do Home Assistant Discovery.
         self._logger.debug("Network: On Connect invoking HA Discovery.")
         self._run_ha_discovery()
 
         # Send the one-time messages, which reports system information.
-        initial_messages = brickmaster.network.mqtt.initial_messages(self._short_name)
-        self._logger.debug(f"Network: Have initial messages '{initial_messages}'")
+        initial_messages = brickmaster.network.mqtt.initial_messages(self._topics)
+        self._logger.debug("Network: Have initial messages '{}'", initial_messages)
         for message in initial_messages:
-            self._logger.info(f"Network: Sending initial message - {message}")
+            self._logger.info("Network: Sending initial message - {}", message)
             self._pub_message(**message)
 
 
@@ -495,11 +606,11 @@ class BM2Network:
         :return:
         """
         self._logger.info("Network: Received on_disconnect")
-        self._logger.debug("Network:\n\tclient - '{}'\n\tuserdata - '{}'".format(client, userdata))
+        self._logger.debug("Network:\n\tclient - '{}'\n\tuserdata - '{}'", client, userdata)
         if rc != 0:
             #TODO: Add some logic here or in the platform class to actually handle the result codes and back off when
             # a specific error type is unrecoverable.
-            self._logger.warning("Network: Unexpected disconnect with code: {}".format(rc))
+            self._logger.warning("Network: Unexpected disconnect with code: {}", rc)
         self._reconnect_timer = time.monotonic()
         self._logger.debug("Network: Setting internal MQTT tracker False in '_on_disconnect' callback.")
         self.status = const.NET_STATUS_DISCONNECTED
@@ -515,94 +626,60 @@ class BM2Network:
         :return: None
         """
         self._logger.info("Network: Received on_connect")
-        self._logger.debug("Network:\n\tclient - '{}'\n\tuserdata - '{}'".format(client, userdata))
+        self._logger.debug("Network:\n\tclient - '{}'\n\tuserdata - '{}'", client, userdata)
 
         self._logger.warning(
-            "Network: Received message on topic {} with payload {}. No other handler, no action.".format(
-                message.topic, message.payload
-            ))
+            "Network: Received message on topic {} with payload {}. No other handler, no action.",
+            message.topic, message.payload)
 
     def _pub_message(self, topic, message, force_repeat=False, retain=False):
         """
         Publish a message to the MQTT broker. By default, will not publish a message if that message has previously been
         sent to that topic. This makes it safe to dump the same data in repeatedly without spamming the broker.
 
+        The message is encoded once, and the encoded payload is both compared against the last one sent and handed to
+        the client, so nothing gets serialized twice.
+
         :param topic: Topic to publish to.
         :type topic: str
-        :param message: Message to publish
-        :type message: str
+        :param message: Message to publish. Anything mqtt.encode_payload can encode.
+        :type message: str, bytes, int, float, dict, list
         :param force_repeat: Should the message be sent even if it was also the previous message sent.
         :type force_repeat: bool
         :param retain: Should the message be retained by the broker?
         :type retain: bool
-        :return:
-        """
-        self._logger.debug("Network: Processing message publication on topic '{}'".format(topic))
-        # Set the send flag initially. If we've never seen the topic before or if we're set to repeat, go ahead and send.
-        # This skips some extra logic.
-        if topic not in self._topic_history:
-            self._logger.debug("Network: Topic not in history, sending...")
-            send = True
-        elif force_repeat:
-            self._logger.debug("Network: Repeat explicitly enabled, sending...")
-            send = True
-        else:
-            send = False
-
-        # If we're not already sending, then we've seen the topic before and should check for changes.
-        if send is False:
-            previous_message = self._topic_history[topic]
-            # Both strings, compare and send if different
-            if (isinstance(message, str) and isinstance(previous_message, str)) or \
-                    (isinstance(message, (int, float)) and isinstance(previous_message, (int, float))):
-                if message != previous_message:
-                    self._logger.debug("Network: Message '{}' does not match previous message '{}'. Publishing.".
-                                       format(message, previous_message))
-                    send = True
-                else:
-                    self._logger.debug("Network: Message has not changed, will not publish")
-                    return
-            # For dictionaries, compare individual elements. This doesn't handle nested dicts, but those aren't used.
-            elif isinstance(message, dict) and isinstance(previous_message, dict):
-                for item in message:
-                    if item not in previous_message:
-                        self._logger.debug("Network: Message dict contains new key, publishing.")
-                        send = True
-                        break
-                    if message[item] != previous_message[item]:
-                        self._logger.debug("Network: Message dict key '{}' has changed value, publishing.".format(item))
-                        send = True
-                        break
-            # If type has changed, which is odd,  (and it shouldn't, usually), send it.
-            elif type(message) != type(previous_message):
-                self._logger.debug("Network: Message type has changed from '{}' to '{}'. Unusual, but publishing anyway.".
-                                   format(type(previous_message), type(message)))
-                send = True
-
-        # If we're sending do it.
-        if send:
-            self._logger.debug("Network: Publishing message...")
-            # New message becomes the previous message.
-            self._topic_history[topic] = message
-            # Convert the message to JSON if it's a dict, otherwise just send it.
-            if isinstance(message, dict):
-                outbound_message = json_dumps(message)
-            elif isinstance(message, list):
-                outbound_message = str(message)
-            else:
-                outbound_message = message
-            # Make the client-specific call!
-            if self.status[0] == const.NET_STATUS_CONNECTED:
-                try:
-                    self._mc_publish(topic, outbound_message, retain=retain)
-                except BMRecoverableError:
-                    self._logger.warning("Network: Received recoverable error while publishing. Marking MQTT disconnected for retry.")
-                    self.status = const.NET_STATUS_DISCONNECTED
-                except BaseException:
-                    self._logger.error("Network: Unhandled exception received while publishing!")
-                    raise
+        :return: True if the message was published, False if it was skipped or couldn't be sent.
+        :rtype: bool
+        """
+        self._logger.debug("Network: Processing message publication on topic '{}'", topic)
+        payload = mqtt.encode_payload(message)
+        if not force_repeat and self._topic_history.get(topic) == payload:
+            self._logger.debug("Network: Message has not changed, will not publish")
+            self._perf.count('deduped')
+            return False
+
+        self._logger.debug("Network: Publishing message...")
+        # Make the client-specific call!
+        if self.status[0] == const.NET_STATUS_CONNECTED:
+            try:
+                self._mc_publish(topic, payload, retain=retain)
+            except BMRecoverableError:
+                self._logger.warning("Network: Received recoverable error while publishing. Marking MQTT disconnected for retry.")
+                self._perf.count('dropped')
+                self.status = const.NET_STATUS_DISCONNECTED
+            except BaseException:
+                self._logger.error("Network: Unhandled exception received while publishing!")
+                raise
             else:
-                self._logger.debug("Network: Won't publish because MQTT isn't connected.")
+                self._perf.count('sent')
+                # New payload becomes the previous payload. Only once it's actually gone out, so anything dropped
+                # gets sent when the connection is back.
+                self._topic_history[topic] = payload
+                return True
+        else:
+            self._logger.debug("Network: Won't publish because MQTT isn't connected.")
+            self._perf.count('dropped')
+        return False
 
     # Method studs to be overridden.
     def _mc_callback_add(self, topic, callback):
@@ -637,7 +714,8 @@ class BM2Network:
         Publish via the client object.
 
         :param topic: Topic to publish on.
-        :param message: Message to publish
+        :param message: Message to publish, already encoded.
+        :type message: bytes
         :param qos: QOS to use.
         :type qos: int
         :param retain: Should the message be retained by the broker?
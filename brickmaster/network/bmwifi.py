@@ -1,7 +1,7 @@
 """
 Brickmaster Wifi Handling
 """
-import adafruit_logging
+import brickmaster.log
 import adafruit_connection_manager
 import supervisor
 import time
@@ -13,7 +13,7 @@ class BMWiFi:
     Brickmaster WiFi Handling for CircuitPython Boards
     """
     def __init__(self, ssid, password, wifihw=None, retry_limit = 5, retry_time = 30, hostname = None, 
-                 log_level=adafruit_logging.DEBUG):
+                 log_level=brickmaster.log.DEBUG):
         """
         Set up the Brickmaster WiFi handler. Works for ESP32s, direct or SPI connected.
 
@@ -32,7 +32,7 @@ class BMWiFi:
         :param log_level:
         """
         # Create the logger and set the level to debug. This will get reset later.
-        self._logger = adafruit_logging.getLogger("Brickmaster")
+        self._logger = brickmaster.log.getLogger("Brickmaster")
         self._logger.setLevel(log_level)
 
         self._hostname = hostname
@@ -46,7 +46,7 @@ class BMWiFi:
         if wifihw is None:
             self._logger.warning("WIFI: Hardware not defined. Trying to determine automatically.")
             self._wifihw = brickmaster.util.determine_wifi_hw()
-            self._logger.warning("WIFI: Auto-determined hardware to be '{}'".format(self._wifihw))
+            self._logger.warning("WIFI: Auto-determined hardware to be '{}'", self._wifihw)
         else:
             self._wifihw = wifihw
 
@@ -66,38 +66,38 @@ class BMWiFi:
             if self._wifihw == 'esp32spi':
                 while tries < self._retry_limit:
                     try:
-                        self._logger.debug("WIFI: Connecting to '{}' with password '{}'".
-                                           format(self._ssid, self._password))
+                        self._logger.debug("WIFI: Connecting to '{}' with password '{}'", self._ssid, self._password)
                         self._wifi.connect_AP(self._ssid, self._password)
                     except ConnectionError as e:
                         if e.args[0] == "No such ssid":
                             # The ESP32 (SPI, at least), has a glitch where sometimes it can't find the network on the
                             # first try. Don't fail immediately, just try again.
-                            self._logger.warning(f"WIFI: SSID '{self._ssid}' not found. Will retry in {self._retry_time}s")
+                            self._logger.warning("WIFI: SSID '{}' not found. Will retry in {}s",
+                                                 self._ssid, self._retry_time)
                             tries += 1
                             time.sleep(self._retry_time)
                             continue
                         else:
                             raise
                     except OSError as e:
-                        self._logger.warning(f"WIFI: Could not connect to WIFI SSID '{self._ssid}'. "
-                                             "Retrying in {self._retry_time}s.")
-                        self._logger.warning(str(e), type(e))
+                        self._logger.warning("WIFI: Could not connect to WIFI SSID '{}'. Retrying in {}s.",
+                                             self._ssid, self._retry_time)
+                        self._logger.warning("{} ({})", e, type(e))
                         tries += 1
                         time.sleep(self._retry_time)
                         continue
                     else:
-                        self._logger.info("WiFi: Setting IP to: {}".format(self._wifi.ip_address))
+                        self._logger.info("WiFi: Setting IP to: {}", self._wifi.ip_address)
                         self._ip = self._wifi.pretty_ip(self._wifi.ip_address)
-                        self._logger.info("WiFi: IP is now {}".format(self._ip))
-                        self._logger.info(f"WiFi: Connected to '{self._ssid}', received IP '{self._ip}'")
+                        self._logger.info("WiFi: IP is now {}", self._ip)
+                        self._logger.info("WiFi: Connected to '{}', received IP '{}'", self._ssid, self._ip)
                         return brickmaster.const.NET_STATUS_CONNECTED
                 return brickmaster.const.NET_STATUS_DISCONNECTED
             else:
                 self._wifi.connect(ssid=self._ssid, password=self._password)
-                self._logger.info("WiFi: Setting ip to '{}'".format(self._wifi.ipv4_address))
+                self._logger.info("WiFi: Setting ip to '{}'", self._wifi.ipv4_address)
                 self._ip = self._wifi.ipv4_address
-                self._logger.info("WiFi: IP is set to '{}'".format(self._ip))
+                self._logger.info("WiFi: IP is set to '{}'", self._ip)
                 return brickmaster.const.NET_STATUS_CONNECTED
 
     def disconnect(self):
@@ -204,9 +204,10 @@ class BMWiFi:
                 try:
                     self._wifi.hostname = self._hostname
                 except ValueError:
-                    self._logger.error("WiFi: Hostname '{}' is not valid. Using default of '{}'".format(self._hostname, self._wifi.hostname))
+                    self._logger.error("WiFi: Hostname '{}' is not valid. Using default of '{}'",
+                                       self._hostname, self._wifi.hostname)
                 else:
-                    self._logger.info(f"Wifi: Set hostname to '{self._wifi.hostname}'")
+                    self._logger.info("Wifi: Set hostname to '{}'", self._wifi.hostname)
         elif self._wifihw == 'esp32spi':
             # Conditional imports for ESP32SPI boards.
             ## Board
@@ -242,8 +243,8 @@ class BMWiFi:
                     self._logger.warning("WIFI: ESP32 co-processor busy. Resetting!")
                     supervisor.reload()
                 time.sleep(5)
-                self._logger.info("Wifi: ESP32 Firmware version is '{}.{}.{}'".format(
-                    self._wifi.firmware_version[0], self._wifi.firmware_version[1], self._wifi.firmware_version[2]))
+                self._logger.info("Wifi: ESP32 Firmware version is '{}.{}.{}'", self._wifi.firmware_version[0],
+                                  self._wifi.firmware_version[1], self._wifi.firmware_version[2])
                 self._mac_string = "{:X}{:X}{:X}{:X}{:X}{:X}".format(
                     self._wifi.MAC_address[5], self._wifi.MAC_address[4], self._wifi.MAC_address[3],
                     self._wifi.MAC_address[2], self._wifi.MAC_address[1], self._wifi.MAC_address[0])
@@ -254,5 +255,5 @@ class BMWiFi:
         else:
             raise ValueError("WIFI: Hardware type '{}' not supported.".format(self._wifihw))
 
-        self._logger.info("WIFI: WiFi MAC address: {}".format(self._mac_string))
+        self._logger.info("WIFI: WiFi MAC address: {}", self._mac_string)
         self._logger.info("WIFI: Hardware initialization complete.")
\ No newline at end of file
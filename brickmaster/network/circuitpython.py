@@ -3,6 +3,7 @@ Brickmaster CircuitPython Networking
 """
 
 import adafruit_logging
+import brickmaster.log
 
 import brickmaster.exceptions
 from brickmaster.network.base import BM2Network
@@ -22,7 +23,7 @@ class BM2NetworkCircuitPython(BM2Network):
             self._wifi_obj.connect()
         except Exception as e:
             self._logger.critical("Network: Encountered unhandled exception when connecting to WiFi!")
-            self._logger.critical(f"Network: {e}")
+            self._logger.critical("Network: {}", e)
             raise
         else:
             self._logger.debug("Network: Calling base class connect method for MQTT.")
@@ -87,8 +88,7 @@ class BM2NetworkCircuitPython(BM2Network):
         try:
             self._mini_client.connect(host=host, port=port)
         except af_mqtt.MMQTTException as e:
-            self._logger.warning("MiniMQTT: Generated exception '{}' from cause '{}".
-                                 format(e.args[0],e.__cause__))
+            self._logger.warning("MiniMQTT: Generated exception '{}' from cause '{}", e.args[0], e.__cause__)
             raise brickmaster.exceptions.BMRecoverableError from e
         else:
             return True
@@ -108,7 +108,7 @@ class BM2NetworkCircuitPython(BM2Network):
         # On Linux we use PSUtil for this. Here we use the CircuitPython garbage collector (gc), which doesn't have
         # all the same convenience methods psutil does, so we have to do some math.
         return_dict = {
-            'topic': 'brickmaster/' + self._short_name + '/meminfo',
+            'topic': self._topics.meminfo,
             'message': { 'mem_avail': 'Unknown', 'mem_total': 'Unknown', 'pct_used': 'Unknown',
                     'pct_avail': 'Unknown'  }
         }
@@ -134,7 +134,8 @@ class BM2NetworkCircuitPython(BM2Network):
         Publish via the client object.
 
         :param topic: Topic to publish on.
-        :param message: Message to publish
+        :param message: Message to publish, already encoded.
+        :type message: bytes
         :param qos: QOS to use.
         :type qos: int
         :param retain: Should the message be retained by the broker?
@@ -143,14 +144,14 @@ class BM2NetworkCircuitPython(BM2Network):
         """
         try:
             self._logger.debug("Network (MiniMQTT): Publishing to '{}'\n\t"
-                               "Payload - '{}'.".format(topic, message))
+                               "Payload - '{}'.", topic, message)
             self._mini_client.publish(topic, message, retain, qos)
             self._logger.debug("Network (MiniMQTT): Publish complete.")
         except BrokenPipeError as e:
             self._logger.error("Network (MiniMQTT): Disconnection while publishing!")
             raise brickmaster.exceptions.BMRecoverableError from e
         except ConnectionError as e:
-            self._logger.error("Network (MiniMQTT): Connection failed, raised error '{}'".format(e.args[0]))
+            self._logger.error("Network (MiniMQTT): Connection failed, raised error '{}'", e.args[0])
             raise brickmaster.exceptions.BMRecoverableError from e
         except OSError as e:
             if e.args[0] == 104:
@@ -196,7 +197,7 @@ class BM2NetworkCircuitPython(BM2Network):
         :return:
         """
         self._logger.debug("Network: Sending online status.")
-        self._mini_client.publish(topic="brickmaster/" + self._short_name + "/connectivity",
+        self._mini_client.publish(topic=self._topics.connectivity,
                                   msg="online", retain=True)
 
     def _send_offline(self):
@@ -205,7 +206,7 @@ class BM2NetworkCircuitPython(BM2Network):
         :return:
         """
         self._logger.debug("Network: Sending offline status.")
-        self._mini_client.publish(topic="brickmaster/" + self._short_name + "/connectivity", msg="offline",
+        self._mini_client.publish(topic=self._topics.connectivity, msg="offline",
                                   retain=True)
 
     def _setup_mqtt(self):
@@ -215,8 +216,9 @@ class BM2NetworkCircuitPython(BM2Network):
         :return:
         """
         self._logger.debug("Network: Circuitpython MQTT setup start.")
-        self._logger.debug("Network: Wifi Object can present socket pool: {}".format(type(self._wifi_obj.socket_pool)))
-        self._logger.debug(f"Network: Setting socket timeout to '{self._mqtt_timeout}'s. This will also be the loop timeout.")
+        self._logger.debug("Network: Wifi Object can present socket pool: {}", type(self._wifi_obj.socket_pool))
+        self._logger.debug("Network: Setting socket timeout to '{}'s. This will also be the loop timeout.",
+                           self._mqtt_timeout)
 
         # Create the MQTT Client.
         self._mini_client = af_mqtt.MQTT(
@@ -230,7 +232,7 @@ class BM2NetworkCircuitPython(BM2Network):
         )
 
         # If MQTT Logging is requested and the logger's effective level is debug, log the client.
-        if self._mqtt_log and self._logger.getEffectiveLevel() == adafruit_logging.DEBUG:
+        if self._mqtt_log and self._logger.getEffectiveLevel() == brickmaster.log.DEBUG:
             self._logger.debug("Network: Debug enabled, enabling logging on MQTT client as well.")
             self._mini_client.enable_logger(adafruit_logging, adafruit_logging.DEBUG, 'Brickmaster')
 
@@ -2,7 +2,7 @@
 Brickmaster Linux Networking
 """
 
-import adafruit_logging
+import brickmaster.log
 from brickmaster.network.base import BM2Network
 import brickmaster.const as const
 import brickmaster.util
@@ -85,7 +85,11 @@ class BM2NetworkLinux(BM2Network):
         :type callback: method
         :return: None
         """
-        self._paho_client.message_callback_add(topic, callback)
+        # Paho calls back from its own thread. Hand the message to the core, which runs it safely alongside the run
+        # loop and wakes the loop so any change gets acted on and published right away.
+        def core_callback(client, userdata, message):
+            self._core.command(callback, client, userdata, message)
+        self._paho_client.message_callback_add(topic, core_callback)
 
     def _mc_connect(self, host, port):
         """
@@ -147,7 +151,7 @@ class BM2NetworkLinux(BM2Network):
         # Pull the virtual memory with PSUtil.
         m = psutil.virtual_memory()
         messages_ps.append({
-            'topic': 'brickmaster/' + self._short_name + '/meminfo',
+            'topic': self._topics.meminfo,
             'message':
                 {
                     'mem_avail': m.available,
@@ -163,7 +167,8 @@ class BM2NetworkLinux(BM2Network):
         Publish via the client object.
 
         :param topic: Topic to publish on.
-        :param message: Message to publish
+        :param message: Message to publish, already encoded.
+        :type message: bytes
         :param qos: QOS to use.
         :type qos: int
         :param retain: Should the message be retained by the broker?
@@ -174,8 +179,7 @@ class BM2NetworkLinux(BM2Network):
         try:
             self._paho_client.publish(topic, message, qos, retain)
         except TypeError as te:
-            self._logger.error("Network: Could not publish message, wrong type. '{}' ({})".
-                               format(message, type(message)))
+            self._logger.error("Network: Could not publish message, wrong type. '{}' ({})", message, type(message))
             raise te
 
     def _mc_subscribe(self, topic):
@@ -215,7 +219,7 @@ class BM2NetworkLinux(BM2Network):
         :return:
         """
         self._logger.debug("Network: Sending online status.")
-        self._paho_client.publish("brickmaster/" + self._short_name + "/connectivity",
+        self._paho_client.publish(self._topics.connectivity,
                                   payload="online", retain=True)
     def _send_offline(self):
         """
@@ -223,7 +227,7 @@ class BM2NetworkLinux(BM2Network):
         :return:
         """
         self._logger.debug("Network: Sending offline status.")
-        self._paho_client.publish("brickmaster/" + self._short_name + "/connectivity",
+        self._paho_client.publish(self._topics.connectivity,
                                   payload="offline", retain=True)
 
     def _setup_mqtt(self):
@@ -243,13 +247,17 @@ class BM2NetworkLinux(BM2Network):
         )
 
         # If MQTT Logging is requested and the logger's effective level is debug, log the client.
-        if self._mqtt_log and self._logger.getEffectiveLevel() == adafruit_logging.DEBUG:
+        if self._mqtt_log and self._logger.getEffectiveLevel() == brickmaster.log.DEBUG:
             self._paho_client.enable_logger(self._logger)
 
-        # Connect callback.
-        self._paho_client.on_connect = self._on_connect
-        # Disconnect callback
-        self._paho_client.on_disconnect = self._on_disconnect
+        # Connect and disconnect callbacks. Paho calls these from its own thread, and they change state the run loop
+        # uses, so run them under the core's run lock.
+        def core_on_connect(*args):
+            self._core.locked(lambda: self._on_connect(*args))
+        def core_on_disconnect(*args):
+            self._core.locked(lambda: self._on_disconnect(*args))
+        self._paho_client.on_connect = core_on_connect
+        self._paho_client.on_disconnect = core_on_disconnect
 
     @property
     def ip(self):
@@ -0,0 +1,177 @@
+"""
+Brickmaster Linux Networking for the asyncio runtime
+"""
+
+import asyncio
+import threading
+import brickmaster.const as const
+import brickmaster.exceptions
+from brickmaster.network.linux import BM2NetworkLinux
+from paho.mqtt.client import MQTT_ERR_SUCCESS
+
+
+class BM2NetworkLinuxAsync(BM2NetworkLinux):
+    """
+    Linux networking driven by an asyncio event loop. Paho's socket callbacks register the MQTT socket with the event
+    loop, so reads, writes and keepalive happen on the loop instead of in Paho's background thread. Everything but the
+    connection itself runs on the loop's thread. Connecting blocks on DNS and the TCP handshake, so it's run in the
+    loop's executor.
+    """
+    def attach_loop(self, loop, lock=None):
+        """
+        Attach the event loop to drive the MQTT client. Must be called from the loop's thread before the first poll.
+
+        :param loop: The running event loop.
+        :type loop: asyncio.AbstractEventLoop
+        :param lock: The core's run lock, if anything runs off the loop's thread. Held while reading from and writing to
+        the broker, as that runs callbacks which change the network's state.
+        :type lock: threading.RLock
+        :return: None
+        """
+        self._aio_loop = loop
+        self._aio_thread = threading.get_ident()
+        self._aio_lock = lock
+
+    def connect(self):
+        """
+        Start connecting to the broker in the executor. Once the connection attempt is done, the standard connect is
+        finished on the loop's thread. Polls while an attempt is running do nothing.
+
+        :return: None
+        """
+        if self._aio_connect is not None:
+            return
+        self._logger.debug("Network: Starting MQTT connection in the executor.")
+        self._aio_connect = self._aio_loop.run_in_executor(None, self._aio_connect_blocking,
+                                                           self._mqtt_broker, self._mqtt_port)
+        self._aio_connect.add_done_callback(self._aio_connect_done)
+
+    def _aio_connect_blocking(self, host, port):
+        """
+        Call the MQTT Client's connect method. Runs in the executor. Unlike the threaded client, no background loop is
+        started. The socket callbacks hand the connection to the event loop.
+
+        :param host: Host to connect to. Hostname or IP.
+        :type host: str
+        :param port: Port to connect to
+        :type port: int
+        :return: None
+        """
+        try:
+            self._paho_client.connect(host=host, port=port)
+        except (ConnectionRefusedError, TimeoutError, OSError) as e:
+            raise brickmaster.exceptions.BMRecoverableError from e
+
+    def _aio_connect_done(self, future):
+        """
+        Finish a connection attempt, on the loop's thread.
+
+        :param future: The connection attempt.
+        :type future: asyncio.Future
+        :return: None
+        """
+        self._aio_locked(super().connect)
+
+    def _mc_connect(self, host, port):
+        """
+        Give the result of the connection attempt made in the executor, for the standard connect to act on.
+
+        :param host: Host to connect to. Hostname or IP.
+        :type host: str
+        :param port: Port to connect to
+        :type port: int
+        :return: None
+        """
+        future = self._aio_connect
+        self._aio_connect = None
+        # Raises the attempt's exception, if it failed.
+        future.result()
+        return True
+
+    def _mc_disconnect(self):
+        """
+        Disconnect from the client.
+        :return:
+        """
+        self._paho_client.disconnect()
+        return const.NET_STATUS_DISCONNECTED
+
+    def _setup_mqtt(self):
+        """
+        Create the MQTT object, connect standard callbacks and the socket callbacks for the event loop.
+
+        :return:
+        """
+        super()._setup_mqtt()
+        self._aio_loop = None
+        self._aio_thread = None
+        self._aio_lock = None
+        self._aio_connect = None # Connection attempt running in the executor.
+        self._aio_misc = None
+        self._aio_fd = None
+
+        self._paho_client.on_socket_open = self._on_socket_open
+        self._paho_client.on_socket_close = self._on_socket_close
+        self._paho_client.on_socket_register_write = self._on_socket_register_write
+        self._paho_client.on_socket_unregister_write = self._on_socket_unregister_write
+
+    def _aio_locked(self, method):
+        """
+        Call a method, holding the run lock if there is one.
+
+        :param method: Method to call.
+        :type method: method
+        :return: Whatever the method returns.
+        """
+        if self._aio_lock is None:
+            return method()
+        with self._aio_lock:
+            return method()
+
+    # Socket callbacks. Connecting runs in the executor, so these may be called off the loop's thread.
+    def _aio_call(self, method, *args):
+        """
+        Call a method on the event loop's thread.
+        """
+        if threading.get_ident() == self._aio_thread:
+            method(*args)
+        else:
+            self._aio_loop.call_soon_threadsafe(method, *args)
+
+    def _on_socket_open(self, client, userdata, sock):
+        self._logger.debug("Network: MQTT socket opened, adding to event loop.")
+        self._aio_call(self._aio_socket_open, sock.fileno())
+
+    def _on_socket_close(self, client, userdata, sock):
+        self._logger.debug("Network: MQTT socket closed, removing from event loop.")
+        self._aio_call(self._aio_socket_close)
+
+    def _on_socket_register_write(self, client, userdata, sock):
+        self._aio_call(self._aio_loop.add_writer, sock.fileno(), self._aio_locked, self._paho_client.loop_write)
+
+    def _on_socket_unregister_write(self, client, userdata, sock):
+        self._aio_call(self._aio_loop.remove_writer, sock.fileno())
+
+    def _aio_socket_open(self, fd):
+        self._aio_fd = fd
+        self._aio_loop.add_reader(fd, self._aio_locked, self._paho_client.loop_read)
+        self._aio_misc = self._aio_loop.create_task(self._aio_misc_loop())
+
+    def _aio_socket_close(self):
+        if self._aio_fd is not None:
+            self._aio_loop.remove_reader(self._aio_fd)
+            self._aio_loop.remove_writer(self._aio_fd)
+            self._aio_fd = None
+        if self._aio_misc is not None:
+            self._aio_misc.cancel()
+            self._aio_misc = None
+
+    async def _aio_misc_loop(self):
+        """
+        Handle Paho's housekeeping, ie: keepalive pings and retries, once a second while connected.
+        """
+        while self._aio_locked(self._paho_client.loop_misc) == MQTT_ERR_SUCCESS:
+            try:
+                await asyncio.sleep(1)
+            except asyncio.CancelledError:
+                break
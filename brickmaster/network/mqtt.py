@@ -5,105 +5,179 @@ These methods are meant to work with either the Linux or CircuitPython classes.
 classes to handle the actual publication!
 """
 
-import adafruit_logging
+import brickmaster.log
 import json
 import brickmaster.util
 import board
 import brickmaster.controls.CtrlFlasher
 import os
 
-logger = adafruit_logging.getLogger('Brickmaster')
-logger.setLevel(adafruit_logging.DEBUG)
+logger = brickmaster.log.getLogger('Brickmaster')
+logger.setLevel(brickmaster.log.DEBUG)
 
-def initial_messages(short_name, topic_prefix='brickmaster'):
+def encode_payload(message):
+    """
+    Encode a message into the payload bytes that get published. Dicts are sent as JSON, lists as their string form and
+    None as an empty payload. Bytes are taken as already encoded.
+
+    :param message: Message to encode.
+    :type message: str, bytes, int, float, dict, list
+    :return: bytes
+    """
+    if isinstance(message, bytes):
+        return message
+    elif isinstance(message, str):
+        return message.encode('utf-8')
+    elif isinstance(message, dict):
+        return json.dumps(message).encode('utf-8')
+    elif message is None:
+        return b''
+    else:
+        return str(message).encode('utf-8')
+
+
+def initial_messages(topics):
     """
     Generate initial messages to send once on start-up that don't change dynamically.
     """
 
     outbound_messages = [
-        {'topic': topic_prefix + '/' + short_name + '/system/board_id', 'message': board.board_id},
-        {'topic': topic_prefix + '/' + short_name + '/system/pins', 'message': brickmaster.util.board_pins()}
+        {'topic': topics.board_id, 'message': board.board_id},
+        {'topic': topics.pins, 'message': brickmaster.util.board_pins()}
     ]
     return outbound_messages
 
 
-def messages(core, object_register, short_name, logger, force_repeat=False, topic_prefix='brickmaster'):
+def object_messages(core, action_object, topics, force_repeat=False):
     """
-    Generate mqtt messages to send out.
+    Generate mqtt messages for a single object which has changed.
 
     :param core: Reference to the Brickmaster Core.
     :type core: Object
-    :param object_register: The control objects to generate messages for.
-    :type object_register: dict
-    :param short_name: Short name of the system. No spaces!
-    :type short_name: str
-    :param logger: The Network Module's logger.
-    :type logger: adafruit_logger
+    :param action_object: Control, sensor or script to generate messages for.
+    :type action_object: object
+    :param topics: Topic registry.
+    :type topics: brickmaster.network.topics.BM2Topics
     :param force_repeat: Should we send messages that haven't changed since previous send?
     :type force_repeat: bool
-    :param topic_prefix: Base topic to send messages to. Defaults to 'brickmaster'.
-    :type topic_prefix: str
-    :return: dict
+    :return: list
     """
+    if isinstance(action_object, brickmaster.controls.BaseControl):
+        return control_messages(action_object, topics, force_repeat=force_repeat)
+    elif isinstance(action_object, brickmaster.sensors.BaseSensor):
+        return sensor_messages(action_object, topics, force_repeat=force_repeat)
+    elif isinstance(action_object, brickmaster.scripts.BM2Script):
+        # Scripts changing state changes the active script.
+        return script_messages(core, topics, force_repeat=force_repeat)
+    return []
+
+
+def control_messages(control_object, topics, force_repeat=False):
+    """
+    Generate mqtt messages for a control.
+
+    :param control_object: Control to generate messages for.
+    :type control_object: brickmaster.controls.BaseControl
+    :param topics: Topic registry.
+    :type topics: brickmaster.network.topics.BM2Topics
+    :param force_repeat: Should we send messages that haven't changed since previous send?
+    :type force_repeat: bool
+    :return: list
+    """
+    logger.debug("Network (MQTT): Generating control message for control '{}' ({})",
+                 control_object.id, type(control_object))
+    control_topics = topics.get('controls', control_object.id)
+    # Control statuses should be retained. This allows state to be preserved over HA restarts.
+    if isinstance(control_object, brickmaster.controls.CtrlDimmer):
+        # Dimmers are Home Assistant JSON lights, so their status carries the brightness too.
+        status = control_object.state
+    else:
+        status = control_object.status
     outbound_messages = [
-        {'topic': 'brickmaster/' + short_name + '/connectivity',
-         'message': 'online'}
+        {'topic': control_topics['status'],
+         'message': status, 'force_repeat': force_repeat, 'retain': True}
     ]
-
-    # Controls
-    for item in object_register['controls']:
-        # print("Network (MQTT): Processing Control '{}' ({})".format(item, type(object_register['controls'][item])))
-        control_object = object_register['controls'][item]
-        logger.debug("Network (MQTT): Generating control message for control '{}' ({})".
-                     format(control_object.id, type(control_object)))
-        # Control statuses should be retained. This allows state to be preserved over HA restarts.
+    # Additional information for flashers
+    if isinstance(control_object, brickmaster.controls.CtrlFlasher):
+        # Sequence position.
         outbound_messages.append(
-            {'topic': 'brickmaster/' + short_name + '/controls/' + control_object.id + '/status',
-             'message': control_object.status, 'force_repeat': force_repeat, 'retain': True}
+            {'topic': control_topics['seq_pos'],
+             'message': control_object.seq_pos, 'force_repeat': force_repeat, 'retain': False}
         )
-        # Additional information for flashers
-        if isinstance(control_object, brickmaster.controls.CtrlFlasher):
-            # Sequence position.
-            outbound_messages.append(
-                {'topic': 'brickmaster/' + short_name + '/controls/' + control_object.id + '/seq_pos',
-                 'message': control_object.seq_pos, 'force_repeat': force_repeat, 'retain': False}
-            )
-            # Running Configuration.
-            outbound_messages.append(
-                {'topic': 'brickmaster/' + short_name + '/controls/' + control_object.id + '/loiter_time',
-                 'message': control_object.loiter_tunit_ime, 'force_repeat': force_repeat, 'retain': False}
-            )
-            outbound_messages.append(
-                {'topic': 'brickmaster/' + short_name + '/controls/' + control_object.id + '/switch_time',
-                 'message': control_object.switch_time, 'force_repeat': force_repeat, 'retain': False}
-            )
-
-    # Sensors
-    for item in object_register['sensors']:
-        sensor_object = object_register['sensors'][item]
+        # Running Configuration.
         outbound_messages.append(
-            {'topic': 'brickmaster/' + short_name + '/sensors/' + sensor_object.id + '/status',
-             'message': sensor_object.status, 'force_repeat': force_repeat, 'retain': False}
+            {'topic': control_topics['loiter_time'],
+             'message': control_object.loiter_time, 'force_repeat': force_repeat, 'retain': False}
         )
+        outbound_messages.append(
+            {'topic': control_topics['switch_time'],
+             'message': control_object.switch_time, 'force_repeat': force_repeat, 'retain': False}
+        )
+    return outbound_messages
 
-    # Displays aren't yet supported. Maybe some day.
-    # for item in object_register['displays']:
-    # display_object = object_register['displays'][item]
-    # logger.debug("Generating messages for object '{}' (type: {})".format(
-    #     display_object.id, type(display_object)))
-    # outbound_messages
 
-    ## Active script.
-    # logger.debug("Generating active script message...")
-    outbound_messages.append({
-        'topic': topic_prefix + '/' + short_name + '/script/active',
-        'message': core.active_script,
-        'force_repeat': force_repeat})
+def sensor_messages(sensor_object, topics, force_repeat=False):
+    """
+    Generate mqtt messages for a sensor. Sensors which have never been read have nothing to send. History is sent
+    when it has been requested.
 
+    :param sensor_object: Sensor to generate messages for.
+    :type sensor_object: brickmaster.sensors.BaseSensor
+    :param topics: Topic registry.
+    :type topics: brickmaster.network.topics.BM2Topics
+    :param force_repeat: Should we send messages that haven't changed since previous send?
+    :type force_repeat: bool
+    :return: list
+    """
+    sensor_topics = topics.get('sensors', sensor_object.id)
+    outbound_messages = []
+    status = sensor_object.status
+    if status is not None:
+        outbound_messages.append(
+            {'topic': sensor_topics['status'],
+             'message': status, 'force_repeat': force_repeat, 'retain': False}
+        )
+    if sensor_object.history_requested:
+        # Always send history when asked, even if it's the same as last time.
+        outbound_messages.append(
+            {'topic': sensor_topics['history'],
+             'message': sensor_object.history(), 'force_repeat': True, 'retain': False}
+        )
     return outbound_messages
 
 
+def script_messages(core, topics, force_repeat=False):
+    """
+    Generate the active script message.
+
+    :param core: Reference to the Brickmaster Core.
+    :type core: Object
+    :param topics: Topic registry.
+    :type topics: brickmaster.network.topics.BM2Topics
+    :param force_repeat: Should we send messages that haven't changed since previous send?
+    :type force_repeat: bool
+    :return: list
+    """
+    return [
+        {'topic': topics.script_active,
+         'message': core.active_script, 'force_repeat': force_repeat}
+    ]
+
+
 # HA Device Info
+def perf_messages(perf, topics):
+    """
+    Generate the performance counter report. Closes out the counters' current window.
+
+    :param perf: Performance counters.
+    :type perf: brickmaster.perf.BM2Perf
+    :param topics: Topic registry.
+    :type topics: brickmaster.network.topics.BM2Topics
+    :return: list
+    """
+    return [{'topic': topics.perf, 'message': perf.report()}]
+
+
 def ha_device_info(system_id, long_name, version, ha_area=None, ip=None):
     """
     Device information to include in Home Assistant discovery messages.
@@ -128,16 +202,16 @@ def ha_device_info(system_id, long_name, version, ha_area=None, ip=None):
     return return_data
 
 
-def ha_availability(topic_prefix, short_name):
+def ha_availability(topics):
     """
     Create the availability data for other elements.
 
-    :param topic_prefix: Topic prefix
-    :param short_name: Short name of the system.
+    :param topics: Topic registry
+    :type topics: brickmaster.network.topics.BM2Topics
     :return: dict
     """
     return_data = dict(
-        topic=topic_prefix + short_name + "/connectivity",
+        topic=topics.connectivity,
         payload_not_available="offline",
         payload_available="online"
     )
@@ -148,7 +222,7 @@ def ha_availability(topic_prefix, short_name):
 # https://www.home-assistant.io/integrations/mqtt/#device-discovery-payload
 
 # HA Discovery
-def ha_discovery(short_name, system_id, device_info, topic_prefix, ha_base, meminfo_mode, object_registry):
+def ha_discovery(short_name, system_id, device_info, topics, ha_base, meminfo_mode, object_registry, perf=None):
     """
     Create all discovery messages for publication.
 
@@ -158,41 +232,58 @@ def ha_discovery(short_name, system_id, device_info, topic_prefix, ha_base, memi
     :type system_id: str
     :param device_info: Device info block.
     :type device_info: str
-    :param topic_prefix: Topic prefix
-    :type topic_prefix: str
+    :param topics: Topic registry
+    :type topics: brickmaster.network.topics.BM2Topics
     :param ha_base: Home Assistant topic base
     :type ha_base: str
     :param meminfo_mode: Memory mode.
     :type meminfo_mode: str
     :param object_registry: The network module's object registry.
     :type object_registry: dict
-    :return: dict
+    :param perf: Performance counters. Entities are only created if they're enabled.
+    :type perf: brickmaster.perf.BM2Perf
+    :return: list
     """
 
     outbound_messages = []
     # Set up the Connectivity entities.
-    outbound_messages.extend(ha_discovery_connectivity(short_name, system_id, device_info, topic_prefix, ha_base))
+    outbound_messages.extend(ha_discovery_connectivity(short_name, system_id, device_info, topics, ha_base))
     # Set up the Memory Info entities.
-    outbound_messages.extend(ha_discovery_meminfo(short_name, system_id, device_info, topic_prefix, ha_base,
+    outbound_messages.extend(ha_discovery_meminfo(short_name, system_id, device_info, topics, ha_base,
                                                   meminfo_mode))
+    # Performance counters, if enabled.
+    if perf is not None and perf.enabled:
+        outbound_messages.extend(ha_discovery_perf(short_name, system_id, device_info, topics, ha_base, perf))
     # Current active script.
-    #outbound_messages.extend(ha_discovery_activescript(short_name, system_id, device_info, topic_prefix, ha_base))
+    #outbound_messages.extend(ha_discovery_activescript(short_name, system_id, device_info, topics, ha_base))
     # Script control
-    outbound_messages.extend(ha_discovery_script(short_name, system_id, device_info, topic_prefix, ha_base,
-                                                 object_registry['scripts']))
-
-    # Discover controls.
+    # Script state is published for all scripts at once, so any script can stand in as the source.
+    if len(object_registry['scripts']) > 0:
+        script_source = next(iter(object_registry['scripts'].values()))
+    else:
+        script_source = None
+    outbound_messages.extend(_ha_source(
+        ha_discovery_script(short_name, system_id, device_info, topics, ha_base, object_registry['scripts']),
+        script_source))
+
+    # Discover controls. Dimmers are lights, everything else is a switch.
     for control_id in object_registry['controls']:
-            outbound_messages.extend(ha_discovery_control(
-                short_name, system_id, device_info, topic_prefix, ha_base, object_registry['controls'][control_id]))
+        control = object_registry['controls'][control_id]
+        if isinstance(control, brickmaster.controls.CtrlDimmer):
+            outbound_messages.extend(_ha_source(ha_discovery_dimmer(
+                short_name, system_id, device_info, topics, ha_base, control), control))
+        else:
+            outbound_messages.extend(_ha_source(ha_discovery_control(
+                short_name, system_id, device_info, topics, ha_base, control), control))
 
     # Discover Sensors
-    logger.debug("Sensors defined: {}".format(object_registry['sensors']))
+    logger.debug("Sensors defined: {}", object_registry['sensors'])
     for sensor_id in object_registry['sensors']:
         if isinstance(object_registry['sensors'][sensor_id], brickmaster.sensors.SensorHTU31D):
-            logger.debug("Creating discovery messages for HTU31D '{}'".format(sensor_id))
-            outbound_messages.extend(ha_discovery_sensor_HTU31D(
-                short_name, system_id, device_info, topic_prefix, ha_base, object_registry['sensors'][sensor_id]))
+            logger.debug("Creating discovery messages for HTU31D '{}'", sensor_id)
+            outbound_messages.extend(_ha_source(ha_discovery_sensor_HTU31D(
+                short_name, system_id, device_info, topics, ha_base, object_registry['sensors'][sensor_id]),
+                object_registry['sensors'][sensor_id]))
 
     #TODO: Add discovery for scripts and send script data, ie: elapsed time.
     # The outbound topics dict includes references to the objects, so we can get the objects from there.
@@ -204,14 +295,30 @@ def ha_discovery(short_name, system_id, device_info, topic_prefix, ha_base, memi
     return outbound_messages
 
 
-def ha_discovery_activescript(short_name, system_id, device_info, topic_prefix, ha_base):
+def _ha_source(discovery_messages, source):
+    """
+    Tag discovery messages with the object whose state their entities show. When an entity is new or has changed, the
+    network module uses this to resend that object's state, so Home Assistant doesn't show it as unknown.
+
+    :param discovery_messages: Discovery messages for the object.
+    :type discovery_messages: list
+    :param source: Object the messages were created for.
+    :type source: BM2Script, BaseControl, BaseSensor
+    :return: list
+    """
+    for discovery_message in discovery_messages:
+        discovery_message['source'] = source
+    return discovery_messages
+
+
+def ha_discovery_activescript(short_name, system_id, device_info, topics, ha_base):
     """
     Create Home Assistant discovery message for system connectivity
 
     :param short_name: Short name of the system
     :param system_id: ID of the system
     :param device_info: Device info block.
-    :param topic_prefix: Topic prefix
+    :param topics: Topic registry
     :param ha_base: Home Assistant topic base
     :return: list
     """
@@ -220,15 +327,15 @@ def ha_discovery_activescript(short_name, system_id, device_info, topic_prefix,
         'object_id': short_name + "_activescript",
         'device': device_info,
         'unique_id': system_id + "_activescript",
-        'state_topic': topic_prefix + short_name + '/active_script',
-        'availability': ha_availability(topic_prefix, short_name)
+        'state_topic': topics.script_active,
+        'availability': ha_availability(topics)
     }
     discovery_json = json.dumps(discovery_dict)
     discovery_topic = ha_base + '/sensor/' + 'bm2_' + system_id + '/activescript/config'
     return [{'topic': discovery_topic, 'message': discovery_json}]
 
 
-def ha_discovery_connectivity(short_name, system_id, device_info, topic_prefix, ha_base):
+def ha_discovery_connectivity(short_name, system_id, device_info, topics, ha_base):
     """
     Create Home Assistant discovery message for system connectivity
 
@@ -240,7 +347,7 @@ def ha_discovery_connectivity(short_name, system_id, device_info, topic_prefix,
         'device': device_info,
         'device_class': 'connectivity',
         'unique_id': system_id + "_connectivity",
-        'state_topic': topic_prefix + short_name + '/connectivity',
+        'state_topic': topics.connectivity,
         'payload_on': 'online',
         'payload_off': 'offline'
     }
@@ -251,14 +358,14 @@ def ha_discovery_connectivity(short_name, system_id, device_info, topic_prefix,
     # self._topics_outbound['connectivity']['discovery_time'] = time.monotonic()
 
 
-def ha_discovery_meminfo(short_name, system_id, device_info, topic_prefix, ha_base, mode):
+def ha_discovery_meminfo(short_name, system_id, device_info, topics, ha_base, mode):
     """
     Create Home Assistant discovery message for free memory.
 
     :param short_name: Short name of the system
     :param system_id: ID of the system
     :param device_info: Device info block.
-    :param topic_prefix: Topic prefix
+    :param topics: Topic registry
     :param ha_base: Home Assistant topic base
     :param mode: Memory mode.
     :return: dict
@@ -272,61 +379,61 @@ def ha_discovery_meminfo(short_name, system_id, device_info, topic_prefix, ha_ba
         'object_id': short_name + "_memfreepct",
         'device': device_info,
         'unique_id': system_id + "_memfreepct",
-        'state_topic': topic_prefix + short_name + '/meminfo',
+        'state_topic': topics.meminfo,
         'unit_of_measurement': '%',
         'value_template': '{{ value_json.pct_avail }}',
         'icon': 'mdi:memory',
-        'availability': ha_availability(topic_prefix, short_name)
+        'availability': ha_availability(topics)
     }
     memusedpct_dict = {
         'name': "Memory Used (Pct)",
         'object_id': short_name + "_memusedpct",
         'device': device_info,
         'unique_id': system_id + "_memusedpct",
-        'state_topic': topic_prefix + short_name + '/meminfo',
+        'state_topic': topics.meminfo,
         'unit_of_measurement': '%',
         'value_template': '{{ value_json.pct_used }}',
         'icon': 'mdi:memory',
-        'availability': ha_availability(topic_prefix, short_name)
+        'availability': ha_availability(topics)
     }
     memfreebytes_dict = {
         'name': "Memory Available (Bytes)",
         'object_id': short_name + "_memfree",
         'device': device_info,
         'unique_id': system_id + "_memfree",
-        'state_topic': topic_prefix + short_name + '/meminfo',
+        'state_topic': topics.meminfo,
         'unit_of_measurement': 'B',
         'value_template': '{{ value_json.mem_free }}',
         'icon': 'mdi:memory',
-        'availability': ha_availability(topic_prefix, short_name)
+        'availability': ha_availability(topics)
     }
     memusedbytes_dict = {
         'name': "Memory Used (Bytes)",
         'object_id': short_name + "_memusedpct",
         'device': device_info,
         'unique_id': system_id + "_memusedpct",
-        'state_topic': topic_prefix + short_name + '/meminfo',
+        'state_topic': topics.meminfo,
         'unit_of_measurement': 'B',
         'value_template': '{{ value_json.mem_used }}',
         'icon': 'mdi:memory',
-        'availability': ha_availability(topic_prefix, short_name)
+        'availability': ha_availability(topics)
     }
 
     if mode == 'unified':
         # Unified just sets up Memory, Percent Free. Add in the other memory info as JSON attributes.
-        memfreepct_dict['json_attributes_topic'] = topic_prefix + short_name + '/meminfo'
+        memfreepct_dict['json_attributes_topic'] = topics.meminfo
         return [{'topic': ha_base + '/sensor/' + 'bm2_' + system_id + '/memfreepct/config',
                  'message': json.dumps(memfreepct_dict)}]
     elif mode == 'unified-used':
-        memusedpct_dict['json_attributes_topic'] = topic_prefix + short_name + '/meminfo'
+        memusedpct_dict['json_attributes_topic'] = topics.meminfo
         return [{'topic': ha_base + '/sensor/' + 'bm2_' + system_id + '/memusedpct/config',
                  'message': json.dumps(memusedpct_dict)}]
     elif mode == 'split-pct':
         # When providing separate memory percentages, add JSON attributes on free or used.
-        memfreepct_dict['json_attributes_topic'] = topic_prefix + short_name + '/meminfo'
+        memfreepct_dict['json_attributes_topic'] = topics.meminfo
         memfreepct_dict['json_attributes_template'] = \
             "{{ {'mem_free': value_json.mem_free, 'mem_total': value_json.mem_total} | tojson }}"
-        memusedpct_dict['json_attributes_topic'] = topic_prefix + short_name + '/meminfo'
+        memusedpct_dict['json_attributes_topic'] = topics.meminfo
         memusedpct_dict['json_attributes_template'] = \
             "{{ {'mem_used': value_json.mem_used, 'mem_total': value_json.mem_total} | tojson }}"
         return [
@@ -349,7 +456,53 @@ def ha_discovery_meminfo(short_name, system_id, device_info, topic_prefix, ha_ba
     return None
     #self._topics_outbound['meminfo']['discovery_time'] = time.monotonic()
 
-def ha_discovery_sensor_HTU31D(short_name, system_id, device_info, topic_prefix, ha_base, sensor):
+def ha_discovery_perf(short_name, system_id, device_info, topics, ha_base, perf):
+    """
+    Create Home Assistant discovery messages for the performance counters. These are diagnostic entities.
+
+    :param short_name: Short name of the system
+    :param system_id: ID of the system
+    :param device_info: Device info block.
+    :param topics: Topic registry
+    :param ha_base: Home Assistant topic base
+    :param perf: Performance counters.
+    :type perf: brickmaster.perf.BM2Perf
+    :return: list
+    """
+    # Loop rate carries the complete report as attributes.
+    entities = [('looprate', "Loop Rate", 'loop_rate', '/s', 'mdi:speedometer', True)]
+    for phase in perf.PHASES:
+        entities.append((phase + 'time', phase.capitalize() + " Time", phase + '_mean', 'ms', 'mdi:timer-outline',
+                         False))
+    for counter in perf.COUNTERS:
+        entities.append(('pub' + counter, "Messages " + counter.capitalize(), 'pub_' + counter, None,
+                         'mdi:message-processing-outline', False))
+    # Startup phases are in the report's attributes, through the loop rate.
+    entities.append(('onlinetime', "Online Time", 'online_time', 'ms', 'mdi:timer-play-outline', False))
+
+    discovery_array = []
+    for entity_id, name, key, uom, icon, attributes in entities:
+        discovery_dict = {
+            'name': name,
+            'object_id': short_name + "_perf_" + entity_id,
+            'device': device_info,
+            'unique_id': system_id + "_perf_" + entity_id,
+            'state_topic': topics.perf,
+            'value_template': '{{ value_json.' + key + ' }}',
+            'entity_category': 'diagnostic',
+            'icon': icon,
+            'availability': ha_availability(topics)
+        }
+        if uom is not None:
+            discovery_dict['unit_of_measurement'] = uom
+        if attributes:
+            discovery_dict['json_attributes_topic'] = topics.perf
+        discovery_array.append({'topic': ha_base + '/sensor/' + 'bm2_' + system_id + '/perf_' + entity_id + '/config',
+                                'message': json.dumps(discovery_dict)})
+    return discovery_array
+
+
+def ha_discovery_sensor_HTU31D(short_name, system_id, device_info, topics, ha_base, sensor):
     """
     Discovery message for an HTU31D temp/humidity Sensor.
 
@@ -359,7 +512,7 @@ def ha_discovery_sensor_HTU31D(short_name, system_id, device_info, topic_prefix,
     :type system_id: str
     :param device_info: Device Info block
     :type device_info:
-    :param topic_prefix: Our own topic prefix
+    :param topics: Topic registry
     :param ha_base: Prefix for Home Assistant
     :param control: GPIO control object
     :type control: brickmaster.controls.Control
@@ -371,11 +524,11 @@ def ha_discovery_sensor_HTU31D(short_name, system_id, device_info, topic_prefix,
         'object_id': short_name + "_" + sensor.id + "_temperature",
         'device': device_info,
         'unique_id': system_id + "_" + sensor.id + "_temperature",
-        'state_topic': topic_prefix + short_name + '/sensors/' + sensor.id + '/status',
+        'state_topic': topics.get('sensors', sensor.id)['status'],
         'device_class': 'temperature',
         'unit_of_measurement': sensor.uom,
         'value_template': '{{ value_json.temperature }}',
-        'availability': ha_availability(topic_prefix, short_name)
+        'availability': ha_availability(topics)
     }
 
     humidity_dict = {
@@ -383,11 +536,11 @@ def ha_discovery_sensor_HTU31D(short_name, system_id, device_info, topic_prefix,
         'object_id': short_name + "_" + sensor.id + "_humidity",
         'device': device_info,
         'unique_id': system_id + "_" + sensor.id + "_humidity",
-        'state_topic': topic_prefix + short_name + '/sensors/' + sensor.id + '/status',
+        'state_topic': topics.get('sensors', sensor.id)['status'],
         'device_class': 'humidity',
         'unit_of_measurement': '%',
         'value_template': '{{ value_json.humidity }}',
-        'availability': ha_availability(topic_prefix, short_name),
+        'availability': ha_availability(topics),
     }
 
     discovery_array = [
@@ -400,7 +553,7 @@ def ha_discovery_sensor_HTU31D(short_name, system_id, device_info, topic_prefix,
     return discovery_array
 
 
-def ha_discovery_control(short_name, system_id, device_info, topic_prefix, ha_base, control):
+def ha_discovery_control(short_name, system_id, device_info, topics, ha_base, control):
     """
     Discovery message for a GPIO control.
 
@@ -410,7 +563,7 @@ def ha_discovery_control(short_name, system_id, device_info, topic_prefix, ha_ba
     :type system_id: str
     :param device_info: Device Info block
     :type device_info:
-    :param topic_prefix: Our own topic prefix
+    :param topics: Topic registry
     :param ha_base: Prefix for Home Assistant
     :param control: GPIO control object
     :type control: brickmaster.controls.Control
@@ -422,23 +575,61 @@ def ha_discovery_control(short_name, system_id, device_info, topic_prefix, ha_ba
         'object_id': short_name + "_" + control.id,
         'device': device_info,
         'unique_id': system_id + "_" + control.id,
-        'command_topic': topic_prefix + short_name + '/controls/' + control.id + '/set',
-        'state_topic': topic_prefix + short_name + '/controls/' + control.id + '/status',
-        'availability': ha_availability(topic_prefix, short_name)
+        'command_topic': topics.get('controls', control.id)['set'],
+        'state_topic': topics.get('controls', control.id)['status'],
+        'availability': ha_availability(topics)
     }
 
     # This try/except is arguably a legacy holdover...it may be possible to remove it in the future.
     try:
         discovery_dict['icon'] = control.icon
     except AttributeError:
-        logger.warning("Network (MQTT): Control '{}' does not have icon set. This should never happen. Defaulting to 'toy-brick'".format(control.id))
+        logger.warning("Network (MQTT): Control '{}' does not have icon set. This should never happen. Defaulting to 'toy-brick'",
+                       control.id)
         discovery_dict['icon'] = 'mdi:toy-brick'
 
     return [{'topic': ha_base + '/switch/' + 'bm2_' + system_id + '/' + control.id + '/config',
              'message': json.dumps(discovery_dict)}]
 
 
-def ha_discovery_script(short_name, system_id, device_info, topic_prefix, ha_base,
+def ha_discovery_dimmer(short_name, system_id, device_info, topics, ha_base, control):
+    """
+    Discovery message for a dimmer control. Uses Home Assistant's JSON light schema, so brightness and transition are
+    sent in one command.
+
+    :param short_name: Short name of the system.
+    :type short_name: str
+    :param system_id: System ID
+    :type system_id: str
+    :param device_info: Device Info block
+    :type device_info:
+    :param topics: Topic registry
+    :param ha_base: Prefix for Home Assistant
+    :param control: Dimmer control object
+    :type control: brickmaster.controls.CtrlDimmer
+    :return: list
+    """
+
+    discovery_dict = {
+        'name': control.name,
+        'object_id': short_name + "_" + control.id,
+        'device': device_info,
+        'unique_id': system_id + "_" + control.id,
+        'schema': 'json',
+        'command_topic': topics.get('controls', control.id)['set'],
+        'state_topic': topics.get('controls', control.id)['status'],
+        'brightness': True,
+        'brightness_scale': 255,
+        'supported_color_modes': ['brightness'],
+        'icon': control.icon,
+        'availability': ha_availability(topics)
+    }
+
+    return [{'topic': ha_base + '/light/' + 'bm2_' + system_id + '/' + control.id + '/config',
+             'message': json.dumps(discovery_dict)}]
+
+
+def ha_discovery_script(short_name, system_id, device_info, topics, ha_base,
                         script_registry):
     """
     Create the script control based on the available scripts
@@ -446,7 +637,7 @@ def ha_discovery_script(short_name, system_id, device_info, topic_prefix, ha_bas
     :param short_name:
     :param system_id:
     :param device_info:
-    :param topic_prefix:
+    :param topics: Topic registry
     :param ha_base:
     :param script_registry:
     :return: list
@@ -464,30 +655,29 @@ def ha_discovery_script(short_name, system_id, device_info, topic_prefix, ha_bas
     options_list = ['Inactive', 'Abort']
     script_names = []
     for script in script_registry:
-        logger.debug("Adding script ID '{}', Name '{}'".
-                     format(script_registry[script].id, script_registry[script].name))
+        logger.debug("Adding script ID '{}', Name '{}'", script_registry[script].id, script_registry[script].name)
         script_names.append(script_registry[script].name)
     options_list.extend(sorted(script_names))
 
     script_selector = {
         'topic': ha_base + '/select/' + 'bm2_' + system_id + '/script/config',
-        'message': {
+        'message': json.dumps({
             'name': short_name + ' Script Selection',
             'object_id': short_name + "_script_select",
             'device': device_info,
             'unique_id': system_id + "_script_select",
             'icon': 'mdi:script-text-outline',
             'options': options_list,
-            'command_topic': topic_prefix + short_name + '/script/set',
-            'state_topic': topic_prefix + short_name + '/script/active',
-            'availability': ha_availability(topic_prefix, short_name)
-        }
+            'command_topic': topics.script_set,
+            'state_topic': topics.script_active,
+            'availability': ha_availability(topics)
+        })
     }
     return_data.append(script_selector)
 
     return return_data
 
-# def ha_discovery_display(short_name, system_id, device_info, topic_prefix, ha_base, display_obj):
+# def ha_discovery_display(short_name, system_id, device_info, topics, ha_base, display_obj):
 #     """
 #     Discovery message for a GPIO control.
 #
@@ -497,7 +687,7 @@ def ha_discovery_script(short_name, system_id, device_info, topic_prefix, ha_bas
 #     :type system_id: str
 #     :param device_info: Device Info block
 #     :type device_info:
-#     :param topic_prefix: Our own topic prefix
+#     :param topics: Topic registry
 #     :param ha_base: Prefix for Home Assistant
 #     :param display_obj: Display object
 #     :type display_obj: brickmaster.BM2Display
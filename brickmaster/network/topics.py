@@ -0,0 +1,85 @@
+"""
+Brickmaster MQTT Topic Registry
+
+Topics are built once, when objects are registered, and reused from then on. This keeps string building out of the
+publish path, which matters on microcontrollers where temporary strings fragment the heap.
+"""
+
+import sys
+
+# CPython can intern strings so identical topics share one object. CircuitPython doesn't offer this, which is fine, as
+# each topic is still only built once.
+try:
+    _intern = sys.intern
+except AttributeError:
+    def _intern(string):
+        return string
+
+
+class BM2Topics:
+    """
+    Registry of the topics used by a Brickmaster system and its registered objects.
+    """
+    def __init__(self, short_name, topic_prefix='brickmaster'):
+        """
+        :param short_name: Short name of the system. No spaces!
+        :type short_name: str
+        :param topic_prefix: Base topic. Defaults to 'brickmaster'.
+        :type topic_prefix: str
+        """
+        self._base = topic_prefix + '/' + short_name
+        self._objects = {
+            'controls': {},
+            'scripts': {},
+            'sensors': {}
+        }
+
+        # System topics.
+        self.connectivity = self._add(self._base + '/connectivity')
+        self.meminfo = self._add(self._base + '/meminfo')
+        self.perf = self._add(self._base + '/perf')
+        self.script_set = self._add(self._base + '/script/set')
+        self.script_active = self._add(self._base + '/script/active')
+        self.board_id = self._add(self._base + '/system/board_id')
+        self.pins = self._add(self._base + '/system/pins')
+
+    def register(self, object_type, object_id, names):
+        """
+        Build and store the topics for an object.
+
+        :param object_type: Type of the object. One of 'controls', 'scripts' or 'sensors'.
+        :type object_type: str
+        :param object_id: ID of the object.
+        :type object_id: str
+        :param names: Topic names to create for the object, ie: 'status', 'set'
+        :type names: list
+        :return: dict
+        """
+        object_base = self._base + '/' + object_type + '/' + object_id + '/'
+        object_topics = {}
+        for name in names:
+            object_topics[name] = self._add(object_base + name)
+        self._objects[object_type][object_id] = object_topics
+        return object_topics
+
+    def get(self, object_type, object_id):
+        """
+        Get the topics for a registered object.
+
+        :param object_type: Type of the object. One of 'controls', 'scripts' or 'sensors'.
+        :type object_type: str
+        :param object_id: ID of the object.
+        :type object_id: str
+        :return: dict
+        """
+        return self._objects[object_type][object_id]
+
+    def _add(self, topic):
+        """
+        Intern a topic. Topics are kept as str only, as both Paho and MiniMQTT take str topics.
+
+        :param topic: Topic to add.
+        :type topic: str
+        :return: str
+        """
+        return _intern(topic)
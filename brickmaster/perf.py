@@ -0,0 +1,159 @@
+"""
+Brickmaster Performance Counters
+"""
+
+import time
+
+
+class BM2Perf:
+    """
+    Timing and event counters for the run loop.
+
+    Phases of the run loop are timed with mark() and lap(), and events are tallied with count(). The totals cover a
+    window which is closed out and reset by report(). When disabled, all methods return right away, so the calls can be
+    left in place at little cost.
+
+    Startup is timed too, with startup() for each phase of setting up and online() when the network first connects.
+    These happen once, so are always recorded, and are included in every report.
+    """
+    # Run loop phases which are timed.
+    PHASES = ('network', 'flashers', 'sensors', 'script', 'idle')
+    # Message publication outcomes which are counted.
+    COUNTERS = ('sent', 'deduped', 'dropped')
+
+    def __init__(self, enabled=False, interval=15, boot=None):
+        """
+        :param enabled: Collect timings and counts.
+        :type enabled: bool
+        :param interval: How often to report, in seconds.
+        :type interval: int
+        :param boot: When startup began, in time.monotonic_ns() nanoseconds. Defaults to now.
+        :type boot: int
+        """
+        self.enabled = enabled
+        self.interval = interval
+        self._boot = time.monotonic_ns() if boot is None else boot
+        # Time taken by each startup phase, in milliseconds, in the order they ran.
+        self.startup_times = {}
+        # Time from the start of startup until the network first connected, in milliseconds. None until it has.
+        self.online_time = None
+        self._phases = {}
+        self._counters = {}
+        self._window_start = time.monotonic_ns()
+        self._reset()
+
+    def mark(self):
+        """
+        Start timing.
+
+        :return: Start time in time.monotonic_ns() nanoseconds, for passing to lap(). 0 when disabled.
+        :rtype: int
+        """
+        if not self.enabled:
+            return 0
+        return time.monotonic_ns()
+
+    def lap(self, phase, start):
+        """
+        Record the time taken by a phase.
+
+        :param phase: Phase to record. Should be one of PHASES.
+        :type phase: str
+        :param start: When the phase started, from mark() or a previous lap().
+        :type start: int
+        :return: Now, in time.monotonic_ns() nanoseconds, so the next phase can be timed from here. 0 when disabled.
+        :rtype: int
+        """
+        if not self.enabled:
+            return 0
+        now = time.monotonic_ns()
+        elapsed = now - start
+        phase_data = self._phases[phase]
+        phase_data[0] += 1
+        phase_data[1] += elapsed
+        if elapsed > phase_data[2]:
+            phase_data[2] = elapsed
+        return now
+
+    def startup(self, phase, start):
+        """
+        Record the time taken by a phase of startup.
+
+        :param phase: Name of the phase.
+        :type phase: str
+        :param start: When the phase started, in time.monotonic_ns() nanoseconds.
+        :type start: int
+        :return: Now, in time.monotonic_ns() nanoseconds, so the next phase can be timed from here.
+        :rtype: int
+        """
+        now = time.monotonic_ns()
+        self.startup_times[phase] = round((now - start) / 1000000, 1)
+        return now
+
+    def startup_total(self):
+        """
+        Time since startup began, in milliseconds.
+
+        :return: float
+        """
+        return round((time.monotonic_ns() - self._boot) / 1000000, 1)
+
+    def online(self):
+        """
+        Record the network connecting. Only the first connection counts.
+
+        :return: True if this was the first connection.
+        :rtype: bool
+        """
+        if self.online_time is not None:
+            return False
+        self.online_time = self.startup_total()
+        return True
+
+    def count(self, counter):
+        """
+        Count an event.
+
+        :param counter: Counter to increment. Should be one of COUNTERS.
+        :type counter: str
+        :return: None
+        """
+        if not self.enabled:
+            return
+        self._counters[counter] += 1
+
+    def report(self):
+        """
+        Report the current window and start a new one. Times are in milliseconds, the loop rate is per second.
+
+        :return: dict
+        """
+        now = time.monotonic_ns()
+        window = (now - self._window_start) / 1000000000
+        report_dict = {'window': round(window, 3)}
+        # Every pass polls the network, so its count is the number of passes through the loop.
+        if window > 0:
+            report_dict['loop_rate'] = round(self._phases['network'][0] / window, 2)
+        else:
+            report_dict['loop_rate'] = 0
+        for phase in self.PHASES:
+            count, total, maximum = self._phases[phase]
+            report_dict[phase + '_mean'] = round(total / count / 1000000, 3) if count > 0 else 0
+            report_dict[phase + '_max'] = round(maximum / 1000000, 3)
+        for counter in self.COUNTERS:
+            report_dict['pub_' + counter] = self._counters[counter]
+        report_dict['online_time'] = self.online_time
+        for phase in self.startup_times:
+            report_dict['startup_' + phase] = self.startup_times[phase]
+        self._window_start = now
+        self._reset()
+        return report_dict
+
+    def _reset(self):
+        """
+        Clear the totals.
+        """
+        for phase in self.PHASES:
+            self._phases[phase] = [0, 0, 0] # Count, total time, maximum time.
+        for counter in self.COUNTERS:
+            self._counters[counter] = 0
@@ -0,0 +1,77 @@
+"""
+Brickmaster Scheduler
+"""
+
+import sys
+import time
+
+# On general-purpose systems the scheduler can be woken early from another thread (ie: the Paho network thread).
+if sys.implementation.name == 'cpython':
+    import threading
+else:
+    threading = None
+
+
+class BM2Scheduler:
+    """
+    Deadline tracker for the core run loop.
+
+    Each pass through the loop, objects report when they next need attention as a time.monotonic_ns() timestamp. Once
+    the pass is done, the scheduler sleeps until the earliest of those deadlines, or the maximum sleep time if nothing
+    is pending.
+    """
+    def __init__(self, max_sleep=1000):
+        """
+        :param max_sleep: Longest time to sleep, in milliseconds, even if nothing is due.
+        :type max_sleep: int
+        """
+        self._max_sleep = max_sleep * 1000000
+        self._deadline = None
+        if threading is not None:
+            self._wake_event = threading.Event()
+        else:
+            self._wake_event = None
+
+    def due(self, deadline):
+        """
+        Register a deadline for the current pass. None is ignored, so objects with nothing pending can be passed in
+        directly.
+
+        :param deadline: Time the object needs attention, in time.monotonic_ns() nanoseconds.
+        :type deadline: int
+        :return: None
+        """
+        if deadline is not None and (self._deadline is None or deadline < self._deadline):
+            self._deadline = deadline
+
+    def sleep(self):
+        """
+        Sleep until the earliest registered deadline, then clear the deadlines for the next pass.
+
+        :return: Time slept, in nanoseconds.
+        :rtype: int
+        """
+        now = time.monotonic_ns()
+        deadline = now + self._max_sleep
+        if self._deadline is not None and self._deadline < deadline:
+            deadline = self._deadline
+        self._deadline = None
+        wait = deadline - now
+        if wait <= 0:
+            return 0
+        if self._wake_event is not None:
+            self._wake_event.wait(wait / 1000000000)
+            self._wake_event.clear()
+        else:
+            time.sleep(wait / 1000000000)
+        return wait
+
+    def wake(self):
+        """
+        Wake the scheduler early. Safe to call from other threads. Does nothing on CircuitPython, where there are no
+        other threads to call it.
+
+        :return: None
+        """
+        if self._wake_event is not None:
+            self._wake_event.set()
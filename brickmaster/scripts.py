@@ -2,12 +2,173 @@
 Brickmaster Scripts
 """
 
-import adafruit_logging as logger
+import brickmaster.log as logger
+from array import array
 import time
-import math
 from brickmaster.segment_format import time_7s, number_7s
 
 
+def _bisect_right(values, x):
+    """
+    Find the index at which x would be inserted into sorted values, after any equal entries. CircuitPython doesn't have
+    the bisect module, so this is a minimal version of bisect.bisect_right.
+
+    :param values: Sorted values to search.
+    :type values: tuple
+    :param x: Value to look for.
+    :type x: float
+    :return: int
+    """
+    lo = 0
+    hi = len(values)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if x < values[mid]:
+            hi = mid
+        else:
+            lo = mid + 1
+    return lo
+
+
+class BM2ScriptEngine:
+    """
+    Runs scripts. Several scripts can run at once. Each control and display a script uses belongs to one running script
+    at a time. A script can take over controls and displays from running scripts of lower priority, which get them back
+    when it finishes. A script can't start if a running script of the same or higher priority holds any of them.
+    """
+    def __init__(self):
+        self._logger = logger.getLogger('Brickmaster')
+        self._running = []  # Running scripts, highest priority first.
+        self._owners = {}  # Script that owns each control and display.
+        # Set whenever ownership changes, so the core knows to redraw idle displays. The core clears it.
+        self.changed = False
+
+    @property
+    def running(self):
+        """
+        Running scripts, highest priority first.
+
+        :return: list
+        """
+        return self._running
+
+    def owner(self, resource):
+        """
+        Script which owns a control or display.
+
+        :param resource: Control or display.
+        :return: BM2Script or None, if no running script owns it.
+        """
+        return self._owners.get(resource)
+
+    def start(self, script):
+        """
+        Start a script, taking its controls and displays from lower priority scripts if need be.
+
+        :param script: Script to start.
+        :type script: BM2Script
+        :return: True if the script started.
+        :rtype: bool
+        """
+        if script in self._running:
+            self._logger.info("Script '{}' is already running.", script.name)
+            return False
+        for resource in script.resources:
+            owner = self._owners.get(resource)
+            if owner is not None and owner.priority >= script.priority:
+                self._logger.warning("Cannot start script '{}', script '{}' is using its controls or displays.",
+                                     script.name, owner.name)
+                return False
+        for resource in script.resources:
+            owner = self._owners.get(resource)
+            if owner is not None:
+                self._logger.debug("Script '{}' taking over from script '{}'", script.name, owner.name)
+                owner.release(resource)
+            self._owners[resource] = script
+        script.claim(script.resources)
+        # Keep the running list in priority order. Scripts of equal priority run in the order they were started.
+        i = 0
+        while i < len(self._running) and self._running[i].priority >= script.priority:
+            i += 1
+        self._running.insert(i, script)
+        script.set('ON')
+        self.changed = True
+        return True
+
+    def stop(self, script):
+        """
+        Stop a script, and hand its controls and displays back to any running scripts which were using them.
+
+        :param script: Script to stop.
+        :type script: BM2Script
+        :return: None
+        """
+        if script not in self._running:
+            return
+        if script.status == 'ON':
+            script.set('OFF')
+        self._finish(script)
+
+    def stop_all(self):
+        """
+        Stop all running scripts.
+
+        :return: None
+        """
+        while len(self._running) > 0:
+            self.stop(self._running[-1])
+
+    def step(self):
+        """
+        Advance all running scripts, then report when they're next due. Scripts which have completed are finished off.
+
+        :return: When the scripts are next due, in time.monotonic_ns() nanoseconds. None if none are running.
+        """
+        due = None
+        finished = None
+        for script in self._running:
+            script.execute()
+            if script.status == 'OFF':
+                if finished is None:
+                    finished = []
+                finished.append(script)
+                continue
+            script_due = script.next_due
+            if script_due is not None and (due is None or script_due < due):
+                due = script_due
+        if finished is not None:
+            for script in finished:
+                self._finish(script)
+            # Act on the returned controls and displays right away.
+            due = time.monotonic_ns()
+        return due
+
+    def _finish(self, script):
+        """
+        Remove a stopped script and give back what it owned, highest priority scripts first.
+
+        :param script: Script which has stopped.
+        :type script: BM2Script
+        :return: None
+        """
+        self._running.remove(script)
+        freed = []
+        for resource in script.resources:
+            if self._owners.get(resource) is script:
+                del self._owners[resource]
+                freed.append(resource)
+        script.release_all()
+        for other in self._running:
+            wanted = [resource for resource in freed if resource in other.resources]
+            if len(wanted) > 0:
+                self._logger.debug("Script '{}' taking back {} controls or displays.", other.name, len(wanted))
+                for resource in wanted:
+                    self._owners[resource] = other
+                    freed.remove(resource)
+                other.claim(wanted)
+        self.changed = True
+
+
 class BM2Script:
     """
     Brickmaster script class
@@ -19,22 +180,29 @@ class BM2Script:
         self._run_count = 0  # Which run of the script are we on. Starts at zero!
         self._status = 'OFF'  # Status, start as idle.
         self._blocks = []  # Blocks to execute.
-        self._start_time = None  # When we started.
+        self._start_time = None  # When we started, in time.monotonic_ns() nanoseconds.
         self._name = None
         self._type = None
         self._run = None
         self._loops = None
         self._current_loop = 0
         self._active_block = None
-        self._pending_block = 0
+        self._block_ends = ()  # End time of each block in milliseconds, compiled from the blocks.
+        self._block_actions = ()  # Control changes to make on entering each block, compiled from the blocks.
         self._at_completion = "off"
+        self._priority = 0
+        self._script_controls = {}  # Controls the script uses, by ID.
+        self._owned = set()  # Controls and displays the script currently owns. Managed by the script engine.
         self._topics = None
         self._saved_state = None
+        self._notify = None  # Callback to notify of changes. Set by the network module.
         # Save the controls references.
         self._controls = controls
 
         # Validate and load the script.
         self._validate(script)
+        # Compile the blocks into a timeline.
+        self._compile_timeline()
 
         # Create MQTT topics.
         self._create_topics()
@@ -70,6 +238,60 @@ class BM2Script:
         """
         return self._id
 
+    @property
+    def priority(self):
+        """
+        Priority of the script, for taking over controls and displays from other scripts. Higher wins.
+        """
+        return self._priority
+
+    @property
+    def resources(self):
+        """
+        Controls and displays the script uses.
+
+        :return: tuple
+        """
+        return tuple(self._script_controls.values())
+
+    def claim(self, resources):
+        """
+        Take ownership of controls or displays. If the script is running, they're brought to the state the script
+        currently has them in. Called by the script engine.
+
+        :param resources: Controls and displays to take.
+        :type resources: list
+        :return: None
+        """
+        for resource in resources:
+            self._owned.add(resource)
+        if self._status == 'ON' and self._active_block is not None:
+            # Replay the timeline up to the active block. The last action for each control is its current state.
+            states = {}
+            for block_num in range(self._active_block + 1):
+                for control_action in self._block_actions[block_num]:
+                    if control_action[0] in resources:
+                        states[control_action[0]] = control_action[1]
+            for control in states:
+                control.set(states[control])
+
+    def release(self, resource):
+        """
+        Give up ownership of a control or display. Called by the script engine.
+
+        :param resource: Control or display to give up.
+        :return: None
+        """
+        self._owned.discard(resource)
+
+    def release_all(self):
+        """
+        Give up ownership of everything. Called by the script engine.
+
+        :return: None
+        """
+        self._owned = set()
+
     @property
     def status(self):
         """ Is the script running? Will be 'ON' or 'OFF'"""
@@ -78,27 +300,27 @@ class BM2Script:
     @property
     def run_time(self):
         """
-        Total planned run time of the script.
+        Total planned run time of the script, in milliseconds.
         """
         return self._run_time
 
     @property
     def time_elapsed(self):
         """
-        How long has the script been running for?
+        How long has the script been running for, in milliseconds?
         Returns zero if the script hasn't started.
         """
         if self._start_time is None:
             return 0
         else:
-            return time.monotonic() - self._start_time
+            return (time.monotonic_ns() - self._start_time) // 1000000
 
     @property
     def time_remaining(self):
         """
-        Remaining time in execution.
+        Remaining time in execution, in milliseconds.
         """
-        return self._run_time - (time.monotonic() - self._start_time)
+        return self._run_time - self.time_elapsed
 
     @property
     def topics(self):
@@ -107,35 +329,60 @@ class BM2Script:
         """
         return self._topics
 
+    @property
+    def next_due(self):
+        """
+        When the script next needs to be executed, in time.monotonic_ns() nanoseconds. This is the end of the active
+        block. None if the script isn't running or hasn't started.
+        """
+        if self._status == 'OFF' or self._active_block is None:
+            return None
+        return self._start_time + self._block_ends[self._active_block] * 1000000
+
+    def set_notify(self, callback):
+        """
+        Set the method to call when the script starts or stops. The network module uses this to queue the active
+        script for publication.
+        """
+        self._notify = callback
+
+    def _changed(self):
+        if self._notify is not None:
+            self._notify(self)
+
     # Set the running state. This is how the script gets started and stopped.
     def set(self, value):
         """
         Start and stop the script. Accepts "ON" and "OFF"
         """
-        self._logger.info("Setting script '{}' to '{}'".format(self.name, value))
+        self._logger.info("Setting script '{}' to '{}'", self.name, value)
         # Starting...
         if value == 'ON':
             self._status = 'ON'
             self._current_loop = 1
             self._active_block = None
-            self._pending_block = 0
             if self._at_completion == 'restore':
                 self._logger.debug("Freezing system state.")
                 self._saved_state = self._system_status()
-            self._start_time = time.monotonic()
+            self._start_time = time.monotonic_ns()
+            self._changed()
         # Stopping...
         elif value == 'OFF':
             self._start_time = None
             self._status = 'OFF'
-            self._reset_blocks()
+            self._active_block = None
+            # Only touch the controls the script still owns. Anything taken over by another script is left to it.
             if self._at_completion == 'restore':
                 self._logger.debug("Restoring original system state.")
                 for control_state in self._saved_state:
-                    control_state[0].set(control_state[1])
+                    if control_state[0] in self._owned:
+                        control_state[0].set(control_state[1])
                 self._saved_state = None
             else:
-                for control in self._controls:
-                    control.set('off')
+                for control in self._script_controls:
+                    if self._script_controls[control] in self._owned:
+                        self._script_controls[control].set('off')
+            self._changed()
 
     def execute(self, implicit_start=False):
         """
@@ -148,44 +395,85 @@ class BM2Script:
             else:
                 return
 
-        # Is the active block none? This means we're at the start of the script. Move to Block 0
-        if self._active_block is None:
-            self._active_block = 1
-        # Are we within a tenth of a second of the end time of the active block?
-        if (time.monotonic() - self._start_time) >= (self._blocks[self._active_block]['end_time']):
-            self._active_block += 1
+        # Find the block for the current run time. Times within the script are whole milliseconds.
+        block = self._find_block((time.monotonic_ns() - self._start_time) // 1000000)
 
         # Are we at the end of the script?
-        if self._active_block >= len(self._blocks) - 1:
+        if block >= len(self._block_ends):
             # For repeating script. loop it.
             if self._run == 'repeat' and self._current_loop < self._loops:
-                self._logger.debug("Ending loop {}.".format(self._current_loop))
+                self._logger.debug("Ending loop {}.", self._current_loop)
                 self._current_loop += 1
-                self._reset_blocks()
                 self._logger.debug("Script starting new cycle.")
-                # Set Active block back to 0
-                self._active_block = 0
-                self._start_time = time.monotonic()
+                # Start the new cycle when the last one was due to end, so lateness doesn't build up over the loops.
+                # If we're a whole cycle behind, start it now.
+                self._start_time += self._run_time * 1000000
+                now = time.monotonic_ns()
+                if now - self._start_time >= self._run_time * 1000000:
+                    self._start_time = now
+                # Start again from block 0, which sets the full state of the controls.
+                self._active_block = None
+                block = self._find_block((now - self._start_time) // 1000000)
             else:
                 self._logger.debug("Script Complete.")
                 self.set('OFF')
                 return  # Return here to make sure we don't try to run a block we shouldn't.
 
-        self._execute_block(self._active_block)
+        if block != self._active_block:
+            # Make the changes for every block entered since the last pass, in case a pass was late enough to skip one.
+            if self._active_block is None:
+                first_block = 0
+            else:
+                first_block = self._active_block + 1
+            self._logger.debug("Executing control actions for block {} at run time {}ms",
+                               block, (time.monotonic_ns() - self._start_time) // 1000000)
+            owned = self._owned
+            for block_num in range(first_block, block + 1):
+                for control_action in self._block_actions[block_num]:
+                    if control_action[0] in owned:
+                        control_action[0].set(control_action[1])
+            self._active_block = block
+
+    def _find_block(self, run_time):
+        """
+        Find the block which is active at a given run time. Blocks end at their end time, so a run time equal to the
+        end time is in the next block. Past the end of the script, returns the number of blocks.
 
-    def _execute_block(self, block_num):
-        # Traverse the controls and pass the intended value.
-        if self._blocks[block_num]['status'] != 'complete':
-            self._logger.debug("Executing control actions for block {} at run time {}".
-                               format(block_num, time.monotonic() - self._start_time))
-            for control_action in self._blocks[block_num]['control_actions']:
-                control_action[0].set(control_action[1])
-        self._blocks[block_num]['status'] = 'complete'
+        :param run_time: Time since the start of the script, in milliseconds.
+        :type run_time: int
+        :return: int
+        """
+        # Usually still in the active block.
+        if self._active_block is not None and run_time < self._block_ends[self._active_block]:
+            return self._active_block
+        return _bisect_right(self._block_ends, run_time)
 
-    # Simple method to reset the blocks from run to pending. Used when the script ends, or to reset the loop.
-    def _reset_blocks(self):
+    def _compile_timeline(self):
+        """
+        Compile the blocks into the timeline used for execution. Block end times go into a sorted tuple for lookup. Each
+        block keeps only the control actions which change something from the previous block. The first block keeps all
+        of them, so the controls are in a known state when the script starts.
+
+        :return: None
+        """
+        block_ends = []
+        block_actions = []
+        previous_values = None
         for block in self._blocks:
-            block['status'] = 'pending'
+            block_ends.append(block['end_time'])
+            if previous_values is None:
+                actions = tuple(block['control_actions'])
+            else:
+                actions = tuple(control_action for control_action in block['control_actions']
+                                if previous_values[control_action[0]] != control_action[1])
+            block_actions.append(actions)
+            previous_values = {}
+            for control_action in block['control_actions']:
+                previous_values[control_action[0]] = control_action[1]
+            # The full action list isn't needed once compiled.
+            del block['control_actions']
+        self._block_ends = tuple(block_ends)
+        self._block_actions = tuple(block_actions)
 
     # Script validation.
     # Pull basic settings for the object out of the provided script.
@@ -194,7 +482,7 @@ class BM2Script:
         required_parameters = ["id", "type", "run", "blocks"]
         for rp in required_parameters:
             if rp not in script:
-                self._logger.error("Required script parameter '{}' not present. Cannot continue.".format(rp))
+                self._logger.error("Required script parameter '{}' not present. Cannot continue.", rp)
                 raise ValueError
 
         if len(script['blocks']) == 0:
@@ -210,8 +498,8 @@ class BM2Script:
         # Validate settings for type and run.
         # Type of script.
         if script['type'] not in ('basic', 'flight'):
-            self._logger.error("Script type must be 'basic' or 'flight'. Instead got '{}'. Cannot continue.".
-                               format(script['type']))
+            self._logger.error("Script type must be 'basic' or 'flight'. Instead got '{}'. Cannot continue.",
+                               script['type'])
         else:
             self._type = script['type']
         try:
@@ -219,10 +507,17 @@ class BM2Script:
                 self._at_completion = 'restore'
         except KeyError:
             pass
+        # Priority, for sharing controls with other scripts.
+        if 'priority' in script:
+            if isinstance(script['priority'], int):
+                self._priority = script['priority']
+            else:
+                self._logger.warning("Script priority must be an integer. Instead got '{}'. Using 0.",
+                                     script['priority'])
         # Run mode.
         if script['run'] not in ('once', 'repeat'):
-            self._logger.error("Script run mode must be 'once' or 'repeat'. Instead got '{}'. Cannot continue.".
-                               format(script['type']))
+            self._logger.error("Script run mode must be 'once' or 'repeat'. Instead got '{}'. Cannot continue.",
+                               script['type'])
             raise ValueError("Script run mode must be 'once' or 'repeat'.")
         else:
             self._run = script['run']
@@ -233,21 +528,26 @@ class BM2Script:
                     self._logger.error("Script is repeating but no repeat count set. Cannot continue.")
                     raise ValueError("Script is repeating but no repeat count set.")
 
+        # The script uses every control any of its blocks reference. Only these are set by the script.
+        for block in script['blocks']:
+            if 'controls' in block:
+                for control in block['controls']:
+                    if control in self._controls:
+                        self._script_controls[control] = self._controls[control]
+
         # Check the blocks!
         i = 0
         while i < len(script['blocks']):
-            self._logger.debug("Processing block number {}".format(i))
+            self._logger.debug("Processing block number {}", i)
             try:
                 block_data = self._validate_block(script['blocks'][i])
             except:
                 raise ValueError("Could not validate block {} in script. Cannot continue.".format(i + 1))
-            # Calculate the start and end time.
+            # Calculate the start and end time. Each block starts as the previous one ends.
             if i == 0:
                 block_data['start_time'] = 0
             else:
-                # This block starts one second after the previous block.
-                previous_end_time = self._blocks[i - 1]['end_time']
-                block_data['start_time'] = previous_end_time + 1
+                block_data['start_time'] = self._blocks[i - 1]['end_time']
             block_data['end_time'] = block_data['start_time'] + block_data['run_time']
             # Last block end time becomes the total run time, since we go from 0 to the end time of the last block.
             self._run_time = block_data['end_time']
@@ -263,10 +563,12 @@ class BM2Script:
             if rp not in block:
                 raise ValueError("Required parameter {} not in script block.".format(rp))
 
+        # Run time is given in seconds, and may be fractional. Keep it as whole milliseconds.
+        if not isinstance(block['run_time'], (int, float)) or block['run_time'] < 0.001:
+            raise ValueError("Block run time must be at least 0.001 seconds.")
         block_data = {
             'name': None,
-            'run_time': block['run_time'],
-            'status': "pending",
+            'run_time': int(round(block['run_time'] * 1000)),
             'start_time': None,
             'end_time': None,
             'control_actions': [],
@@ -279,20 +581,24 @@ class BM2Script:
         for control in block['controls']:
             # If the named control doesn't exist, skip it.
             if control not in self._controls:
-                self._logger.warning("Block references non-existent control '{}'. Ignoring.".format(control))
+                self._logger.warning("Block references non-existent control '{}'. Ignoring.", control)
             else:
-                block_data['control_actions'].append((self._controls[control], block['controls'][control]))
-        # For any control that didn't have an explicit definition, set it to off.
-        for control in self._controls:
+                value = block['controls'][control]
+                # Normalize case, so 'on' and 'ON' compare as the same when compiling the timeline.
+                if isinstance(value, str):
+                    value = value.lower()
+                block_data['control_actions'].append((self._controls[control], value))
+        # For any of the script's controls that didn't have an explicit definition, set it to off.
+        for control in self._script_controls:
             if control not in block['controls']:
-                block_data['control_actions'].append((self._controls[control], "off"))
+                block_data['control_actions'].append((self._script_controls[control], "off"))
         return block_data
 
     # Method to save a snapshot of the system state.
     def _system_status(self):
         return_list = []
-        for control in self._controls:
-            control_ref = self._controls[control]
+        for control in self._script_controls:
+            control_ref = self._script_controls[control]
             return_list.append(
                 (control_ref, control_ref.status)
             )
@@ -327,8 +633,8 @@ class BM2FlightScript(BM2Script):
         super().__init__(script, controls)
         self._logger.debug("Flight script init...")
         # Build the flight plan.
-        self._flight_plan = []
-        self._build_flight_plan(script)
+        self._flight_plan = array('f')
+        self._build_flight_plan()
         # Convert the display map.
         self._display_map = {}
         self._map_displays(script, displays)
@@ -345,132 +651,158 @@ class BM2FlightScript(BM2Script):
             return
 
         # Now do the flight-specific items.
-        # Make our run time an integer.
-        run_time = math.ceil(time.monotonic() - self._start_time)
-        flight_data = self._flight_plan[run_time]
-        # Send flight plan data to the displays.
+        # Flight data changes each second. Show the whole second of run time we're in.
+        run_time = (time.monotonic_ns() - self._start_time) // 1000000000
+        met, alt, vel = self.flight_data(run_time)
+        # Send flight plan data to the displays, if another script hasn't taken them over.
+        owned = self._owned
         # Mission Elapsed Time goes through the time string processor.
-        self._display_map['met'].show(time_7s(flight_data['met']))
+        if self._display_map['met'] in owned:
+            self._display_map['met'].show(time_7s(met))
         # Velocity and Altitude go through the general number preprocessor.
-        for item in ('vel', 'alt'):
-            self._display_map[item].show(number_7s(flight_data[item]))
+        if self._display_map['vel'] in owned:
+            self._display_map['vel'].show(number_7s(vel))
+        if self._display_map['alt'] in owned:
+            self._display_map['alt'].show(number_7s(alt))
+
+    def flight_data(self, run_time):
+        """
+        Calculate the flight data at a given point in the script.
+
+        :param run_time: Run time of the script, in whole seconds.
+        :type run_time: int
+        :return: Mission elapsed time, altitude and velocity.
+        :rtype: tuple
+        """
+        # Find the block this second starts in. As with the control actions, a block ends at its end time, so a second
+        # starting there is in the next block.
+        block = _bisect_right(self._block_ends, run_time * 1000)
+        if block >= len(self._block_ends):
+            block = len(self._block_ends) - 1
+        offset = (run_time * 1000 - self._blocks[block]['start_time']) / 1000
+        i = block * 6
+        plan = self._flight_plan
+        met = int(plan[i] + plan[i + 1] * offset)
+        alt = round(plan[i + 2] + plan[i + 3] * offset, 3)
+        vel = plan[i + 4] + plan[i + 5] * offset
+        return met, alt, vel
+
+    @property
+    def resources(self):
+        """
+        Controls and displays the script uses. Flight scripts also use the displays they show flight data on.
+
+        :return: tuple
+        """
+        return super().resources + tuple(self._display_map.values())
+
+    @property
+    def next_due(self):
+        """
+        When the script next needs to be executed. Flight data changes every second, so this is the next whole second
+        of run time if that comes before the end of the active block.
+        """
+        block_due = super().next_due
+        if block_due is None:
+            return None
+        second_due = self._start_time + ((time.monotonic_ns() - self._start_time) // 1000000000 + 1) * 1000000000
+        return min(block_due, second_due)
 
-    def _build_flight_plan(self, script):
+    def _build_flight_plan(self):
         """
-        Precalculate second-by-second altitude and velocity based on benchmarks in the script.
+        Build the flight plan from the benchmarks in the script. Within a block MET, altitude and velocity each change
+        linearly, so each block is stored as a starting value and per-second change for each. Values for any second are
+        calculated from that when needed.
+
+        The plan is stored flat, six values per block: MET, dMET, altitude, dA, velocity, dV.
         """
-        # Wipe the flight plan, make sure we don't have competing data.
-        self._flight_plan = []
+        self._flight_plan = array('f')
 
-        run_time = 0
         met_state = 'hold'
         met = 0  # Mission elapsed time.
         alt = 0  # Altitude
         vel = 0  # Velocity
         da = 0  # The per-second change in altitude
         dv = 0  # Per-second change in velocity
-        active_block = 0
-
-        # Find the end time, which is the end time of the total
-        end_time = self._blocks[-1]['end_time']
-
-        self._logger.debug("Flight script blocks: {}".format(len(self._blocks)))
-        self._logger.debug("Flight end time: {}".format(end_time))
 
-        # Pre-create empty values for the list. That way we can direct assign it makes it easier to check for gaps.
-        i = 0
-        while i <= end_time:
-            self._flight_plan.append(None)
-            i += 1
-        # Pre-calculate each second to figure out what's what.
-        while run_time <= end_time:
-            self._logger.debug("\tProcessing run time: {}".format(run_time))
-            # If time has advanced past the end of the current block, move to the next one.
-            if run_time > self._blocks[active_block]['end_time']:
-                active_block += 1
-                # Calculate the altitude and velocity steps needed.
-                self._logger.debug("\t\tCurrent Values:\n\t\t\tAlt: {}\n\t\t\tdA: {}\n\t\t\tVel: {}\n\t\t\tdV: {}".
-                                   format(alt, da, vel, dv))
-                try:
-                    da = ((float(self._blocks[active_block]['flight']['final_altitude']) - alt) /
-                          self._blocks[active_block]['run_time'])
-                except (KeyError, TypeError):
-                    try:
-                        if self._blocks[active_block]['flight']['alt'] == 'glide':
-                            self._logger.debug("\t\tAltitude is gliding. Keeping previous dA.")
-                        elif self._blocks[active_block]['flight']['alt'] == 'freeze':
-                            self._logger.debug("\t\tFreezing Altitude.")
-                    except KeyError:
-                        self._logger.debug("Script: Cannot determine action for block {} altitude. Needs correction!".
-                                           format(active_block))
-                        raise
-                try:
-                    dv = ((float(self._blocks[active_block]['flight']['final_velocity']) - vel) /
-                          self._blocks[active_block]['run_time'])
-                except (KeyError, TypeError):
-                    try:
-                        if self._blocks[active_block]['flight']['vel'] == 'glide':
-                            self._logger.debug("\t\tVelocity is gliding. Keeping previous dV.")
-                        elif self._blocks[active_block]['flight']['vel'] == 'freeze':
-                            self._logger.debug("\t\tFreezing Velocity.")
-                    except KeyError:
-                        self._logger.debug("Script: Cannot determine action for block {} altitude. Needs correction!".
-                                           format(active_block))
-                        raise
-                self._logger.debug("\t\tNew dA: {}\n\t\tNew dV: {}".format(da, dv))
+        for block_num in range(len(self._blocks)):
+            block = self._blocks[block_num]
+            flight = block['flight']
+            # Work out the altitude and velocity steps needed to hit the block's targets. The first block starts from
+            # a standstill.
+            if block_num > 0:
+                da = self._flight_step(flight, 'altitude', 'alt', alt, da, block)
+                dv = self._flight_step(flight, 'velocity', 'vel', vel, dv, block)
 
             # Update state based on instructions in this block.
             try:
-                met_state = self._blocks[active_block]['flight']['met_state']
+                met_state = flight['met_state']
             except KeyError:
                 pass
-            self._logger.debug("\t\tMET Clock State: {}".format(met_state))
-            # If an absolute time is defined for MET, use that.
-            if 'met' in self._blocks[active_block]['flight']:
-                met = self._blocks[active_block]['flight']['met']
-                self._logger.debug("Set absolute MET: {}".format(met))
-            elif met_state != 'hold':
-                # If clock is set to run, advance that.
-                met += 1
-            self._logger.debug("\t\tMET Clock Time: {}".format(met))
-
-            # Calculate a new altitude.
-            # If there's an absolute value for altitude, set it.
-            if 'alt' in self._blocks[active_block]['flight']:
-                # Don't put string values in.
-                if not isinstance(self._blocks[active_block]['flight']['alt'], str):
-                    alt = self._blocks[active_block]['flight']['alt']
-                    self._logger.debug("\t\tSetting absolute altitude.")
-                else:
-                    alt = alt + da
-            else:
-                # Otherwise, increment based on the target velocity.
-                alt = round(alt + da, 3)
-            self._logger.debug("\t\tAltitude: {}".format(alt))
-
-            # Calculate velocity
-            # If there's an absolute value for velocity, set it.
-            if 'vel' in self._blocks[active_block]['flight']:
-                if not isinstance(self._blocks[active_block]['flight']['vel'], str):
-                    vel = self._blocks[active_block]['flight']['vel']
-                    self._logger.debug("\t\tSetting absolute velocity")
-                else:
-                    vel = vel + dv
+            # If an absolute time is defined for MET, use that. Otherwise the clock runs if it's not held.
+            if 'met' in flight:
+                met_start = flight['met']
+                dmet = 0
             else:
-                # Otherwise, increment based on the target velocity.
-                vel = vel + dv
-            self._logger.debug("\t\tVelocity: {}".format(vel))
-
-            # Assemble it all into a nice dict.
-            flight_data = {
-                'met': met,
-                'alt': alt,
-                'vel': vel
-            }
-
-            self._flight_plan[run_time] = flight_data
+                dmet = 0 if met_state == 'hold' else 1
+                met_start = met
 
-            run_time += 1
+            # Absolute values of altitude and velocity are held for the whole block.
+            if 'alt' in flight and not isinstance(flight['alt'], str):
+                alt_start = flight['alt']
+                dalt = 0
+            else:
+                dalt = da
+                alt_start = alt
+            if 'vel' in flight and not isinstance(flight['vel'], str):
+                vel_start = flight['vel']
+                dvel = 0
+            else:
+                dvel = dv
+                vel_start = vel
+
+            self._flight_plan.extend(array('f', (met_start, dmet, alt_start, dalt, vel_start, dvel)))
+            # Values at the end of the block carry into the next.
+            run_time = block['run_time'] / 1000
+            met = met_start + dmet * run_time
+            alt = alt_start + dalt * run_time
+            vel = vel_start + dvel * run_time
+            self._logger.debug("Script: Flight plan block {} ends at MET {}, altitude {}, velocity {}",
+                               block_num, met, alt, vel)
+
+    def _flight_step(self, flight, target, mode, current, step, block):
+        """
+        Work out the per-second change of altitude or velocity for a block.
+
+        :param flight: Flight settings of the block.
+        :type flight: dict
+        :param target: Name of the target value, 'altitude' or 'velocity'.
+        :type target: str
+        :param mode: Name of the mode value, 'alt' or 'vel'.
+        :type mode: str
+        :param current: Value at the end of the previous block.
+        :type current: float
+        :param step: Per-second change in the previous block.
+        :type step: float
+        :param block: The block.
+        :type block: dict
+        :return: float
+        """
+        try:
+            return (float(flight['final_' + target]) - current) / (block['run_time'] / 1000)
+        except (KeyError, TypeError):
+            try:
+                if flight[mode] == 'glide':
+                    # Keep the previous step.
+                    return step
+                elif flight[mode] == 'freeze':
+                    return 0
+                else:
+                    return step
+            except KeyError:
+                self._logger.error("Script: Cannot determine action for block '{}' {}. Needs correction!",
+                                   block['name'], target)
+                raise
 
     def _map_displays(self, script, displays):
         if 'display_map' not in script:
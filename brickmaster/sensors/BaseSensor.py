@@ -1,13 +1,16 @@
 """
 Brickmaster Base Sensor
 """
-import adafruit_logging
+import brickmaster.log
+from array import array
+import time
 
 class BaseSensor:
     """
     Base Sensor object.
     """
-    def __init__(self, sensor_id, name, core, icon="mdi:toy-brick", publish_time=15, log_level=adafruit_logging.WARNING):
+    def __init__(self, sensor_id, name, core, icon="mdi:toy-brick", publish_time=15, sample_time=None, history_size=60,
+                 log_level=brickmaster.log.WARNING):
         """
         Base Sensor initialization.
 
@@ -19,8 +22,13 @@ class BaseSensor:
         @type core: object
         @param icon:
         @type icon: str
-        @param publish_time:
+        @param publish_time: How often readings are published, in seconds.
         @type publish_time: int
+        @param sample_time: How often the sensor is sampled, in seconds. Defaults to the publish time. Sampling faster
+        than publishing smooths the published values.
+        @type sample_time: float
+        @param history_size: Number of samples to keep in the history buffer.
+        @type history_size: int
         @param log_level: Logging level to use for the control. Technically an int, should be a valid adafruit_logging
         constant.
         @type log_level: int
@@ -39,9 +47,31 @@ class BaseSensor:
         # Initialize
         self._topics = None
         self._status = None
+        self._latest_update = 0
+        self._latest_data = None
+        self._notify = None # Callback to notify of changes. Set by the network module.
+        if sample_time is None:
+            self._sample_time = publish_time
+        else:
+            self._sample_time = sample_time
+
+        # Sample history. Set up by the subclass through _setup_history, once it knows its channels.
+        self._history_size = history_size
+        self._channels = ()
+        self._history = None # Samples, one value per channel in channel order.
+        self._history_ts = None # Time of each sample, in time.monotonic_ns() milliseconds, wrapped to 32 bits.
+        self._history_head = 0 # Next position to write in the buffer.
+        self._history_count = 0 # Number of samples in the buffer.
+        self._history_requested = 0 # Samples requested through the history topic. 0 if none pending.
+        # Aggregates over the current publish window.
+        self._window_min = None
+        self._window_max = None
+        self._window_sum = None
+        self._window_count = 0
+        self._next_publish = 0
 
         # Create a logger with the specified logger.
-        self._logger = adafruit_logging.getLogger('Brickmaster')
+        self._logger = brickmaster.log.getLogger('Brickmaster')
         self._logger.setLevel(log_level)
 
     @property
@@ -54,11 +84,168 @@ class BaseSensor:
     @property
     def status(self):
         """
-        Current status of the control. Should return ON or OFF.
+        Latest published readings. The mean, minimum and maximum of each channel over the last publish window, and the
+        number of samples in it. None if the sensor hasn't published yet.
+
+        return dict
+        """
+        return self._latest_data
+
+    @property
+    def history_requested(self):
+        """
+        Has history been requested through the history topic, and not yet sent?
+
+        return bool
+        """
+        return self._history_requested > 0
+
+    def history(self):
+        """
+        Recent samples from the history buffer, newest first, with their age in seconds. Clears any pending request,
+        and only returns as many samples as were requested.
+
+        return dict
+        """
+        count = self._history_count
+        if 0 < self._history_requested < count:
+            count = self._history_requested
+        self._history_requested = 0
+        now = (time.monotonic_ns() // 1000000) & 0xFFFFFFFF
+        channels = len(self._channels)
+        samples = []
+        i = self._history_head
+        for _ in range(count):
+            i = (i - 1) % self._history_size
+            sample = {'age': round(((now - self._history_ts[i]) & 0xFFFFFFFF) / 1000, 1)}
+            for c in range(channels):
+                sample[self._channels[c]] = round(self._history[i * channels + c], 2)
+            samples.append(sample)
+        return {'samples': samples}
+
+    def callback(self, client, topic, message):
+        """
+        History request callback. The message may give the number of samples to send, otherwise the whole buffer is
+        sent.
+        """
+        if isinstance(message, str):
+            # MiniMQTT (Circuitpython) outputs a straight string.
+            message_text = message
+        else:
+            # Paho MQTT (linux) delivers a message object from which we need to extract the payload.
+            message_text = str(message.payload, 'utf-8')
+        try:
+            count = int(message_text)
+        except ValueError:
+            count = 0
+        if count <= 0:
+            count = self._history_size
+        self._history_requested = count
+        self._changed()
+
+    def set_notify(self, callback):
+        """
+        Set the method to call when the sensor has new data. The network module uses this to queue the sensor for
+        publication.
+
+        @param callback: Method to call. Gets passed this sensor.
+        @type callback: method
+        """
+        self._notify = callback
+
+    def _changed(self):
+        """
+        Notify the network module that this sensor has new data.
+        """
+        if self._notify is not None:
+            self._notify(self)
+
+    def update(self):
+        """
+        Read the sensor if it's due. Called by the core, outside of the network's message generation.
+        """
+        raise NotImplemented("Update must be implemented in a sensor subclass.")
+
+    def step(self):
+        """
+        Update, then report when the sensor is next due. Used by the core to drive the sensor.
+
+        return int
+        """
+        self.update()
+        return self.next_due
+
+    def _setup_history(self, channels):
+        """
+        Allocate the history buffer and window aggregates. Called by subclasses with the names of their channels.
+
+        @param channels: Names of the values the sensor reads, ie: 'temperature', 'humidity'
+        @type channels: tuple
+        """
+        self._channels = channels
+        self._history = array('f', [0.0] * (self._history_size * len(channels)))
+        self._history_ts = array('L', [0] * self._history_size)
+        self._window_min = array('f', [0.0] * len(channels))
+        self._window_max = array('f', [0.0] * len(channels))
+        self._window_sum = array('f', [0.0] * len(channels))
+
+    def _record(self, values):
+        """
+        Record a sample into the history buffer and the current window. Publishes the window if the publish time has
+        passed.
+
+        @param values: Value of each channel, in channel order.
+        @type values: tuple
+        """
+        channels = len(self._channels)
+        i = self._history_head
+        first = self._window_count == 0
+        for c in range(channels):
+            value = values[c]
+            self._history[i * channels + c] = value
+            if first or value < self._window_min[c]:
+                self._window_min[c] = value
+            if first or value > self._window_max[c]:
+                self._window_max[c] = value
+            if first:
+                self._window_sum[c] = value
+            else:
+                self._window_sum[c] += value
+        self._history_ts[i] = (time.monotonic_ns() // 1000000) & 0xFFFFFFFF
+        self._history_head = (i + 1) % self._history_size
+        if self._history_count < self._history_size:
+            self._history_count += 1
+        self._window_count += 1
+
+        now = time.monotonic_ns()
+        if now >= self._next_publish:
+            self._publish_window()
+            self._next_publish = now + int(self._publish_time * 1000000000)
+
+    def _publish_window(self):
+        """
+        Package the current window as the latest data, start a new window and notify the network module.
+        """
+        latest_data = {}
+        for c in range(len(self._channels)):
+            channel = self._channels[c]
+            latest_data[channel] = round(self._window_sum[c] / self._window_count, 2)
+            latest_data[channel + '_min'] = round(self._window_min[c], 2)
+            latest_data[channel + '_max'] = round(self._window_max[c], 2)
+        latest_data['samples'] = self._window_count
+        self._latest_data = latest_data
+        self._latest_update = time.monotonic()
+        self._window_count = 0
+        self._changed()
+
+    @property
+    def next_due(self):
+        """
+        When the sensor next needs to be read for publication, in time.monotonic_ns() nanoseconds.
 
-        return str
+        return int
         """
-        raise NotImplemented("Status must be implemented in a control subclass.")
+        return int((self._latest_update + self._publish_time) * 1000000000)
 
     @property
     def name(self):
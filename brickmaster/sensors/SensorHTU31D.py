@@ -2,17 +2,38 @@
 Brickmaster Sensor - HTU31D Temperature and Humidity
 """
 
-import adafruit_logging
+import brickmaster.log
 from .BaseSensor import BaseSensor
+import struct
+import sys
 import time
 
+# On general-purpose systems, sample in a background thread.
+if sys.implementation.name == 'cpython':
+    import threading
+    from collections import deque
+else:
+    threading = None
+
+# Sensor commands, from the adafruit_htu31d library.
+_HTU31D_READTEMPHUM = 0x00
+# Time for a conversion at the highest resolution is 20.32ms, per datasheet Table 5. Give it a margin.
+_HTU31D_CONVERSION_TIME = 30000000
+
 
 class SensorHTU31D(BaseSensor):
     """
     Sensor for an HTU31D temperature/humidity sensor.
+
+    A reading takes a conversion of around 20ms. So that doesn't stall the run loop, on Linux readings are taken by a
+    background thread, which hands them to the run loop to be stored and published. On CircuitPython the reading is
+    split in two, triggering the conversion on one pass and reading the result on a later one.
+
+    Setting up the sensor resets it, which takes a while, so it's put off until the first sample rather than holding up
+    startup.
     """
-    def __init__(self, ctrl_id, name, i2c_bus, address, core, unit="C", publish_time=60,
-                 icon="mdi:toy-brick", log_level=adafruit_logging.WARNING):
+    def __init__(self, ctrl_id, name, i2c_bus, address, core, unit="C", publish_time=60, sample_time=None,
+                 history_size=60, icon="mdi:toy-brick", log_level=brickmaster.log.WARNING):
         """
         Args:
             ctrl_id (str): ID of the sensor. Cannot have spaces.
@@ -22,56 +43,175 @@ class SensorHTU31D(BaseSensor):
             core (Brickmaster): Reference to the Brickmaster core.
             unit (str): Temperature units to report. "F" or "C". Defaults to "C".
             publish_time (int): How often data should be published, in seconds.
+            sample_time (float): How often the sensor should be read, in seconds. Defaults to the publish time.
+            history_size (int): Number of samples to keep in history.
             icon (str): Icon to use for discovery.
             log_level (str): Log level to use. Defaults to Warning.
 
         Returns:
             None
         """
-        super().__init__(ctrl_id, name, core, icon, publish_time, log_level)
+        super().__init__(ctrl_id, name, core, icon, publish_time, sample_time, history_size, log_level)
 
         try:
             import adafruit_htu31d
         except ImportError as ie:
             raise ie
+        self._htu31d_class = adafruit_htu31d.HTU31D
 
         self._i2c_bus = i2c_bus
         self._address = address
         if unit not in ("F", "C"):
             raise ValueError("Unit must be 'C' for Celsis or 'F' for Farenheight")
         self._unit = unit
-        self._latest_update = 0
-        self._latest_data = None
-        self._publish_time = publish_time
-        self._sensor = adafruit_htu31d.HTU31D(self._i2c_bus, self._address)
+        self._setup_history(('temperature', 'humidity'))
+        self._sensor = None # Library sensor object. Created on the first sample.
+        # Sampling state.
+        self._next_sample = 0
+        self._converting = False
+        self._conversion_due = None
+        self._worker = None
+        self._readings = None # Readings from the background thread, waiting for the run loop.
+        if threading is not None:
+            self._readings = deque((), history_size)
+            self._worker = threading.Thread(target=self._worker_loop, name='htu31d_' + ctrl_id, daemon=True)
+            self._worker.start()
 
-    @property
-    def status(self):
+    def update(self):
         """
-        Get status from the sensor and package it.
+        Advance the sampling of the sensor. Triggers a conversion when a sample is due, and reads the result once the
+        conversion time has passed. When a background thread is doing the sampling, stores the readings it has taken.
 
         Args:
             None
 
         Returns:
-            dict
+            None
+        """
+        if self._worker is not None:
+            readings = self._readings
+            while readings:
+                temp, humidity = readings.popleft()
+                self._store(temp, humidity)
+            return
+        now = time.monotonic_ns()
+        if self._converting:
+            if now >= self._conversion_due:
+                self._converting = False
+                try:
+                    temp, humidity = self._read_conversion()
+                except (OSError, RuntimeError) as e:
+                    self._logger.warning("Sensor: Could not read HTU31D '{}'. Will try again at next sample. ({})",
+                                         self.id, e)
+                else:
+                    self._store(temp, humidity)
+        elif now >= self._next_sample:
+            try:
+                self._setup_sensor()
+                self._trigger_conversion()
+            except (OSError, ValueError) as e:
+                self._logger.warning("Sensor: Could not trigger HTU31D '{}' conversion. Will try again at next sample. "
+                                     "({})", self.id, e)
+            else:
+                self._converting = True
+                self._conversion_due = now + _HTU31D_CONVERSION_TIME
+            # Keep to the sample schedule. If samples were missed, carry on from now.
+            sample_time = int(self._sample_time * 1000000000)
+            self._next_sample += sample_time
+            if self._next_sample <= now:
+                self._next_sample = now + sample_time
+
+    @property
+    def next_due(self):
+        """
+        When the sensor next needs attention, in time.monotonic_ns() nanoseconds. Either the end of a running
+        conversion or the next sample. None when a background thread is doing the sampling, as it wakes the core when
+        it has readings.
+
+        return int
+        """
+        if self._worker is not None:
+            return None
+        if self._converting:
+            return self._conversion_due
+        return self._next_sample
+
+    def _setup_sensor(self):
+        """
+        Create the library's sensor object, if it hasn't been already. Raises the library's errors if the sensor can't
+        be found, so it can be tried again at the next sample.
+        """
+        if self._sensor is None:
+            self._logger.debug("Sensor: Setting up HTU31D '{}' at address {}.", self.id, hex(self._address))
+            self._sensor = self._htu31d_class(self._i2c_bus, self._address)
+
+    def _trigger_conversion(self):
+        """
+        Start a conversion on the sensor. Uses the library's conversion command, so resolution settings are kept.
+        """
+        buffer = self._sensor._buffer
+        buffer[0] = self._sensor._conversion_command
+        with self._sensor.i2c_device as i2c:
+            i2c.write(buffer, end=1)
+
+    def _read_conversion(self):
+        """
+        Read the result of a conversion. Follows the library's own measurements method.
+
+        :return: Temperature in Celsius and relative humidity.
+        :rtype: tuple
         """
+        buffer = self._sensor._buffer
+        buffer[0] = _HTU31D_READTEMPHUM
+        with self._sensor.i2c_device as i2c:
+            i2c.write_then_readinto(buffer, buffer, out_end=1)
+        temperature, temp_crc, humidity, humidity_crc = struct.unpack_from(">HBHB", buffer)
+        if temp_crc != self._sensor._crc(temperature) or humidity_crc != self._sensor._crc(humidity):
+            raise RuntimeError("Invalid CRC calculated")
+        temperature = -40.0 + 165.0 * temperature / 65535.0
+        humidity = 100 * humidity / 65535.0
+        humidity = max(min(humidity, 100), 0)
+        return temperature, humidity
 
-        # Update every 6 seconds - 10 times a minute.
-        if time.monotonic() - self._latest_update > self._publish_time:
-            temp, humidity = self._sensor.measurements
-            # Convert temp if needed
-            if self._unit == "F":
-                temp = (temp - 32) * 5/9
-            self._latest_data = {"temperature": f"{temp:.2f}", "humidity": f"{humidity:.2f}"}
-            self._latest_update = time.monotonic()
-        return self._latest_data
+    def _worker_loop(self):
+        """
+        Background sampling, for Linux. Reads the sensor every sample time, and queues the readings for the run loop,
+        which does all the storing and publishing.
+        """
+        sample_time = int(self._sample_time * 1000000000)
+        next_sample = time.monotonic_ns()
+        while True:
+            try:
+                self._setup_sensor()
+                temp, humidity = self._sensor.measurements
+            except (OSError, RuntimeError, ValueError) as e:
+                self._logger.warning("Sensor: Could not read HTU31D '{}'. Will try again at next sample. ({})",
+                                     self.id, e)
+            else:
+                self._readings.append((temp, humidity))
+                # Let the run loop know there's something to store.
+                self._core.wake()
+            # Sleep until the next sample is due, so the time taken by the reading doesn't add up. If samples were
+            # missed, carry on from now.
+            next_sample += sample_time
+            now = time.monotonic_ns()
+            if next_sample <= now:
+                next_sample = now + sample_time
+            time.sleep((next_sample - now) / 1000000000)
 
-    def callback(self, client, topic, message):
+    def _store(self, temp, humidity):
         """
-        Sensor callback. Does nothing.
+        Store a reading.
+
+        :param temp: Temperature, in Celsius.
+        :type temp: float
+        :param humidity: Relative humidity.
+        :type humidity: float
         """
-        pass
+        # Convert temp if needed
+        if self._unit == "F":
+            temp = temp * 9 / 5 + 32
+        self._record((temp, humidity))
 
     @property
     def uom(self):
@@ -2,9 +2,18 @@
 Brickmaster Startup for Circuitpython boards
 """
 
+import os
+# Debug logging is compiled out, so the run loop doesn't spend time or memory on it, unless 'BRICKMASTER_DEBUG_LOG = 1'
+# is set in settings.toml. This only applies to modules compiled on the board, so must be done before importing
+# Brickmaster.
+if os.getenv("BRICKMASTER_DEBUG_LOG") != 1:
+    try:
+        import micropython
+        micropython.opt_level(1)
+    except (ImportError, AttributeError):
+        pass
 import brickmaster
 import microcontroller
-import os
 import time
 import traceback
 # import sys